@@ -0,0 +1,116 @@
+"""
+Micro-batching throughput benchmark
+Compares concurrent single-query similarity lookups against the MicroBatcher
+
+Usage (from the repository root):
+    python -m benchmarks.bench_batching --movies 200000 --concurrency 32 --max-batch-size 32 --max-wait-ms 2
+"""
+
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import EMBEDDING_DIM, generate_catalog
+from recommender.batching import MicroBatcher
+from training.similarity import load_similarity
+
+
+def _drive(search, n_movies: int, concurrency: int, duration: float, k: int, seed: int):
+    """Run `concurrency` threads issuing top-k queries back to back"""
+    latencies = [[] for _ in range(concurrency)]
+    deadline = time.perf_counter() + duration
+
+    def worker(i):
+        rng = np.random.default_rng(seed + i)
+        while time.perf_counter() < deadline:
+            idx = int(rng.integers(n_movies))
+            start = time.perf_counter()
+            search(idx, k)
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    ms = np.concatenate([np.asarray(l) for l in latencies]) * 1000
+    return {
+        'queries': int(len(ms)),
+        'throughput_qps': len(ms) / elapsed,
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+    }
+
+
+def run(model_dir, concurrency=32, duration=10.0, k=16, max_batch_size=32, max_wait_ms=2.0, seed=42):
+    similarity = load_similarity(model_dir)
+    n_movies = len(similarity)
+
+    def single(idx, k):
+        return similarity.top_k([idx], k)
+
+    unbatched = _drive(single, n_movies, concurrency, duration, k, seed)
+
+    batcher = MicroBatcher(similarity.top_k, max_batch_size, max_wait_ms)
+    try:
+        batched = _drive(batcher.search, n_movies, concurrency, duration, k, seed)
+        batched['batcher'] = batcher.metrics.snapshot()
+    finally:
+        batcher.close()
+
+    return {
+        'catalog_size': n_movies,
+        'index': 'faiss' if getattr(similarity, 'index', None) is not None else 'brute-force',
+        'concurrency': concurrency,
+        'k': k,
+        'max_batch_size': max_batch_size,
+        'max_wait_ms': max_wait_ms,
+        'unbatched': unbatched,
+        'batched': batched,
+        'throughput_gain': batched['throughput_qps'] / unbatched['throughput_qps'],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the throughput gain of micro-batched similarity search")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--model-dir', help="Existing model directory")
+    target.add_argument('--movies', type=int, default=50_000, help="Size of a generated synthetic catalog")
+    parser.add_argument('--data-dir', default='./bench_data', help="Where synthetic catalogs are cached")
+    parser.add_argument('--concurrency', type=int, default=32, help="Concurrent query threads")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument('--k', type=int, default=16, help="Neighbours per query")
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    model_dir = args.model_dir
+    if model_dir is None:
+        model_dir = Path(args.data_dir) / f'catalog_{args.movies}_d{EMBEDDING_DIM}_s{args.seed}'
+        if not (model_dir / 'config.json').exists():
+            print(f"Generating synthetic catalog with {args.movies:,} movies...")
+            generate_catalog(model_dir, args.movies, seed=args.seed)
+
+    report = run(model_dir, args.concurrency, args.duration, args.k,
+                 args.max_batch_size, args.max_wait_ms, args.seed)
+
+    print(f"\n{report['catalog_size']:,} movies ({report['index']}), {report['concurrency']} threads, k={report['k']}")
+    for mode in ('unbatched', 'batched'):
+        r = report[mode]
+        print(f"   {mode:<10} {r['throughput_qps']:9.1f} q/s | p50 {r['p50_ms']:7.2f} ms | p99 {r['p99_ms']:7.2f} ms")
+    print(f"   mean batch size {report['batched']['batcher']['mean_batch_size']:.1f}")
+    print(f"✅ Throughput gain: {report['throughput_gain']:.2f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,260 @@
+"""
+Recommender hot-path benchmarks
+Measures model load time, memory and per-call latency on synthetic catalogs
+
+Usage (from the repository root):
+    python -m benchmarks.bench_recommender --sizes 10000 50000 --output bench_results.json
+    python -m benchmarks.bench_recommender --baseline bench_baseline.json --tolerance 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import EMBEDDING_DIM, generate_catalog
+
+
+DEFAULT_SIZES = [10_000, 50_000, 200_000, 930_000]
+
+OPERATIONS = [
+    'find_movie',
+    'search_movies',
+    'get_recommendations',
+    'get_recommendations_filtered',
+    'get_diverse_recommendations',
+]
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def _summarize(samples):
+    """Latency statistics in milliseconds"""
+    ms = np.asarray(samples) * 1000
+    return {
+        'n': int(len(ms)),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'min_ms': float(ms.min()),
+        'max_ms': float(ms.max()),
+    }
+
+
+def _time_calls(fn, inputs, repeat: int, time_budget: float):
+    """Call fn over inputs until `repeat` samples or the time budget is spent"""
+    samples = []
+    deadline = time.perf_counter() + time_budget
+    for i in range(repeat):
+        arg = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn(arg)
+        samples.append(time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            break
+    return _summarize(samples)
+
+
+def _run_catalog(model_dir: str, n_movies: int, operations, repeat: int, time_budget: float, seed: int):
+    """Benchmark one catalog (runs in a fresh process so load time and RSS are clean)"""
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    from training.infer import MovieRecommender
+    import_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender = MovieRecommender(model_dir=model_dir)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = _rss_mb()
+
+    # Query workload: mostly popular titles (head of the quality-sorted catalog) plus a long tail
+    rng = np.random.default_rng(seed)
+    titles = recommender.metadata['title']
+    head = rng.integers(0, min(n_movies, 1_000), size=75)
+    tail = rng.integers(0, n_movies, size=25)
+    seeds = [titles.iloc[i] for i in np.concatenate([head, tail])]
+    prefixes = [t[:max(2, len(t) // 3)] for t in seeds]
+
+    workloads = {
+        'find_movie': (recommender.find_movie, seeds),
+        'search_movies': (lambda q: recommender.search_movies(q, n=20), prefixes),
+        'get_recommendations': (
+            lambda t: recommender.get_recommendations(t, n_recommendations=10),
+            seeds,
+        ),
+        'get_recommendations_filtered': (
+            lambda t: recommender.get_recommendations(
+                t, n_recommendations=10, min_year=2015, genres=['Action'], min_rating=7.0
+            ),
+            seeds,
+        ),
+        'get_diverse_recommendations': (
+            lambda t: recommender.get_diverse_recommendations(t, n_recommendations=10),
+            seeds,
+        ),
+    }
+
+    ops = {}
+    for name in operations:
+        fn, inputs = workloads[name]
+        ops[name] = _time_calls(fn, inputs, repeat, time_budget)
+
+    return {
+        'catalog_size': n_movies,
+        'import_seconds': import_seconds,
+        'load_seconds': load_seconds,
+        'rss_before_load_mb': rss_before,
+        'rss_after_load_mb': rss_loaded,
+        'rss_after_ops_mb': _rss_mb(),
+        'peak_rss_mb': _peak_rss_mb(),
+        'ops': ops,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, data_dir, operations=OPERATIONS, repeat=50, time_budget=30.0, dim=EMBEDDING_DIM, seed=42):
+    """
+    Generate (or reuse) synthetic catalogs and benchmark each in a separate process
+
+    Returns:
+        Results dictionary (also the JSON document written by the CLI)
+    """
+    data_dir = Path(data_dir)
+    results = []
+
+    for n_movies in sizes:
+        model_dir = data_dir / f'catalog_{n_movies}_d{dim}_s{seed}'
+        if not (model_dir / 'config.json').exists():
+            print(f"Generating synthetic catalog with {n_movies:,} movies...")
+            start = time.perf_counter()
+            generate_catalog(model_dir, n_movies, dim=dim, seed=seed)
+            print(f"   done in {time.perf_counter() - start:.1f}s")
+
+        print(f"Benchmarking {n_movies:,} movies...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            result = pool.submit(
+                _run_catalog, str(model_dir), n_movies, list(operations), repeat, time_budget, seed
+            ).result()
+        results.append(result)
+
+        print(f"   load {result['load_seconds']:.2f}s | RSS {result['rss_after_load_mb']:.0f} MB")
+        for name, stats in result['ops'].items():
+            print(f"   {name:<32} p50 {stats['p50_ms']:9.2f} ms | p95 {stats['p95_ms']:9.2f} ms | n={stats['n']}")
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'embedding_dim': dim,
+            'seed': seed,
+            'repeat': repeat,
+            'time_budget': time_budget,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance: float = 0.2):
+    """
+    Compare two result documents
+
+    Returns:
+        List of regression descriptions (empty if none exceed the tolerance)
+    """
+    regressions = []
+    base_by_size = {r['catalog_size']: r for r in baseline['results']}
+
+    for result in current['results']:
+        base = base_by_size.get(result['catalog_size'])
+        if base is None:
+            continue
+
+        checks = [('load_seconds', result['load_seconds'], base['load_seconds']),
+                  ('rss_after_load_mb', result['rss_after_load_mb'], base['rss_after_load_mb'])]
+        for name, stats in result['ops'].items():
+            if name in base['ops']:
+                checks.append((f"{name}.p50_ms", stats['p50_ms'], base['ops'][name]['p50_ms']))
+
+        for metric, new, old in checks:
+            if old > 0 and new > old * (1 + tolerance):
+                regressions.append(
+                    f"{result['catalog_size']:,} movies: {metric} {old:.2f} -> {new:.2f} "
+                    f"(+{(new / old - 1) * 100:.0f}%)"
+                )
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark recommender hot paths on synthetic catalogs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Catalog sizes")
+    parser.add_argument('--ops', nargs='+', choices=OPERATIONS, default=OPERATIONS, help="Operations to measure")
+    parser.add_argument('--data-dir', default='./bench_data', help="Where synthetic catalogs are cached")
+    parser.add_argument('--dim', type=int, default=EMBEDDING_DIM, help="Embedding dimension")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for catalogs and queries")
+    parser.add_argument('--repeat', type=int, default=50, help="Calls per operation")
+    parser.add_argument('--time-budget', type=float, default=30.0, help="Max seconds per operation")
+    parser.add_argument('--output', default='bench_results.json', help="JSON results file")
+    parser.add_argument('--baseline', help="Previous results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown before failing (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.data_dir, args.ops, args.repeat, args.time_budget, args.dim, args.seed)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"   • {line}")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
@@ -0,0 +1,201 @@
+"""
+Web worker boot benchmark
+Measures, in fresh interpreters, how long the WSGI application takes to import
+and answer its first liveness probe, and checks that no heavy numeric module is
+imported before the model loads. With --model-dir it also starts an inference
+server and checks that a worker on the socket backend still imports none of
+them after connecting and answering API requests.
+
+Usage (from the repository root):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 600 --repeat 5 --top 15
+    python -m benchmarks.import_time --model-dir ./models
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Only the model loader may import these; the web process boots without them
+HEAVY_MODULES = ['numpy', 'pandas', 'scipy', 'sklearn', 'faiss', 'pyarrow', 'msgpack']
+# A worker on the socket backend needs msgpack for the wire protocol, and nothing else
+SOCKET_HEAVY_MODULES = [m for m in HEAVY_MODULES if m != 'msgpack']
+
+# Runs in the child: import the application, then send one request through it
+_CHILD = r'''
+import io, json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_recommendation.settings')
+from movie_recommendation.wsgi import application
+booted = time.perf_counter()
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '443', 'HTTP_HOST': 'localhost',
+    'wsgi.url_scheme': 'https', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+}
+status = []
+b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+answered = time.perf_counter()
+print(json.dumps({
+    'boot_ms': (booted - start) * 1000,
+    'first_response_ms': (answered - booted) * 1000,
+    'status': status[0],
+    'heavy_modules': sorted(m for m in json.loads(sys.argv[2]) if m in sys.modules),
+}))
+'''
+
+
+# Runs in the child: connect to the inference server, then serve model-backed requests
+_CONNECTED_CHILD = r'''
+import io, json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_recommendation.settings')
+from movie_recommendation.wsgi import application
+
+def get(path, query=''):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '443', 'HTTP_HOST': 'localhost',
+        'wsgi.url_scheme': 'https', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+    }
+    status = []
+    body = b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+    return status[0], body
+
+deadline = time.monotonic() + float(sys.argv[2])
+while True:
+    status, body = get('/api/health/')
+    if not status.startswith('503') or json.loads(body).get('status') != 'loading' or time.monotonic() > deadline:
+        break
+    time.sleep(0.2)
+statuses = [status]
+if status.startswith('200'):
+    status, body = get('/api/top-rated/', 'n=5&min_votes=0')
+    statuses.append(status)
+    title = json.loads(body)['movies'][0]['title']
+    statuses.append(get('/api/recommendations/', 'n=5&title=' + title.replace(' ', '+'))[0])
+print(json.dumps({
+    'statuses': statuses,
+    'heavy_modules': sorted(m for m in json.loads(sys.argv[1]) if m in sys.modules),
+}))
+'''
+
+
+def _slowest_imports(stderr: str, top: int):
+    """Packages with the most import time (own modules' self time summed) from `-X importtime` output"""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        if self_us.strip().isdigit():
+            package = name.strip().split('.')[0]
+            totals[package] = totals.get(package, 0) + int(self_us)
+    return sorted(totals.items(), key=lambda item: -item[1])[:top]
+
+
+def measure(path: str = '/api/live/', repeat: int = 5, top: int = 10):
+    """Median boot and first-response times over `repeat` fresh interpreters"""
+    env = {**os.environ, 'DEBUG': 'False', 'PYTHONPATH': str(ROOT)}
+    runs, slowest = [], []
+    for i in range(repeat):
+        command = [sys.executable] + (['-X', 'importtime'] if i == 0 else []) + ['-c', _CHILD, path, json.dumps(HEAVY_MODULES)]
+        result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+        if i == 0:
+            slowest = _slowest_imports(result.stderr, top)
+    # The first run pays -X importtime overhead; it is only used for the import breakdown
+    timed = runs[1:] or runs
+    return {
+        'path': path,
+        'status': runs[-1]['status'],
+        'boot_ms': statistics.median(r['boot_ms'] for r in timed),
+        'first_response_ms': statistics.median(r['first_response_ms'] for r in timed),
+        'heavy_modules': sorted({m for r in runs for m in r['heavy_modules']}),
+        'slowest_imports_ms': {name: us / 1000 for name, us in slowest},
+    }
+
+
+def check_connected(model_dir, timeout: float = 120.0):
+    """
+    Heavy modules imported by a socket-backend worker after it connects to an
+    inference server (started here on `model_dir`) and answers API requests
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = str(Path(tmp) / 'inference.sock')
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'recommender.inference_server', '--model-dir', str(model_dir),
+             '--socket', socket_path, '--warmup-titles', '0'],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            env = {**os.environ, 'DEBUG': 'False', 'PYTHONPATH': str(ROOT),
+                   'RECOMMENDER_BACKEND': 'socket', 'INFERENCE_SOCKET': socket_path,
+                   'INFERENCE_READY_TIMEOUT': str(timeout)}
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, '-c', _CONNECTED_CHILD, json.dumps(SOCKET_HEAVY_MODULES), str(timeout)],
+                cwd=ROOT, env=env, capture_output=True, text=True, check=True
+            )
+            report = json.loads(result.stdout.strip().splitlines()[-1])
+            report['seconds'] = round(time.perf_counter() - start, 2)
+            return report
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure web worker boot time and check its import graph")
+    parser.add_argument('--path', default='/api/live/', help="URL of the first request")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument('--top', type=int, default=10, help="Slowest top-level imports to list")
+    parser.add_argument('--budget-ms', type=float, default=1000.0, help="Max boot + first response time")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    parser.add_argument('--model-dir', help="Also check a socket-backend worker against an inference server on this model")
+    args = parser.parse_args()
+
+    report = measure(args.path, max(args.repeat, 2), args.top)
+    if args.model_dir:
+        report['connected'] = check_connected(args.model_dir)
+    total = report['boot_ms'] + report['first_response_ms']
+    print(f"Boot {report['boot_ms']:.0f} ms, first {args.path} response {report['first_response_ms']:.1f} ms "
+          f"({report['status']})")
+    for name, ms in report['slowest_imports_ms'].items():
+        print(f"   {ms:8.1f} ms  {name}")
+    if args.model_dir:
+        connected = report['connected']
+        print(f"Socket backend: {', '.join(connected['statuses'])} in {connected['seconds']:.1f}s, "
+              f"heavy modules: {', '.join(connected['heavy_modules']) or 'none'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    failures = []
+    if report['heavy_modules']:
+        failures.append(f"heavy modules imported at boot: {', '.join(report['heavy_modules'])}")
+    if total > args.budget_ms:
+        failures.append(f"boot + first response {total:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    if not report['status'].startswith('200'):
+        failures.append(f"{args.path} answered {report['status']}")
+    if args.model_dir:
+        connected = report['connected']
+        if connected['heavy_modules']:
+            failures.append(f"heavy modules imported by the socket backend: {', '.join(connected['heavy_modules'])}")
+        if not all(status.startswith('200') for status in connected['statuses']) or len(connected['statuses']) < 3:
+            failures.append(f"socket backend answered {', '.join(connected['statuses'])}")
+    if failures:
+        print(f"\n❌ {len(failures)} regression(s):")
+        for line in failures:
+            print(f"   • {line}")
+        sys.exit(1)
+    print(f"✅ Within the {args.budget_ms:.0f} ms budget, no heavy modules imported")
@@ -0,0 +1,403 @@
+"""
+HTTP load test for the Django app against a synthetic (or trained) model
+Boots the WSGI/ASGI app, replays a realistic traffic mix and reports throughput
+and p50/p95/p99 latency per endpoint.
+
+Usage (from the repository root):
+    python -m benchmarks.loadtest --movies 50000 --server gunicorn --workers 2 --threads 4 --concurrency 32
+    python -m benchmarks.loadtest --model-dir ./models --server uvicorn --workers 2 --duration 60
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --concurrency 16
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import quote_plus, urlencode, urlparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_catalog
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Relative weights of user scenarios
+DEFAULT_MIX = {'search': 6, 'recommend': 2, 'status': 1, 'home': 1}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _server_command(server: str, port: int, workers: int, threads: int):
+    bind = f'127.0.0.1:{port}'
+    if server == 'gunicorn':
+        return [
+            sys.executable, '-m', 'gunicorn', 'movie_recommendation.wsgi:application',
+            '--bind', bind, '--workers', str(workers), '--threads', str(threads),
+            '--log-level', 'warning',
+        ]
+    if server == 'uvicorn':
+        return [
+            sys.executable, '-m', 'uvicorn', 'movie_recommendation.asgi:application',
+            '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+            '--log-level', 'warning', '--no-access-log',
+        ]
+    return [sys.executable, 'manage.py', 'runserver', bind, '--noreload']
+
+
+def start_server(server: str, model_dir, workers: int = 2, threads: int = 4):
+    """
+    Launch the app against `model_dir`
+
+    Returns:
+        (subprocess.Popen, base_url)
+    """
+    if server != 'runserver' and importlib.util.find_spec(server) is None:
+        raise RuntimeError(f"{server} is not installed (pip install {server})")
+
+    port = _free_port()
+    env = dict(os.environ)
+    env['MODEL_DIR'] = str(Path(model_dir).resolve())
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'movie_recommendation.settings')
+    (BASE_DIR / 'logs').mkdir(exist_ok=True)
+
+    process = subprocess.Popen(
+        _server_command(server, port, workers, threads),
+        cwd=BASE_DIR, env=env, start_new_session=True,
+    )
+    return process, f'http://127.0.0.1:{port}'
+
+
+def stop_server(process):
+    if process.poll() is None:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+class Client:
+    """Keep-alive HTTP client for one virtual user"""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        url = urlparse(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self.conn = None
+        self.cookies = {}
+
+    def request(self, method: str, path: str, body: str = None, headers: dict = None):
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+
+        for header in response.headers.get_all('Set-Cookie') or []:
+            name, _, rest = header.partition('=')
+            self.cookies[name.strip()] = rest.split(';', 1)[0]
+        if response.headers.get('Connection', '').lower() == 'close':
+            self.conn.close()
+            self.conn = None
+        return response.status, data
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+
+def wait_until_ready(base_url: str, timeout: float = 600.0, required: int = 1):
+    """
+    Poll /api/model-status/ until the model is loaded
+
+    Each poll uses a fresh connection so it can land on any worker; `required`
+    consecutive ready answers are needed before traffic starts.
+    """
+    ready = 0
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        client = Client(base_url, timeout=5)
+        try:
+            status, body = client.request('GET', '/api/model-status/')
+            data = json.loads(body) if status == 200 else {}
+            if data.get('status') == 'error':
+                raise RuntimeError(f"Model failed to load: {data.get('error')}")
+            ready = ready + 1 if data.get('loaded') else 0
+            if ready >= required:
+                return
+        except (OSError, http.client.HTTPException, ValueError):
+            ready = 0
+        finally:
+            client.close()
+        time.sleep(0.1 if ready else 0.5)
+    raise TimeoutError(f"Model not ready after {timeout:.0f}s")
+
+
+class LoadTest:
+    """Closed-loop load generator: each virtual user runs scenarios back to back"""
+
+    def __init__(self, base_url, titles, mix=None, concurrency=16, duration=30.0,
+                 think_time=0.0, seed=42):
+        self.base_url = base_url
+        self.titles = titles
+        self.mix = mix or DEFAULT_MIX
+        self.concurrency = concurrency
+        self.duration = duration
+        self.think_time = think_time
+        self.seed = seed
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def _record(self, endpoint, start, status):
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.samples[endpoint].append(elapsed)
+            if status >= 400:
+                self.errors[endpoint] += 1
+
+    def _call(self, client, endpoint, method, path, body=None, headers=None):
+        start = time.perf_counter()
+        try:
+            status, data = client.request(method, path, body, headers)
+        except (OSError, http.client.HTTPException):
+            status, data = 599, b''
+        self._record(endpoint, start, status)
+        return status, data
+
+    def _think(self):
+        if self.think_time:
+            time.sleep(self.think_time)
+
+    def _scenario_home(self, client, rng):
+        self._call(client, 'GET /', 'GET', '/')
+
+    def _scenario_status(self, client, rng):
+        # Browsers poll several times while the loading overlay is visible
+        for _ in range(rng.randint(1, 5)):
+            self._call(client, 'GET /api/model-status/', 'GET', '/api/model-status/')
+            self._think()
+
+    def _scenario_search(self, client, rng):
+        # Autocomplete keystrokes: one request per character once the query has 2+ characters
+        title = rng.choice(self.titles)
+        for length in range(2, min(len(title), rng.randint(4, 14)) + 1):
+            path = '/api/search/?' + urlencode({'q': title[:length]})
+            self._call(client, 'GET /api/search/', 'GET', path)
+            self._think()
+
+    def _scenario_recommend(self, client, rng):
+        token = client.cookies.get('csrftoken')
+        if token is None:
+            self._call(client, 'GET /', 'GET', '/')
+            token = client.cookies.get('csrftoken', '')
+        title = rng.choice(self.titles)
+        body = f'csrfmiddlewaretoken={quote_plus(token)}&movie_name={quote_plus(title)}'
+        self._call(client, 'POST /', 'POST', '/', body, {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'X-CSRFToken': token,
+        })
+
+    def _user(self, user_id, deadline):
+        rng = random.Random(self.seed + user_id)
+        scenarios = list(self.mix)
+        weights = [self.mix[s] for s in scenarios]
+        client = Client(self.base_url)
+        try:
+            while time.perf_counter() < deadline:
+                scenario = rng.choices(scenarios, weights)[0]
+                getattr(self, f'_scenario_{scenario}')(client, rng)
+        finally:
+            client.close()
+
+    def run(self):
+        start = time.perf_counter()
+        deadline = start + self.duration
+        threads = [
+            threading.Thread(target=self._user, args=(i, deadline), daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed):
+        def stats(samples, errors):
+            ms = np.asarray(samples) * 1000
+            return {
+                'requests': int(len(ms)),
+                'errors': int(errors),
+                'throughput_rps': len(ms) / elapsed,
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p95_ms': float(np.percentile(ms, 95)),
+                'p99_ms': float(np.percentile(ms, 99)),
+                'max_ms': float(ms.max()),
+            }
+
+        endpoints = {
+            name: stats(samples, self.errors[name])
+            for name, samples in sorted(self.samples.items()) if samples
+        }
+        all_samples = [s for samples in self.samples.values() for s in samples]
+        return {
+            'elapsed_seconds': elapsed,
+            'concurrency': self.concurrency,
+            'total': stats(all_samples, sum(self.errors.values())) if all_samples else {},
+            'endpoints': endpoints,
+        }
+
+
+def _parse_mix(value: str):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _skewed(titles, n: int, seed: int):
+    """`n` query titles drawn with a Zipf skew towards the head of `titles`"""
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(1.2, size=n) - 1, len(titles) - 1)
+    return [re.sub(r'\s+', ' ', str(titles[r])) for r in ranks]
+
+
+def _load_titles(model_dir, n: int = 5_000, seed: int = 42):
+    """Query titles skewed towards the popular head of the catalog"""
+    titles = pd.read_parquet(Path(model_dir) / 'movie_metadata.parquet', columns=['title'])['title']
+    return _skewed(titles.to_numpy(), n, seed)
+
+
+def _fetch_titles(base_url: str, n: int = 5_000, seed: int = 42):
+    """
+    Query titles of the catalog a running server actually serves
+
+    Seeded from its /api/top-rated/ list (the highest-rated movies, regardless
+    of votes, then those with 1000+ votes), so searches and recommendations hit
+    real titles instead of a synthetic catalog the server never loaded.
+    """
+    client = Client(base_url)
+    try:
+        titles = []
+        for min_votes in (0, 1000):
+            status, body = client.request('GET', f'/api/top-rated/?n=100&min_votes={min_votes}')
+            if status != 200:
+                raise RuntimeError(f"GET /api/top-rated/ returned {status}")
+            titles += [m['title'] for m in json.loads(body)['movies'] if m['title'] not in titles]
+    finally:
+        client.close()
+    if not titles:
+        raise RuntimeError(f"{base_url} returned no titles; pass --model-dir with the model it serves")
+    return _skewed(titles, n, seed)
+
+
+def _print_report(report):
+    total = report['total']
+    print(f"\n{'=' * 90}")
+    print(f"Load test: {report['concurrency']} users for {report['elapsed_seconds']:.1f}s")
+    print(f"{'=' * 90}")
+    if not total:
+        print("no successful requests")
+        return
+    print(f"{'endpoint':<28}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(report['endpoints'].items()) + [('TOTAL', total)]
+    for name, s in rows:
+        print(f"{name:<28}{s['requests']:>10}{s['errors']:>8}{s['throughput_rps']:>10.1f}"
+              f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the movie recommendation web app")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--model-dir', help="Existing model directory to serve")
+    target.add_argument('--movies', type=int, default=10_000, help="Size of a generated synthetic catalog")
+    parser.add_argument('--data-dir', default='./bench_data', help="Where synthetic catalogs are cached")
+    parser.add_argument('--url', help="Test an already running server instead of booting one; query titles "
+                                      "come from its /api/top-rated/ unless --model-dir is its model")
+    parser.add_argument('--server', choices=['gunicorn', 'uvicorn', 'runserver'], default='gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help="Server worker processes")
+    parser.add_argument('--threads', type=int, default=4, help="Threads per gunicorn worker")
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument('--duration', type=float, default=30.0, help="Test duration in seconds")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Seconds between a user's requests")
+    parser.add_argument('--mix', type=_parse_mix, default=DEFAULT_MIX,
+                        help="Scenario weights, e.g. search=6,recommend=2,status=1,home=1")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    model_dir = args.model_dir
+    if model_dir is None and args.url is None:
+        model_dir = Path(args.data_dir) / f'catalog_{args.movies}_d384_s{args.seed}'
+        if not (model_dir / 'config.json').exists():
+            print(f"Generating synthetic catalog with {args.movies:,} movies...")
+            generate_catalog(model_dir, args.movies, seed=args.seed)
+
+    process = None
+    base_url = args.url
+    try:
+        if base_url is None:
+            print(f"Starting {args.server} (workers={args.workers}, threads={args.threads}) on {model_dir}...")
+            process, base_url = start_server(args.server, model_dir, args.workers, args.threads)
+
+        start = time.perf_counter()
+        wait_until_ready(base_url, required=1 if args.url else args.workers * 4)
+        print(f"Model ready after {time.perf_counter() - start:.1f}s, running load for {args.duration:.0f}s...")
+
+        if model_dir is None:
+            titles = _fetch_titles(base_url, seed=args.seed)
+        else:
+            titles = _load_titles(model_dir, seed=args.seed)
+        test = LoadTest(base_url, titles, args.mix,
+                        args.concurrency, args.duration, args.think_time, args.seed)
+        report = test.run()
+        report['target'] = {
+            'url': base_url,
+            'server': None if args.url else args.server,
+            'workers': args.workers,
+            'threads': args.threads,
+            'model_dir': str(model_dir) if model_dir else None,
+        }
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    _print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.output}")
@@ -0,0 +1,186 @@
+"""
+Synthetic model generator for benchmarks
+Writes catalogs in the same artifact formats as training/train.py
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from training.lookup import write_lookup_tables
+from training.metadata import write_metadata
+
+GENRES = [
+    'action', 'adventure', 'animation', 'comedy', 'crime', 'documentary',
+    'drama', 'family', 'fantasy', 'history', 'horror', 'music', 'mystery',
+    'romance', 'science fiction', 'tv movie', 'thriller', 'war', 'western'
+]
+
+WORDS = [
+    'dark', 'night', 'star', 'road', 'city', 'last', 'lost', 'secret', 'blood', 'love',
+    'house', 'river', 'king', 'queen', 'dream', 'shadow', 'fire', 'ice', 'storm', 'wild',
+    'silent', 'broken', 'golden', 'hidden', 'iron', 'crimson', 'empty', 'final', 'first', 'great',
+    'little', 'long', 'lonely', 'midnight', 'northern', 'ocean', 'perfect', 'red', 'runaway', 'sacred',
+    'savage', 'second', 'seventh', 'silver', 'small', 'southern', 'strange', 'sweet', 'black', 'white',
+    'garden', 'island', 'mountain', 'desert', 'forest', 'kingdom', 'empire', 'planet', 'machine', 'ghost',
+    'angel', 'devil', 'hunter', 'soldier', 'stranger', 'witness', 'prisoner', 'traveler', 'doctor', 'pilot',
+    'mirror', 'window', 'bridge', 'tower', 'station', 'harbor', 'valley', 'canyon', 'frontier', 'border',
+    'summer', 'winter', 'autumn', 'spring', 'morning', 'evening', 'tomorrow', 'yesterday', 'forever', 'never',
+    'echo', 'signal', 'code', 'protocol', 'mission', 'escape', 'return', 'rise', 'fall', 'legacy',
+    'heart', 'soul', 'mind', 'eye', 'hand', 'voice', 'song', 'dance', 'game', 'war',
+    'peace', 'truth', 'lie', 'promise', 'memory', 'journey', 'voyage', 'quest', 'legend', 'story',
+]
+
+OVERVIEW_WORDS = WORDS + [
+    'a', 'the', 'of', 'in', 'on', 'after', 'before', 'when', 'young', 'old', 'family', 'must',
+    'finds', 'discovers', 'fights', 'travels', 'searches', 'loses', 'saves', 'town', 'world',
+]
+
+EMBEDDING_DIM = 384
+
+
+def _unique_titles(rng: np.random.Generator, n_movies: int):
+    """Deterministic, unique three-word titles (some with a leading 'The')"""
+    words = np.array(sorted(set(WORDS)))
+    n_words = len(words)
+    space = n_words ** 3
+    if n_movies > space:
+        raise ValueError(f"Cannot generate more than {space:,} unique titles")
+
+    # Walk the title space with a stride coprime to its size
+    stride = 7_919
+    while np.gcd(stride, space) != 1:
+        stride += 2
+    codes = (np.arange(n_movies, dtype=np.int64) * stride + int(rng.integers(space))) % space
+    first, rest = np.divmod(codes, n_words * n_words)
+    second, third = np.divmod(rest, n_words)
+
+    the = rng.random(n_movies) < 0.3
+    return [
+        ('The ' if t else '') + ' '.join((a, b, c)).title()
+        for t, a, b, c in zip(the, words[first], words[second], words[third])
+    ]
+
+
+def _metadata(rng: np.random.Generator, n_movies: int) -> pd.DataFrame:
+    """Metadata frame with the columns saved by MovieRecommenderTrainer.save_model"""
+    n_genres = len(GENRES)
+    genre_weights = rng.dirichlet(np.ones(n_genres) * 2)
+    primary = rng.choice(n_genres, size=n_movies, p=genre_weights)
+    extra = rng.integers(0, 3, size=n_movies)
+    genres = []
+    for p, k in zip(primary, extra):
+        chosen = [GENRES[p]]
+        for g in rng.choice(n_genres, size=k, replace=False):
+            if GENRES[g] not in chosen:
+                chosen.append(GENRES[g])
+        genres.append(chosen)
+
+    companies = np.array([f"{WORDS[i % len(WORDS)].title()} Pictures {i}" for i in range(2_000)], dtype=object)
+    company_idx = np.minimum(rng.zipf(1.3, size=n_movies) - 1, len(companies) - 1)
+    primary_company = companies[company_idx]
+    primary_company[rng.random(n_movies) < 0.1] = None
+
+    years = rng.integers(1920, 2024, size=n_movies)
+    months = rng.integers(1, 13, size=n_movies)
+    days = rng.integers(1, 29, size=n_movies)
+    release_date = np.array([f"{y:04d}-{m:02d}-{d:02d}" for y, m, d in zip(years, months, days)], dtype=object)
+    release_date[rng.random(n_movies) < 0.02] = None
+
+    vote_count = np.maximum(rng.lognormal(4.5, 1.6, size=n_movies).astype(np.int64), 5)
+    vote_average = np.clip(rng.normal(6.2, 1.1, size=n_movies), 0, 10).round(3)
+    popularity = rng.lognormal(2.0, 1.2, size=n_movies).round(3)
+
+    imdb_id = np.array([f"tt{i:07d}" for i in rng.choice(10_000_000, size=n_movies, replace=False)], dtype=object)
+    imdb_id[rng.random(n_movies) < 0.05] = None
+    poster_path = np.array([f"/{rng.bytes(12).hex()}.jpg" for _ in range(n_movies)], dtype=object)
+    poster_path[rng.random(n_movies) < 0.05] = None
+
+    overview_words = np.array(OVERVIEW_WORDS)
+    lengths = rng.integers(15, 60, size=n_movies)
+    overview = [' '.join(rng.choice(overview_words, size=k)).capitalize() + '.' for k in lengths]
+
+    df = pd.DataFrame({
+        'id': rng.choice(2_000_000, size=n_movies, replace=False) + 1,
+        'title': _unique_titles(rng, n_movies),
+        'release_date': release_date,
+        'primary_company': primary_company,
+        'genres': genres,
+        'vote_average': vote_average,
+        'vote_count': vote_count,
+        'popularity': popularity,
+        'overview': overview,
+        'imdb_id': imdb_id,
+        'poster_path': poster_path,
+        '_primary_genre': primary,
+    })
+
+    # Same ordering as clean_and_engineer_features
+    quality_score = df['vote_average'] * np.log1p(df['vote_count'])
+    df = df.iloc[np.argsort(-quality_score.to_numpy(), kind='stable')]
+    return df.reset_index(drop=True)
+
+
+def _write_embeddings(rng: np.random.Generator, path: Path, primary_genre: np.ndarray,
+                      dim: int, chunk_size: int = 50_000):
+    """Clustered, L2-normalized float32 embeddings written straight to disk"""
+    centroids = rng.normal(size=(len(GENRES), dim)).astype(np.float32)
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(len(primary_genre), dim))
+    for start in range(0, len(primary_genre), chunk_size):
+        stop = min(start + chunk_size, len(primary_genre))
+        chunk = centroids[primary_genre[start:stop]]
+        chunk += rng.normal(scale=1.5, size=chunk.shape).astype(np.float32)
+        chunk /= np.linalg.norm(chunk, axis=1, keepdims=True)
+        out[start:stop] = chunk
+    out.flush()
+    del out
+
+
+def generate_catalog(output_dir, n_movies: int, dim: int = EMBEDDING_DIM, seed: int = 42) -> Path:
+    """
+    Generate a synthetic model directory
+
+    Args:
+        output_dir: Directory to write the model artifacts to
+        n_movies: Number of movies in the catalog
+        dim: Embedding dimension
+        seed: Random seed (same seed -> identical catalog)
+
+    Returns:
+        Path to the model directory
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    df = _metadata(rng, n_movies)
+    primary_genre = df.pop('_primary_genre').to_numpy()
+
+    write_metadata(df, output_dir)
+    _write_embeddings(rng, output_dir / 'embeddings.npy', primary_genre, dim)
+
+    write_lookup_tables(output_dir, df)
+
+    with open(output_dir / 'config.json', 'w') as f:
+        json.dump({
+            'n_movies': n_movies,
+            'embedding_dim': dim,
+            'dataset': f'synthetic-{n_movies}-seed{seed}',
+        }, f, indent=2)
+
+    return output_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic movie model directory")
+    parser.add_argument('--movies', type=int, default=10_000, help="Number of movies")
+    parser.add_argument('--dim', type=int, default=EMBEDDING_DIM, help="Embedding dimension")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--output', default='./models_synthetic', help="Output model directory")
+    args = parser.parse_args()
+
+    path = generate_catalog(args.output, args.movies, dim=args.dim, seed=args.seed)
+    print(f"✅ Generated {args.movies:,} synthetic movies in {path}")
@@ -1,3 +1,11 @@
+"""
+ASGI entry point
+
+Serves the async API (/api/search/, /api/recommendations/) without blocking the
+event loop on NumPy work, e.g.:
+    uvicorn movie_recommendation.asgi:application --workers 2
+    gunicorn movie_recommendation.asgi:application -k uvicorn.workers.UvicornWorker
+"""
 import os
 from django.core.asgi import get_asgi_application
 
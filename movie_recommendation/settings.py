@@ -4,6 +4,7 @@ Production-ready configuration with environment-based settings
 """
 import os
 import sys
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -35,16 +36,17 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
-    "corsheaders",
-    "rest_framework",
-    "django_extensions",
     "recommender.apps.RecommenderConfig"
 ]
 
+# Optional apps, loaded only where they are wanted so web workers boot with a slim
+# import graph: the django-extensions development commands only with DEBUG
+if DEBUG and find_spec('django_extensions'):
+    INSTALLED_APPS.append("django_extensions")
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
-    "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -53,11 +55,17 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-# CORS Configuration
-CORS_ALLOWED_ORIGINS = os.environ.get(
-    'CORS_ALLOWED_ORIGINS', 
-    'http://localhost:3000,http://127.0.0.1:3000'
-).split(',')
+# CORS Configuration: only a frontend served from another origin calls the API
+# cross-origin, so django-cors-headers is loaded only when origins are configured
+# (by default, the local frontend dev server with DEBUG)
+CORS_ALLOWED_ORIGINS = [origin for origin in os.environ.get(
+    'CORS_ALLOWED_ORIGINS',
+    'http://localhost:3000,http://127.0.0.1:3000' if DEBUG else ''
+).split(',') if origin]
+if CORS_ALLOWED_ORIGINS:
+    INSTALLED_APPS.insert(INSTALLED_APPS.index("recommender.apps.RecommenderConfig"), "corsheaders")
+    # Ahead of the session and common middleware, so their responses carry CORS headers too
+    MIDDLEWARE.insert(MIDDLEWARE.index("django.contrib.sessions.middleware.SessionMiddleware"), "corsheaders.middleware.CorsMiddleware")
 
 # Security Settings
 if not DEBUG:
@@ -67,6 +75,8 @@ if not DEBUG:
     SECURE_BROWSER_XSS_FILTER = True
     SECURE_CONTENT_TYPE_NOSNIFF = True
     X_FRAME_OPTIONS = 'DENY'
+    # Orchestrator liveness probes usually speak plain HTTP inside the cluster
+    SECURE_REDIRECT_EXEMPT = [r'^api/live/$']
 
 ROOT_URLCONF = "movie_recommendation.urls"
 
@@ -87,6 +97,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "movie_recommendation.wsgi.application"
+ASGI_APPLICATION = "movie_recommendation.asgi.application"
 
 
 # Database
@@ -207,24 +218,71 @@ LOGGING = {
     },
 }
 
-# REST Framework Configuration
-REST_FRAMEWORK = {
-    'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-    ],
-    'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
-    ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20,
-}
-
 # Movie Recommendation Model Configuration
 MODEL_DIR = os.environ.get('MODEL_DIR', os.path.join(BASE_DIR, 'training/models'))
 
 # Create models directory if it doesn't exist
 Path(MODEL_DIR).mkdir(parents=True, exist_ok=True)
 
+# Threads for CPU-bound scoring behind the async API (NumPy/FAISS release the GIL)
+RECOMMENDER_THREADS = int(os.environ.get('RECOMMENDER_THREADS', min(8, os.cpu_count() or 1)))
+
+# Read memory-mapped model files through at startup so the first requests don't fault pages in
+RECOMMENDER_READAHEAD = os.environ.get('RECOMMENDER_READAHEAD', 'True').lower() in ('true', '1', 't')
+
+# Micro-batching of concurrent similarity lookups into one FAISS search / matrix multiply
+RECOMMENDER_BATCHING = os.environ.get('RECOMMENDER_BATCHING', 'True').lower() in ('true', '1', 't')
+RECOMMENDER_BATCH_MAX_SIZE = int(os.environ.get('RECOMMENDER_BATCH_MAX_SIZE', 32))
+RECOMMENDER_BATCH_MAX_WAIT_MS = float(os.environ.get('RECOMMENDER_BATCH_MAX_WAIT_MS', 2.0))
+
+# Admission control for recommendation requests (the home page POST and
+# /api/recommendations/): requests computed at once (0 disables), requests allowed to
+# wait for a slot and for how long; beyond that they get 503 with Retry-After (seconds)
+RECOMMENDER_MAX_CONCURRENT = int(os.environ.get('RECOMMENDER_MAX_CONCURRENT', 2 * RECOMMENDER_THREADS))
+RECOMMENDER_ADMISSION_QUEUE = int(os.environ.get('RECOMMENDER_ADMISSION_QUEUE', 32))
+RECOMMENDER_ADMISSION_WAIT_MS = float(os.environ.get('RECOMMENDER_ADMISSION_WAIT_MS', 500))
+RECOMMENDER_RETRY_AFTER = int(os.environ.get('RECOMMENDER_RETRY_AFTER', 1))
+
+# Unfiltered neighbour lists kept in memory per worker (0 disables the result cache)
+RECOMMENDER_RESULT_CACHE_SIZE = int(os.environ.get('RECOMMENDER_RESULT_CACHE_SIZE', 10000))
+
+# Movies (highest quality_score first) whose recommendations are precomputed into the
+# result cache after loading, before the model is reported ready (0 disables warm-up)
+RECOMMENDER_WARMUP_TITLES = int(os.environ.get('RECOMMENDER_WARMUP_TITLES', 1000))
+
+# Cursor pagination: rankings kept per worker for the pages after the first (0 disables
+# the cache; pages are then searched from scratch) and the deepest result reachable
+RECOMMENDER_PAGE_CACHE_SIZE = int(os.environ.get('RECOMMENDER_PAGE_CACHE_SIZE', 1000))
+RECOMMENDER_MAX_RESULTS = int(os.environ.get('RECOMMENDER_MAX_RESULTS', 500))
+
+# Hybrid reranking: default weights blending similarity with quality, popularity and
+# recency priors (e.g. 'quality:0.3,recency:0.1'; empty ranks by similarity alone),
+# the recency half-life in years and the similarity candidates reranked per request
+RECOMMENDER_RANKING_WEIGHTS = os.environ.get('RECOMMENDER_RANKING_WEIGHTS', '')
+RECOMMENDER_RECENCY_HALF_LIFE = float(os.environ.get('RECOMMENDER_RECENCY_HALF_LIFE', 10))
+RECOMMENDER_RANKING_CANDIDATES = int(os.environ.get('RECOMMENDER_RANKING_CANDIDATES', 200))
+
+# Socket path template of index shard servers (python -m recommender.shard_server),
+# e.g. /tmp/movie-shard-{shard}.sock; empty searches the index in this process
+RECOMMENDER_SHARD_SOCKET = os.environ.get('RECOMMENDER_SHARD_SOCKET', '')
+
+# Cache-Control max-age (seconds) for model-versioned JSON API responses
+API_CACHE_MAX_AGE = int(os.environ.get('API_CACHE_MAX_AGE', 300))
+
+# 'local' loads the model in every worker; 'socket' uses the shared inference server
+# (python -m recommender.inference_server) so the model is loaded once per host;
+# 'sqlite' answers from the database filled by `manage.py precompute_recommendations`
+RECOMMENDER_BACKEND = os.environ.get('RECOMMENDER_BACKEND', 'local')
+INFERENCE_SOCKET = os.environ.get('INFERENCE_SOCKET', '/tmp/movie-recommender.sock')
+INFERENCE_POOL_SIZE = int(os.environ.get('INFERENCE_POOL_SIZE', 8))
+# Seconds a worker waits for the inference server to be ready before reporting an error
+INFERENCE_READY_TIMEOUT = float(os.environ.get('INFERENCE_READY_TIMEOUT', 300))
+
+# A failed model load is retried after MODEL_LOAD_RETRY_SECONDS, doubling per failure up
+# to MODEL_LOAD_RETRY_MAX_SECONDS; /api/health/ reports the error until then
+MODEL_LOAD_RETRY_SECONDS = float(os.environ.get('MODEL_LOAD_RETRY_SECONDS', 5))
+MODEL_LOAD_RETRY_MAX_SECONDS = float(os.environ.get('MODEL_LOAD_RETRY_MAX_SECONDS', 300))
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
@@ -0,0 +1,195 @@
+"""
+Admission control for expensive recommendation requests
+At most RECOMMENDER_MAX_CONCURRENT requests compute recommendations at once; up to
+RECOMMENDER_ADMISSION_QUEUE more wait (at most RECOMMENDER_ADMISSION_WAIT_MS) for
+a slot, and anything beyond that is shed immediately with 503 + Retry-After.
+Under a spike latency stays bounded for admitted requests, and cheap endpoints
+(health, liveness, model status, metrics) are never queued behind them.
+"""
+import asyncio
+import inspect
+import threading
+from collections import deque
+from concurrent.futures import Future
+from functools import wraps
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded FIFO wait queue
+
+    Waiters are `concurrent.futures.Future`s handed a slot directly by
+    `release`, so sync views (blocking a worker thread) and async views (on any
+    event loop) share one limit.
+
+    Args:
+        max_concurrent: Requests admitted at once
+        max_queue: Requests allowed to wait for a slot; further ones are shed
+        max_wait: Seconds a queued request waits before it is shed
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int = 32, max_wait: float = 0.5):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.cancelled = 0
+
+    def _enter(self) -> Optional[Future]:
+        """Future resolved once a slot is held, or None when the queue is full"""
+        future = Future()
+        with self._lock:
+            if self.in_flight < self.max_concurrent and not self._waiters:
+                self.in_flight += 1
+                self.admitted += 1
+                future.set_result(True)
+            elif len(self._waiters) < self.max_queue:
+                self._waiters.append(future)
+                self.queued += 1
+            else:
+                self.shed_queue_full += 1
+                return None
+        return future
+
+    def _abandon(self, future: Future, timed_out: bool = True) -> bool:
+        """Give up waiting; True if the slot was handed over meanwhile (and is now held)"""
+        with self._lock:
+            if future.done():
+                return True
+            self._waiters.remove(future)
+            if timed_out:
+                self.shed_timeout += 1
+            else:
+                self.cancelled += 1
+            return False
+
+    def acquire(self) -> bool:
+        """Block until admitted (True) or shed (False)"""
+        future = self._enter()
+        if future is None:
+            return False
+        try:
+            return future.result(timeout=self.max_wait)
+        except TimeoutError:
+            return self._abandon(future)
+
+    async def acquire_async(self) -> bool:
+        """Await admission without blocking the event loop"""
+        future = self._enter()
+        if future is None:
+            return False
+        if future.done():
+            return True
+        try:
+            # shield: a timeout must not cancel the future release() may be resolving
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.max_wait)
+        except asyncio.TimeoutError:
+            return self._abandon(future)
+        except BaseException:
+            # Cancelled (e.g. the client disconnected): leave the queue, and give
+            # back a slot handed over meanwhile, or it would never be released
+            if self._abandon(future, timed_out=False):
+                self.release()
+            raise
+
+    def release(self):
+        """Free a slot, handing it to the oldest waiter if there is one"""
+        with self._lock:
+            if self._waiters:
+                self.admitted += 1
+                self._waiters.popleft().set_result(True)
+            else:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'waiting': len(self._waiters),
+                'admitted': self.admitted,
+                'queued': self.queued,
+                'shed_queue_full': self.shed_queue_full,
+                'shed_timeout': self.shed_timeout,
+                'cancelled': self.cancelled,
+            }
+
+
+_CONTROLLER = None
+_CONTROLLER_LOCK = threading.Lock()
+
+
+def get_controller() -> Optional[AdmissionController]:
+    """Process-wide controller from settings, or None when admission control is disabled"""
+    global _CONTROLLER
+    max_concurrent = getattr(settings, 'RECOMMENDER_MAX_CONCURRENT', 0)
+    if not max_concurrent:
+        return None
+    if _CONTROLLER is None:
+        with _CONTROLLER_LOCK:
+            if _CONTROLLER is None:
+                _CONTROLLER = AdmissionController(
+                    max_concurrent,
+                    getattr(settings, 'RECOMMENDER_ADMISSION_QUEUE', 32),
+                    getattr(settings, 'RECOMMENDER_ADMISSION_WAIT_MS', 500) / 1000,
+                )
+    return _CONTROLLER
+
+
+def _busy_json(request) -> HttpResponse:
+    return JsonResponse({'error': 'Server busy, please retry shortly'}, status=503)
+
+
+def admission_controlled(methods: Iterable[str] = None, busy: Callable[..., HttpResponse] = _busy_json):
+    """
+    Decorator factory limiting a (sync or async) view through the admission controller
+
+    Args:
+        methods: HTTP methods subject to the limit (default: all)
+        busy: Builds the 503 response for a shed request; Retry-After is added to it
+    """
+    methods = {m.upper() for m in methods} if methods else None
+
+    def _busy(request):
+        response = busy(request)
+        response['Retry-After'] = str(getattr(settings, 'RECOMMENDER_RETRY_AFTER', 1))
+        return response
+
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                controller = get_controller()
+                if controller is None or (methods and request.method not in methods):
+                    return await view(request, *args, **kwargs)
+                if not await controller.acquire_async():
+                    return _busy(request)
+                try:
+                    return await view(request, *args, **kwargs)
+                finally:
+                    controller.release()
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                controller = get_controller()
+                if controller is None or (methods and request.method not in methods):
+                    return view(request, *args, **kwargs)
+                if not controller.acquire():
+                    return _busy(request)
+                try:
+                    return view(request, *args, **kwargs)
+                finally:
+                    controller.release()
+        return wrapper
+    return decorator
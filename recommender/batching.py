@@ -0,0 +1,158 @@
+"""
+Micro-batching of similarity lookups
+Collects concurrent single-movie queries for a few milliseconds and answers them
+with one batched FAISS search / matrix multiply
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BatchMetrics:
+    """Counters describing how well queries are being batched"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.unique_queries = 0
+        self.batches = 0
+        self.max_batch_size = 0
+        self.batch_sizes = {}
+        self.search_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.single_query_seconds = None
+
+    def record(self, batch_size: int, unique: int, search_seconds: float, wait_seconds: float):
+        with self._lock:
+            self.queries += batch_size
+            self.unique_queries += unique
+            self.batches += 1
+            self.max_batch_size = max(self.max_batch_size, batch_size)
+            bucket = 1 << (batch_size - 1).bit_length()
+            self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+            self.search_seconds += search_seconds
+            self.wait_seconds += wait_seconds
+            if unique == 1:
+                # Moving average cost of an unbatched search, the baseline for the gain estimate
+                if self.single_query_seconds is None:
+                    self.single_query_seconds = search_seconds
+                else:
+                    self.single_query_seconds = 0.9 * self.single_query_seconds + 0.1 * search_seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            gain = None
+            if self.single_query_seconds and self.search_seconds:
+                gain = self.unique_queries * self.single_query_seconds / self.search_seconds
+            return {
+                'queries': self.queries,
+                'batches': self.batches,
+                'mean_batch_size': self.queries / self.batches if self.batches else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'batch_size_histogram': {f'<={k}': v for k, v in sorted(self.batch_sizes.items())},
+                'search_seconds': self.search_seconds,
+                'mean_queue_wait_ms': 1000 * self.wait_seconds / self.queries if self.queries else 0.0,
+                'queries_per_search_second': self.queries / self.search_seconds if self.search_seconds else 0.0,
+                'estimated_throughput_gain': gain,
+            }
+
+
+class _Request:
+    __slots__ = ('idx', 'k', 'future', 'enqueued')
+
+    def __init__(self, idx: int, k: int):
+        self.idx = idx
+        self.k = k
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Batch concurrent top-k queries into single search calls
+
+    Args:
+        search_fn: Batched search, `search_fn(idxs, k) -> (indices, scores)` with
+            one best-first row per query (e.g. `EmbeddingSimilarity.top_k`)
+        max_batch_size: Upper bound on queries per search call
+        max_wait_ms: How long the first query of a batch waits for company
+    """
+
+    def __init__(self, search_fn: Callable, max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        self.search_fn = search_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.metrics = BatchMetrics()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='recommender-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, idx: int, k: int) -> Future:
+        """Queue a query; the future resolves to `(indices, scores)` for that movie"""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        request = _Request(int(idx), int(k))
+        self._queue.put(request)
+        return request.future
+
+    def search(self, idx: int, k: int, timeout: Optional[float] = None):
+        """Blocking top-k search for one movie"""
+        return self.submit(idx, k).result(timeout)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first.enqueued + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            started = time.perf_counter()
+            # Identical movies in one batch are searched once
+            unique, inverse = np.unique([r.idx for r in batch], return_inverse=True)
+            k = max(r.k for r in batch)
+            try:
+                indices, scores = self.search_fn(unique, k)
+            except Exception as e:
+                logger.error(f"Batched search failed: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            for request, row in zip(batch, inverse):
+                request.future.set_result((indices[row, :request.k], scores[row, :request.k]))
+
+            self.metrics.record(
+                len(batch), len(unique), finished - started,
+                sum(started - r.enqueued for r in batch)
+            )
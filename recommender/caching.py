@@ -0,0 +1,56 @@
+"""
+HTTP caching for the JSON API
+Responses are deterministic for a given model, so they are tagged with the model
+version, revalidated with If-None-Match before any work is done, marked cacheable
+for browsers and reverse proxies / CDNs, and gzip-compressed.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+
+# Responses worth caching: results and "movie not found"
+CACHEABLE_STATUS = {200, 404}
+
+_gzip = GZipMiddleware(lambda request: None)
+
+
+def _etag_matches(request, etag: str) -> bool:
+    # Weak comparison, as RFC 9110 specifies for If-None-Match
+    candidates = parse_etags(request.headers.get('If-None-Match', ''))
+    return '*' in candidates or any(c.removeprefix('W/') == etag.removeprefix('W/') for c in candidates)
+
+
+def cache_by_version(get_version):
+    """
+    Decorator factory for async JSON views
+
+    Args:
+        get_version: Callable returning the loaded model's version, or None while loading
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            version = get_version()
+            # Weak: gzip and identity bodies of the same result are equivalent
+            etag = f'W/"{version}"' if version else None
+            if etag and _etag_matches(request, etag):
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                patch_cache_control(response, public=True, max_age=settings.API_CACHE_MAX_AGE)
+                patch_vary_headers(response, ('Accept-Encoding',))
+                return response
+
+            response = await view(request, *args, **kwargs)
+
+            if etag and response.status_code in CACHEABLE_STATUS:
+                response['ETag'] = etag
+                patch_cache_control(response, public=True, max_age=settings.API_CACHE_MAX_AGE)
+            else:
+                patch_cache_control(response, no_store=True)
+            return _gzip.process_response(request, response)
+        return wrapper
+    return decorator
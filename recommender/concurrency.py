@@ -0,0 +1,78 @@
+"""
+Concurrency helpers for the recommendation API
+Runs CPU-bound scoring in a bounded thread pool and coalesces identical in-flight queries
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for scoring work (NumPy and FAISS release the GIL)"""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                max_workers = getattr(settings, 'RECOMMENDER_THREADS', 4)
+                logger.info(f"Starting recommender thread pool with {max_workers} threads")
+                _EXECUTOR = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='recommender')
+    return _EXECUTOR
+
+
+class InflightCoalescer:
+    """
+    Share one computation between identical concurrent queries
+
+    Futures are `concurrent.futures.Future`s, so callers on different event
+    loops (uvicorn workers, async views run under WSGI) and plain threads can
+    all wait on the same result.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+
+    def submit(self, key: Hashable, fn: Callable, *args, **kwargs) -> Future:
+        """Return the in-flight future for `key`, starting `fn` in the pool if there is none"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            self.submitted += 1
+            future = get_executor().submit(fn, *args, **kwargs)
+            self._inflight[key] = future
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    async def run(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """Await the shared result; cancelling one waiter never cancels the others"""
+        future = self.submit(key, fn, *args, **kwargs)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._inflight),
+            }
+
+
+coalescer = InflightCoalescer()
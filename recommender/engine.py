@@ -0,0 +1,378 @@
+"""
+Movie Recommendation Engine
+Serving-side recommender used by the web views and the inference server
+"""
+import logging
+import time
+from difflib import get_close_matches
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from training.facets import genre_list
+from training.loading import load_artifacts
+from training.ranking import HybridRanker
+from .batching import MicroBatcher
+from .serialization import rows_from_columns
+from .warmup import WARMUP_DEPTH, ResultCache, warm_up
+
+logger = logging.getLogger(__name__)
+
+
+class MovieRecommender:
+    """Integrated recommender system matching training/infer.py logic"""
+    
+    def __init__(self, model_dir='models', progress_callback=None, readahead=True, shard_socket=None):
+        """
+        Initialize with trained model directory
+        
+        Args:
+            shard_socket: Socket path template ({shard} placeholder) of shard servers
+                answering index searches; the index is then not loaded in this process
+        """
+        self.model_dir = Path(model_dir)
+        self.metadata = None
+        self.details = None
+        self.similarity = None
+        self.titles = None
+        self.config = None
+        self.version = None
+        self.facets = None
+        self.batcher = None
+        self.results = None
+        self.warmup_report = None
+        self.ranker = None
+        self.pages = None
+        self.max_results = 500
+        self._load_models(progress_callback, readahead, shard_socket)
+    
+    def _load_models(self, progress_callback=None, readahead=True, shard_socket=None):
+        """Load all model artifacts concurrently, reporting progress from bytes read"""
+        logger.info(f"Loading models from {self.model_dir}...")
+        start = time.perf_counter()
+        
+        artifacts = load_artifacts(self.model_dir, progress_callback, warm=readahead, use_index=not shard_socket)
+        # Hot metadata columns only; overview/poster_path/popularity are read per displayed row
+        self.metadata = artifacts['metadata']
+        self.details = artifacts['details']
+        self.facets = artifacts['facets']
+        self.similarity = artifacts['similarity']
+        self.titles = artifacts['titles']
+        self.config = artifacts['config']
+        # Changes whenever the artifacts do; used as the HTTP cache validator
+        self.version = artifacts['version']
+        self.ranker = HybridRanker.load(self.model_dir, self.facets)
+        
+        if shard_socket:
+            from .shard_client import connect_shards
+            self.similarity.index = connect_shards(self.model_dir, shard_socket)
+        
+        logger.info(f"Loaded {self.config['n_movies']:,} movies in {time.perf_counter() - start:.1f}s")
+    
+    def find_movie(self, title: str) -> Optional[str]:
+        """Find the exact or closest matching movie title"""
+        if self.titles.find(title) is not None:
+            return title
+        matches = get_close_matches(title, self.titles.titles(), n=1, cutoff=0.6)
+        return matches[0] if matches else None
+    
+    def find_movie_index(self, movie_title: str = None, tmdb_id: int = None, imdb_id: str = None) -> Optional[int]:
+        """Resolve a movie by TMDB id, IMDb id (exact) or title (exact, then fuzzy)"""
+        if tmdb_id is not None:
+            return self.titles.by_tmdb_id(tmdb_id)
+        if imdb_id is not None:
+            return self.titles.by_imdb_id(imdb_id)
+        matched_title = self.find_movie(movie_title)
+        return self.titles.find(matched_title) if matched_title else None
+    
+    def search_movies(self, query: str, n: int = 20) -> List[str]:
+        """Search movies by partial title"""
+        return [self.titles.title(idx) for idx in self.titles.search(query, n)]
+    
+    def get_top_rated(self, n: int = 20, min_votes: int = 1000, genres: List[str] = None) -> List[Dict]:
+        """Highest-rated movies, answered from the precomputed ranked lists"""
+        results = []
+        for idx in self.facets.top_rated(n, min_votes, genres):
+            movie = self.metadata.iloc[idx]
+            movie_genres = genre_list(movie['genres'])
+            results.append({
+                'title': movie['title'],
+                'release_date': movie['release_date'] if pd.notna(movie['release_date']) else 'Unknown',
+                'production': movie['primary_company'] if pd.notna(movie['primary_company']) else 'Unknown',
+                'genres': ', '.join(movie_genres[:3]) if movie_genres else 'N/A',
+                'rating': f"{movie['vote_average']:.1f}/10",
+                'votes': f"{movie['vote_count']:,}",
+                'imdb_link': f"https://www.imdb.com/title/{movie['imdb_id']}" if pd.notna(movie['imdb_id']) else None
+            })
+        return results
+    
+    def enable_batching(self, max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        """Route similarity lookups through a MicroBatcher shared by all request threads"""
+        if self.batcher is not None:
+            self.batcher.close()
+        self.batcher = MicroBatcher(self.similarity.top_k, max_batch_size, max_wait_ms)
+    
+    def enable_result_cache(self, max_entries: int = 10_000):
+        """Cache unfiltered neighbour lists of recently requested movies"""
+        self.results = ResultCache(max_entries)
+    
+    def enable_pagination(self, max_entries: int = 1000, max_results: int = 500):
+        """
+        Cache the rankings that later pages are sliced from
+        
+        Args:
+            max_entries: Rankings (seed + filters + weights) kept
+            max_results: Deepest result reachable by paging
+        """
+        self.pages = ResultCache(max_entries) if max_entries else None
+        self.max_results = max_results
+    
+    def configure_ranking(self, weights: Dict[str, float] = None, half_life: float = None, candidates: int = None):
+        """Set the default hybrid ranking weights, recency half-life and candidates reranked per query"""
+        self.ranker.configure(weights, half_life, candidates)
+    
+    def warm_up(self, n_titles: int = 1000) -> Dict:
+        """Precompute and cache the `n_titles` most popular movies' neighbours (enables the result cache)"""
+        if self.results is None:
+            self.enable_result_cache(max(n_titles, 10_000))
+        # Deep enough for the reranker when the default ranking uses priors
+        depth = max(WARMUP_DEPTH, self.ranker.candidates + 1) if self.ranker.active(self.ranker.weights) else WARMUP_DEPTH
+        self.warmup_report = warm_up(self, n_titles, depth)
+        return self.warmup_report
+    
+    def metrics(self) -> Dict:
+        """Serving metrics for /api/metrics/"""
+        return {
+            'batching': self.batcher.metrics.snapshot() if self.batcher else None,
+            'result_cache': self.results.stats() if self.results is not None else None,
+            'page_cache': self.pages.stats() if self.pages is not None else None,
+            'warmup': self.warmup_report,
+        }
+    
+    def _ranked_candidates(self, movie_idx: int, k: int, mask: np.ndarray = None, weights: Dict = None, half_life: float = None):
+        """
+        Top-k (indices, scores) for a movie, best first, excluding the movie itself
+        
+        When the ranking weights include priors, the top `ranker.candidates`
+        similarity matches are searched and reranked by hybrid score; scores
+        returned stay the cosine similarities.
+        """
+        weights = self.ranker.resolve(weights)
+        hybrid = self.ranker.active(weights)
+        # Whole rerank blocks, so a page's results don't depend on how deep it was searched
+        depth = -(-k // self.ranker.candidates) * self.ranker.candidates if hybrid else k
+        if mask is not None:
+            # Filtered queries search within their own mask, so they cannot share a batch
+            mask[movie_idx] = False
+            indices, scores = self.similarity.top_k([movie_idx], depth, mask)
+            indices, scores = indices[0], scores[0]
+        else:
+            cached = self.results.get(movie_idx, depth + 1) if self.results is not None else None
+            if cached is not None:
+                indices, scores = cached
+            else:
+                if self.batcher is not None:
+                    indices, scores = self.batcher.search(movie_idx, depth + 1)
+                else:
+                    indices, scores = self.similarity.top_k([movie_idx], depth + 1)
+                    indices, scores = indices[0], scores[0]
+                if self.results is not None:
+                    self.results.put(movie_idx, depth + 1, indices, scores)
+        keep = (indices != movie_idx) & (indices >= 0) & np.isfinite(scores)
+        indices, scores = indices[keep], scores[keep]
+        if hybrid:
+            return self.ranker.rerank(indices, scores, k, weights, half_life)
+        return indices[:k], scores[:k]
+    
+    def _ranked_page(
+        self,
+        movie_idx: int,
+        offset: int,
+        n: int,
+        filters: Dict,
+        weights: Dict = None,
+        half_life: float = None,
+        head: List[int] = None
+    ):
+        """
+        Results offset..offset+n of a movie's ranking: (indices, scores, has_more)
+        
+        The first page is searched on its own, as shallow as it can be. Later pages
+        are slices of one ranking searched `max_results` deep, kept in the page
+        cache: scrolling costs O(page size) per request. That search always uses the
+        same depth because approximate indexes (HNSW) order results differently at
+        different depths. The first page may have come from a shallower search, so
+        its movies (`head`) are taken out of the deep ranking, which then continues
+        right after them: no movie repeats and none is skipped.
+        """
+        end = min(offset + n, self.max_results)
+        if offset >= end:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32), False
+        
+        if not offset:
+            # One extra result tells whether another page follows
+            mask = self.facets.compile(**filters)
+            indices, scores = self._ranked_candidates(movie_idx, end + 1, mask, weights, half_life)
+            return indices[:end], scores[:end], end < self.max_results and len(indices) > end
+        
+        resolved = self.ranker.resolve(weights)
+        key = (movie_idx, tuple(sorted(filters.items())), tuple(sorted(resolved.items())),
+               half_life if half_life is not None else self.ranker.half_life)
+        cached = self.pages.get(key, self.max_results) if self.pages is not None else None
+        if cached is not None:
+            indices, scores = cached
+        else:
+            mask = self.facets.compile(**filters)
+            indices, scores = self._ranked_candidates(movie_idx, self.max_results, mask, weights, half_life)
+            if self.pages is not None:
+                self.pages.put(key, self.max_results, indices, scores)
+        
+        served = len(head) if head else 0
+        if served:
+            rest = ~np.isin(indices, np.asarray(head, dtype=indices.dtype))
+            indices, scores = indices[rest], scores[rest]
+        start, stop = max(offset - served, 0), end - served
+        return indices[start:stop], scores[start:stop], end < self.max_results and served + len(indices) > end
+    
+    def _recommend(self, movie_title, n, min_rating, min_year, max_year, genres, tmdb_id, imdb_id, weights=None,
+                   half_life=None, offset=0, head=None):
+        """Resolve the seed movie and rank candidates: (movie_idx, indices, scores, has_more) or an error dict"""
+        movie_idx = self.find_movie_index(movie_title, tmdb_id, imdb_id)
+        if movie_idx is None:
+            if tmdb_id is not None or imdb_id is not None:
+                seed = tmdb_id if tmdb_id is not None else imdb_id
+                return {'error': f"Movie with id '{seed}' not found", 'suggestions': []}
+            return {'error': f"Movie '{movie_title}' not found", 'suggestions': self.search_movies(movie_title, 5)}
+        
+        filters = {'min_year': min_year, 'max_year': max_year, 'genres': tuple(genres or ()), 'min_rating': min_rating}
+        return (movie_idx, *self._ranked_page(movie_idx, offset, n, filters, weights, half_life, head))
+    
+    def _result_columns(self, indices: np.ndarray) -> Dict:
+        """Raw result fields for `indices`, one array or list per field (no string formatting)"""
+        rows = self.metadata.iloc[indices]
+        company = self.facets.company[indices]
+        return {
+            'tmdb_id': rows['id'].to_numpy(),
+            'title': [self.titles.title(idx) for idx in indices],
+            'release_date': rows['release_date'].to_numpy(),
+            'production': np.where(company >= 0, self.facets.company_names[company], None),
+            'genres': [genre_list(g) for g in rows['genres'].to_numpy()],
+            'rating': rows['vote_average'].to_numpy(),
+            'votes': self.facets.votes[indices],
+            'imdb_id': rows['imdb_id'].to_numpy(),
+        }
+    
+    def recommendation_data(
+        self,
+        movie_title: str = None,
+        n: int = 15,
+        min_rating: float = None,
+        min_year: int = None,
+        max_year: int = None,
+        genres: List[str] = None,
+        tmdb_id: int = None,
+        imdb_id: str = None,
+        layout: str = 'rows',
+        weights: Dict[str, float] = None,
+        half_life: float = None,
+        offset: int = 0,
+        head: List[int] = None
+    ) -> Dict:
+        """
+        Recommendations as raw values for the JSON API
+        
+        With layout='columns', `recommendations` maps each field to an array
+        (NumPy where possible) so the encoder writes it without touching rows.
+        `weights` override the default hybrid ranking weights for this request;
+        `offset` skips that many results of the ranking (later pages), and `head`
+        is the first page's `page_indices`, which later pages continue from.
+        """
+        result = self._recommend(
+            movie_title, n, min_rating, min_year, max_year, genres, tmdb_id, imdb_id, weights, half_life, offset, head
+        )
+        if isinstance(result, dict):
+            return result
+        movie_idx, indices, scores, has_more = result
+        
+        columns = self._result_columns(indices)
+        columns['similarity_score'] = np.round(scores.astype(np.float64), 4)
+        columns['poster_path'] = self.details.rows(indices)['poster_path'].to_numpy()
+        source = rows_from_columns(self._result_columns(np.array([movie_idx])))[0]
+        return {
+            'query_movie': source['title'],
+            'source_movie': source,
+            'count': len(indices),
+            'offset': offset,
+            'has_more': has_more,
+            'page_indices': indices.tolist(),
+            'recommendations': columns if layout == 'columns' else rows_from_columns(columns),
+        }
+    
+    def top_rated_data(self, n: int = 20, min_votes: int = 1000, genres: List[str] = None, layout: str = 'rows') -> Dict:
+        """Top-rated movies as raw values for the JSON API"""
+        columns = self._result_columns(self.facets.top_rated(n, min_votes, genres))
+        return {
+            'count': len(columns['title']),
+            'movies': columns if layout == 'columns' else rows_from_columns(columns),
+        }
+    
+    def get_recommendations(
+        self,
+        movie_title: str = None,
+        n: int = 15,
+        min_rating: float = None,
+        min_year: int = None,
+        max_year: int = None,
+        genres: List[str] = None,
+        tmdb_id: int = None,
+        imdb_id: str = None,
+        weights: Dict[str, float] = None,
+        half_life: float = None,
+        offset: int = 0,
+        head: List[int] = None
+    ) -> Dict:
+        """Get movie recommendations with optional filtering, seeded by title, TMDB id or IMDb id"""
+        result = self._recommend(
+            movie_title, n, min_rating, min_year, max_year, genres, tmdb_id, imdb_id, weights, half_life, offset, head
+        )
+        if isinstance(result, dict):
+            return result
+        movie_idx, indices, scores, has_more = result
+        
+        matched_title = self.titles.title(movie_idx)
+        source_movie = self.metadata.iloc[movie_idx]
+        
+        details = self.details.rows(indices)
+        recommendations = []
+        for idx, score in zip(indices, scores):
+            movie = self.metadata.iloc[idx]
+            poster_path = details.at[idx, 'poster_path']
+            movie_genres = genre_list(movie['genres'])
+            recommendations.append({
+                'title': movie['title'],
+                'release_date': movie['release_date'] if pd.notna(movie['release_date']) else 'Unknown',
+                'production': movie['primary_company'] if pd.notna(movie['primary_company']) else 'Unknown',
+                'genres': ', '.join(movie_genres[:3]) if movie_genres else 'N/A',
+                'rating': f"{movie['vote_average']:.1f}/10" if pd.notna(movie['vote_average']) else 'N/A',
+                'votes': f"{movie['vote_count']:,}" if pd.notna(movie['vote_count']) else 'N/A',
+                'similarity_score': f"{score:.3f}",
+                'imdb_id': movie['imdb_id'] if pd.notna(movie['imdb_id']) else None,
+                'poster_url': f"https://image.tmdb.org/t/p/w500{poster_path}" if pd.notna(poster_path) else None,
+                'google_link': f"https://www.google.com/search?q={'+'.join(movie['title'].split())}+movie",
+                'imdb_link': f"https://www.imdb.com/title/{movie['imdb_id']}" if pd.notna(movie['imdb_id']) else None
+            })
+        
+        source_genres = genre_list(source_movie['genres'])
+        return {
+            'query_movie': matched_title,
+            'source_movie': {
+                'production': source_movie['primary_company'] if pd.notna(source_movie['primary_company']) else 'Unknown',
+                'rating': f"{source_movie['vote_average']:.1f}/10" if pd.notna(source_movie['vote_average']) else 'N/A',
+                'genres': ', '.join(source_genres[:3]) if source_genres else 'N/A'
+            },
+            'recommendations': recommendations,
+            'has_more': has_more,
+            'page_indices': indices.tolist()
+        }
@@ -0,0 +1,175 @@
+"""
+Client for the recommendation inference server
+Keeps a small pool of Unix socket connections per web worker
+"""
+import itertools
+import queue
+import socket
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .protocol import ProtocolError, RemoteError, recv_message, send_message
+
+
+class InferenceClient:
+    """
+    Thread-safe RPC client with connection pooling
+
+    Args:
+        socket_path: Path of the server's Unix domain socket
+        pool_size: Max idle connections kept open
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, socket_path: str, pool_size: int = 8, timeout: float = 10.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._ids = itertools.count()
+        self._ids_lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _release(self, sock):
+        try:
+            self._pool.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+
+    def call(self, method: str, *args, **kwargs):
+        """Invoke `method` on the server's recommender"""
+        with self._ids_lock:
+            request_id = next(self._ids)
+        request = {'id': request_id, 'method': method, 'args': args, 'kwargs': kwargs}
+
+        # A pooled connection may have been closed by a server restart; retry once on a fresh one
+        for attempt in range(2):
+            sock, pooled = self._acquire()
+            try:
+                send_message(sock, request)
+                response = recv_message(sock)
+            except (ProtocolError, OSError):
+                sock.close()
+                if pooled and attempt == 0:
+                    continue
+                raise
+            self._release(sock)
+            break
+
+        if 'error' in response:
+            raise RemoteError(response['error'])
+        return response['result']
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RemoteRecommender:
+    """
+    Drop-in stand-in for MovieRecommender backed by the inference server
+
+    Web workers using it never load pandas, NumPy or the model artifacts.
+    """
+
+    batcher = None
+
+    def __init__(self, client: InferenceClient, progress_callback=None, poll_interval: float = 0.5,
+                 ready_timeout: float = 300.0):
+        self.client = client
+        self._wait_until_ready(progress_callback, poll_interval, ready_timeout)
+        info = client.call('info')
+        self.model_dir = info['model_dir']
+        self.config = info['config']
+        self.version = info['version']
+
+    def _wait_until_ready(self, progress_callback, poll_interval, ready_timeout):
+        deadline = time.monotonic() + ready_timeout
+        while True:
+            try:
+                status = self.client.call('status')
+            except (OSError, ProtocolError):
+                # Server not up yet
+                status = {'status': 'loading', 'progress': 0}
+            if status['status'] == 'ready':
+                return
+            if status['status'] == 'error':
+                raise RemoteError(status.get('error', 'Inference server failed to load the model'))
+            if progress_callback:
+                progress_callback(status['progress'])
+            if time.monotonic() >= deadline:
+                reason = 'still loading' if status['progress'] else 'not reachable'
+                raise RemoteError(f"Inference server at {self.client.socket_path} not ready after {ready_timeout:g}s ({reason})")
+            time.sleep(poll_interval)
+
+    def find_movie(self, title: str) -> Optional[str]:
+        return self.client.call('find_movie', title)
+
+    def search_movies(self, query: str, n: int = 20) -> List[str]:
+        return self.client.call('search_movies', query, n=n)
+
+    def get_recommendations(
+        self,
+        movie_title: str = None,
+        n: int = 15,
+        min_rating: float = None,
+        min_year: int = None,
+        max_year: int = None,
+        genres: List[str] = None,
+        tmdb_id: int = None,
+        imdb_id: str = None,
+        weights: Dict[str, float] = None,
+        half_life: float = None,
+        offset: int = 0,
+        head: List[int] = None
+    ) -> Dict:
+        return self.client.call(
+            'get_recommendations', movie_title, n=n,
+            min_rating=min_rating, min_year=min_year, max_year=max_year, genres=genres,
+            tmdb_id=tmdb_id, imdb_id=imdb_id, weights=weights, half_life=half_life, offset=offset, head=head
+        )
+
+    def recommendation_data(
+        self,
+        movie_title: str = None,
+        n: int = 15,
+        min_rating: float = None,
+        min_year: int = None,
+        max_year: int = None,
+        genres: List[str] = None,
+        tmdb_id: int = None,
+        imdb_id: str = None,
+        layout: str = 'rows',
+        weights: Dict[str, float] = None,
+        half_life: float = None,
+        offset: int = 0,
+        head: List[int] = None
+    ) -> Dict:
+        return self.client.call(
+            'recommendation_data', movie_title, n=n,
+            min_rating=min_rating, min_year=min_year, max_year=max_year, genres=genres,
+            tmdb_id=tmdb_id, imdb_id=imdb_id, layout=layout, weights=weights, half_life=half_life, offset=offset, head=head
+        )
+    
+    def top_rated_data(self, n: int = 20, min_votes: int = 1000, genres: List[str] = None, layout: str = 'rows') -> Dict:
+        return self.client.call('top_rated_data', n=n, min_votes=min_votes, genres=genres, layout=layout)
+    
+    def get_top_rated(self, n: int = 20, min_votes: int = 1000, genres: List[str] = None) -> List[Dict]:
+        return self.client.call('get_top_rated', n=n, min_votes=min_votes, genres=genres)
+    
+    def metrics(self) -> Dict:
+        return self.client.call('metrics')
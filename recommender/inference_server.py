@@ -0,0 +1,211 @@
+"""
+Standalone recommendation inference server
+Loads the model once per host and answers web workers over a Unix domain socket
+
+Usage (from the repository root):
+    python -m recommender.inference_server --model-dir ./models --socket /tmp/movie-recommender.sock
+"""
+import argparse
+import logging
+import os
+import signal
+import socketserver
+import threading
+import time
+from pathlib import Path
+
+from training.weights import parse_weights
+from .engine import MovieRecommender
+from .protocol import ProtocolError, recv_message, send_message
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = '/tmp/movie-recommender.sock'
+
+# MovieRecommender methods callable over the socket
+EXPOSED_METHODS = {
+    'find_movie', 'search_movies', 'get_recommendations', 'get_top_rated',
+    'recommendation_data', 'top_rated_data', 'metrics',
+}
+
+
+class InferenceService:
+    """Owns the recommender and dispatches protocol requests to it"""
+
+    def __init__(self, model_dir, batching=True, max_batch_size=32, max_wait_ms=2.0, readahead=True,
+                 shard_socket=None, result_cache_size=10_000, warmup_titles=1000, ranking_weights=None,
+                 recency_half_life=None, ranking_candidates=None, page_cache_size=1000, max_results=500):
+        self.model_dir = Path(model_dir)
+        self.readahead = readahead
+        self.shard_socket = shard_socket
+        self.batching = batching
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.result_cache_size = result_cache_size
+        self.warmup_titles = warmup_titles
+        self.ranking_weights = ranking_weights
+        self.recency_half_life = recency_half_life
+        self.ranking_candidates = ranking_candidates
+        self.page_cache_size = page_cache_size
+        self.max_results = max_results
+        self.recommender = None
+        self.progress = 0
+        self.error = None
+        self.started = time.time()
+
+    def load(self):
+        """Load the model (run in a background thread so status requests are answered meanwhile)"""
+        def progress_callback(progress):
+            self.progress = progress
+            logger.info(f"Model loading progress: {progress}%")
+
+        try:
+            recommender = MovieRecommender(self.model_dir, progress_callback, self.readahead, self.shard_socket)
+            if self.batching:
+                recommender.enable_batching(self.max_batch_size, self.max_wait_ms)
+            recommender.configure_ranking(self.ranking_weights, self.recency_half_life, self.ranking_candidates)
+            recommender.enable_pagination(self.page_cache_size, self.max_results)
+            if self.result_cache_size:
+                recommender.enable_result_cache(self.result_cache_size)
+            if self.warmup_titles:
+                recommender.warm_up(self.warmup_titles)
+            self.recommender = recommender
+            self.progress = 100
+            logger.info(f"Model loaded in {time.time() - self.started:.1f}s")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Failed to load recommender: {e}")
+
+    def status(self):
+        if self.error:
+            return {'status': 'error', 'progress': 0, 'error': self.error}
+        if self.recommender is not None:
+            return {'status': 'ready', 'progress': 100}
+        return {'status': 'loading', 'progress': self.progress}
+
+    def handle(self, request):
+        method = request.get('method')
+        if method == 'status':
+            return self.status()
+        if self.recommender is None:
+            raise RuntimeError(self.error or 'Model is still loading')
+        if method == 'info':
+            return {
+                'model_dir': str(self.recommender.model_dir),
+                'config': self.recommender.config,
+                'version': self.recommender.version,
+            }
+        if method not in EXPOSED_METHODS:
+            raise ValueError(f"Unknown method '{method}'")
+        return getattr(self.recommender, method)(*request.get('args', ()), **request.get('kwargs', {}))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        service = self.server.service
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ProtocolError, OSError):
+                return
+            try:
+                response = {'id': request.get('id'), 'result': service.handle(request)}
+            except Exception as e:
+                response = {'id': request.get('id'), 'error': f"{type(e).__name__}: {e}"}
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingUnixStreamServer):
+    """One thread per web-worker connection; connections are long-lived and pooled by the client"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, service: InferenceService):
+        self.service = service
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+
+
+def serve(model_dir, socket_path=DEFAULT_SOCKET, **service_kwargs):
+    service = InferenceService(model_dir, **service_kwargs)
+    threading.Thread(target=service.load, name='model-loader', daemon=True).start()
+
+    server = InferenceServer(socket_path, service)
+    logger.info(f"Inference server listening on {socket_path}")
+
+    def shutdown(signum, frame):
+        logger.info("Shutting down inference server...")
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve movie recommendations over a Unix domain socket")
+    parser.add_argument('--model-dir', default=os.environ.get('MODEL_DIR', 'models'), help="Trained model directory")
+    parser.add_argument('--socket', default=os.environ.get('INFERENCE_SOCKET', DEFAULT_SOCKET), help="Socket path")
+    parser.add_argument('--no-batching', action='store_true', help="Disable micro-batching")
+    parser.add_argument('--no-readahead', action='store_true', help="Don't warm memory-mapped files at startup")
+    parser.add_argument(
+        '--shard-socket', default=os.environ.get('RECOMMENDER_SHARD_SOCKET') or None,
+        help="Socket template ({shard} placeholder) of shard servers answering index searches"
+    )
+    parser.add_argument('--max-batch-size', type=int, default=int(os.environ.get('RECOMMENDER_BATCH_MAX_SIZE', 32)))
+    parser.add_argument('--max-wait-ms', type=float, default=float(os.environ.get('RECOMMENDER_BATCH_MAX_WAIT_MS', 2.0)))
+    parser.add_argument(
+        '--result-cache-size', type=int, default=int(os.environ.get('RECOMMENDER_RESULT_CACHE_SIZE', 10000)),
+        help="Unfiltered neighbour lists kept in memory (0 disables the cache)"
+    )
+    parser.add_argument(
+        '--warmup-titles', type=int, default=int(os.environ.get('RECOMMENDER_WARMUP_TITLES', 1000)),
+        help="Most popular movies precomputed into the result cache before serving (0 disables warm-up)"
+    )
+    parser.add_argument(
+        '--ranking-weights', type=parse_weights, default=os.environ.get('RECOMMENDER_RANKING_WEIGHTS', ''),
+        help="Default hybrid ranking weights, e.g. quality:0.3,recency:0.1 (empty: similarity only)"
+    )
+    parser.add_argument(
+        '--recency-half-life', type=float, default=float(os.environ.get('RECOMMENDER_RECENCY_HALF_LIFE', 10)),
+        help="Years for the recency prior to halve"
+    )
+    parser.add_argument(
+        '--ranking-candidates', type=int, default=int(os.environ.get('RECOMMENDER_RANKING_CANDIDATES', 200)),
+        help="Similarity candidates reranked per request when priors are weighted"
+    )
+    parser.add_argument(
+        '--page-cache-size', type=int, default=int(os.environ.get('RECOMMENDER_PAGE_CACHE_SIZE', 1000)),
+        help="Rankings kept for cursor pagination (0 disables the cache)"
+    )
+    parser.add_argument(
+        '--max-results', type=int, default=int(os.environ.get('RECOMMENDER_MAX_RESULTS', 500)),
+        help="Deepest result reachable by paging"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='{levelname} {asctime} {module} {message}', style='{')
+    serve(
+        args.model_dir, args.socket,
+        batching=not args.no_batching,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        readahead=not args.no_readahead,
+        shard_socket=args.shard_socket,
+        result_cache_size=args.result_cache_size,
+        warmup_titles=args.warmup_titles,
+        ranking_weights=args.ranking_weights,
+        recency_half_life=args.recency_half_life,
+        ranking_candidates=args.ranking_candidates,
+        page_cache_size=args.page_cache_size,
+        max_results=args.max_results,
+    )
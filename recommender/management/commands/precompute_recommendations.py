@@ -0,0 +1,142 @@
+"""
+Precompute the top-K recommendations of every movie into the database
+
+    python manage.py precompute_recommendations --model-dir ./models --k 50
+
+Neighbours are searched in parallel batches and bulk-loaded, together with the
+display metadata, into the recommender_precomputed* tables. The 'sqlite'
+recommender backend (recommender/precomputed.py) then answers requests from
+those tables without loading the model.
+"""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from recommender.models import PrecomputedMovie, PrecomputedRecommendation, PrecomputeExport
+from training.metadata import load_metadata
+
+# Rows per INSERT round trip
+INSERT_BATCH = 10_000
+
+
+def _value(value):
+    """NumPy scalar or missing value as a database value"""
+    if value is None or (not isinstance(value, (list, str)) and pd.isna(value)):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def neighbour_batches(similarity, n: int, k: int, batch_size: int, workers: int):
+    """
+    Yield (start, indices, scores) for consecutive batches of query movies, in order
+
+    Batches are searched on `workers` threads; at most 2 * workers results wait
+    to be consumed, so memory stays bounded however slow the inserts are.
+    """
+    def search(start):
+        indices, scores = similarity.top_k(np.arange(start, min(start + batch_size, n)), k + 1)
+        return start, indices, scores
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='precompute') as pool:
+        pending = deque()
+        for start in range(0, n, batch_size):
+            pending.append(pool.submit(search, start))
+            if len(pending) > 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class Command(BaseCommand):
+    help = "Compute the top-K recommendations of every movie and store them for the 'sqlite' backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-dir', default=getattr(settings, 'MODEL_DIR', 'models'), help="Trained model directory")
+        parser.add_argument('--k', type=int, default=50, help="Recommendations stored per movie")
+        parser.add_argument('--batch-size', type=int, default=1024, help="Query movies per similarity search")
+        parser.add_argument('--workers', type=int, default=settings.RECOMMENDER_THREADS, help="Concurrent searches")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database alias to load into")
+
+    def handle(self, *args, **options):
+        # Imported here so `manage.py help` doesn't load NumPy/FAISS-heavy modules
+        from recommender.engine import MovieRecommender
+
+        model_dir, k, database = options['model_dir'], options['k'], options['database']
+        if k < 1:
+            raise CommandError("--k must be at least 1")
+
+        start = time.perf_counter()
+        recommender = MovieRecommender(model_dir)
+        n = len(recommender.similarity)
+        self.stdout.write(f"Loaded {n:,} movies from {model_dir}")
+
+        with transaction.atomic(using=database):
+            with connections[database].cursor() as cursor:
+                for model in (PrecomputedRecommendation, PrecomputedMovie, PrecomputeExport):
+                    cursor.execute(f'DELETE FROM {model._meta.db_table}')
+
+            PrecomputedMovie.objects.using(database).bulk_create(
+                self._movies(recommender, model_dir, n), batch_size=1000
+            )
+            self.stdout.write(f"Stored metadata of {n:,} movies")
+
+            stored = self._recommendations(recommender, n, k, options['batch_size'], max(options['workers'], 1), database)
+
+            PrecomputeExport.objects.using(database).create(
+                model_dir=str(model_dir), model_version=recommender.version, n_movies=n, k=k
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stored:,} recommendations ({k} per movie) in {time.perf_counter() - start:.1f}s"
+        ))
+
+    def _movies(self, recommender, model_dir, n: int):
+        columns = recommender._result_columns(np.arange(n))
+        columns['year'] = recommender.facets.year
+        columns['poster_path'] = load_metadata(model_dir, ['poster_path']).get('poster_path', pd.Series([None] * n)).to_numpy()
+        for idx in range(n):
+            row = {field: _value(values[idx]) for field, values in columns.items()}
+            yield PrecomputedMovie(
+                id=idx,
+                title=row['title'],
+                title_lower=row['title'].lower(),
+                tmdb_id=row['tmdb_id'],
+                imdb_id=row['imdb_id'],
+                release_date=row['release_date'],
+                year=row['year'] or None,
+                production=row['production'],
+                genres=row['genres'],
+                rating=row['rating'],
+                votes=row['votes'] or 0,
+                poster_path=row['poster_path'],
+            )
+
+    def _recommendations(self, recommender, n: int, k: int, batch_size: int, workers: int, database: str) -> int:
+        table = PrecomputedRecommendation._meta.db_table
+        sql = f'INSERT INTO {table} (source_id, rank, target_id, score) VALUES (%s, %s, %s, %s)'
+        stored, rows, last_report = 0, [], time.perf_counter()
+
+        with connections[database].cursor() as cursor:
+            for start, indices, scores in neighbour_batches(recommender.similarity, n, k, batch_size, workers):
+                for offset in range(len(indices)):
+                    seed = start + offset
+                    keep = (indices[offset] != seed) & (indices[offset] >= 0) & np.isfinite(scores[offset])
+                    targets, target_scores = indices[offset][keep][:k], scores[offset][keep][:k]
+                    rows.extend(zip([seed] * len(targets), range(len(targets)), targets.tolist(), target_scores.tolist()))
+                if len(rows) >= INSERT_BATCH:
+                    cursor.executemany(sql, rows)
+                    stored += len(rows)
+                    rows = []
+                if time.perf_counter() - last_report > 5:
+                    self.stdout.write(f"  {start + len(indices):,}/{n:,} movies")
+                    last_report = time.perf_counter()
+            if rows:
+                cursor.executemany(sql, rows)
+                stored += len(rows)
+        return stored
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrecomputeExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_dir', models.CharField(max_length=500)),
+                ('model_version', models.CharField(max_length=32)),
+                ('n_movies', models.IntegerField()),
+                ('k', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PrecomputedMovie',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(db_index=True, max_length=500)),
+                ('title_lower', models.CharField(max_length=500)),
+                ('tmdb_id', models.BigIntegerField(db_index=True, null=True)),
+                ('imdb_id', models.CharField(db_index=True, max_length=20, null=True)),
+                ('release_date', models.CharField(max_length=20, null=True)),
+                ('year', models.SmallIntegerField(null=True)),
+                ('production', models.CharField(max_length=500, null=True)),
+                ('genres', models.JSONField(default=list)),
+                ('rating', models.FloatField(null=True)),
+                ('votes', models.IntegerField(default=0)),
+                ('poster_path', models.CharField(max_length=200, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-rating', '-votes'], name='precomputed_top_rated')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PrecomputedRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.SmallIntegerField()),
+                ('score', models.FloatField()),
+                ('source', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recommender.precomputedmovie')),
+                ('target', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recommender.precomputedmovie')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'rank'), name='precomputed_source_rank')],
+            },
+        ),
+    ]
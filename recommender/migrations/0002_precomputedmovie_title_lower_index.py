@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='precomputedmovie',
+            name='title_lower',
+            field=models.CharField(db_index=True, max_length=500),
+        ),
+    ]
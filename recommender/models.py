@@ -0,0 +1,51 @@
+"""
+Precomputed recommendation store
+Filled by `python manage.py precompute_recommendations` and read by the 'sqlite'
+recommender backend (recommender/precomputed.py), which serves requests without
+loading any model artifacts.
+"""
+from django.db import models
+
+
+class PrecomputeExport(models.Model):
+    """The model export currently in the store (one row)"""
+
+    model_dir = models.CharField(max_length=500)
+    model_version = models.CharField(max_length=32)
+    n_movies = models.IntegerField()
+    k = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class PrecomputedMovie(models.Model):
+    """Display metadata of one movie; `id` is the movie's index in the model"""
+
+    id = models.IntegerField(primary_key=True)
+    title = models.CharField(max_length=500, db_index=True)
+    title_lower = models.CharField(max_length=500, db_index=True)
+    tmdb_id = models.BigIntegerField(null=True, db_index=True)
+    imdb_id = models.CharField(max_length=20, null=True, db_index=True)
+    release_date = models.CharField(max_length=20, null=True)
+    year = models.SmallIntegerField(null=True)
+    production = models.CharField(max_length=500, null=True)
+    genres = models.JSONField(default=list)
+    rating = models.FloatField(null=True)
+    votes = models.IntegerField(default=0)
+    poster_path = models.CharField(max_length=200, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['-rating', '-votes'], name='precomputed_top_rated')]
+
+
+class PrecomputedRecommendation(models.Model):
+    """One ranked neighbour of a source movie; (source, rank) is the lookup key"""
+
+    source = models.ForeignKey(PrecomputedMovie, on_delete=models.CASCADE, related_name='+', db_index=False)
+    rank = models.SmallIntegerField()
+    target = models.ForeignKey(PrecomputedMovie, on_delete=models.CASCADE, related_name='+', db_index=False)
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'rank'], name='precomputed_source_rank'),
+        ]
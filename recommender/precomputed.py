@@ -0,0 +1,291 @@
+"""
+Precomputed recommender backend
+Serves the recommender interface from the tables filled by
+`python manage.py precompute_recommendations`: a request is one indexed query
+over the seed's stored neighbours, so workers load no model artifacts at all.
+
+Filters (rating, year, genres) are applied to the stored top-K, so a very
+selective filter can return fewer results than the live engine, which searches
+the whole catalog within the filter. Titles are matched exactly or by prefix
+(an indexed range scan), not by substring as the engine does.
+"""
+import logging
+from typing import Dict, List, Optional
+
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import PrecomputedMovie, PrecomputedRecommendation, PrecomputeExport
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_genre(name: str) -> str:
+    # Same rule as training.facets.normalize_genre, without importing pandas
+    return str(name).lower().replace(' ', '')
+
+
+def _movie_data(movie: PrecomputedMovie) -> Dict:
+    """Raw result fields of a movie, as MovieRecommender._result_columns gives them"""
+    return {
+        'tmdb_id': movie.tmdb_id,
+        'title': movie.title,
+        'release_date': movie.release_date,
+        'production': movie.production,
+        'genres': movie.genres,
+        'rating': movie.rating,
+        'votes': movie.votes,
+        'imdb_id': movie.imdb_id,
+    }
+
+
+def _imdb_link(movie: PrecomputedMovie) -> Optional[str]:
+    return f"https://www.imdb.com/title/{movie.imdb_id}" if movie.imdb_id else None
+
+
+def _columns(rows: List[Dict]) -> Dict:
+    return {field: [row[field] for row in rows] for field in (rows[0] if rows else {})}
+
+
+# Sorts after any title continuing a prefix (SQLite compares text as UTF-8 bytes)
+_PREFIX_END = '\U0010ffff'
+
+
+def _check_ranking(weights: Optional[Dict[str, float]], half_life: Optional[float]):
+    """Stored neighbours are in similarity order; hybrid ranking needs the model's prior arrays"""
+    if any(value for name, value in (weights or {}).items() if name != 'similarity'):
+        raise ValueError("Hybrid ranking weights are not supported by the precomputed backend")
+    if half_life is not None:
+        raise ValueError("A recency half-life is not supported by the precomputed backend")
+
+
+class PrecomputedRecommender:
+    """Recommender answering from the precomputed recommendation tables"""
+
+    batcher = None
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+        export = PrecomputeExport.objects.using(using).order_by('-created_at').first()
+        if export is None:
+            raise RuntimeError("No precomputed recommendations; run `python manage.py precompute_recommendations`")
+        self.model_dir = export.model_dir
+        self.k = export.k
+        self.config = {'n_movies': export.n_movies, 'k': export.k}
+        # Same validator as the model it was exported from, so cached responses stay valid
+        self.version = export.model_version
+        logger.info(f"Serving {export.n_movies:,} movies from precomputed recommendations ({export.k} each)")
+
+    def _movies(self):
+        return PrecomputedMovie.objects.using(self.using)
+
+    def find_movie(self, title: str) -> Optional[str]:
+        """Exact title, else the first title starting with the query"""
+        movie = self._resolve(title)
+        return movie.title if movie else None
+
+    def _prefixed(self, prefix: str):
+        """
+        Movies whose title starts with `prefix` (case-insensitive), in model order
+
+        A range on the indexed title_lower: SQLite cannot use an index for the
+        LIKE ... ESCAPE that `__startswith` compiles to.
+        """
+        prefix = prefix.lower()
+        return self._movies().filter(title_lower__gte=prefix, title_lower__lt=prefix + _PREFIX_END).order_by('id')
+
+    def _resolve(self, title: str) -> Optional[PrecomputedMovie]:
+        if not title:
+            return None
+        return self._movies().filter(title=title).order_by('id').first() or self._prefixed(title).first()
+
+    def search_movies(self, query: str, n: int = 20) -> List[str]:
+        """Search movies by title prefix"""
+        if not query:
+            return []
+        return list(self._prefixed(query).values_list('title', flat=True)[:n])
+
+    def metrics(self) -> Dict:
+        """Serving metrics for /api/metrics/"""
+        return {'batching': None}
+
+    def _neighbours(self, **source):
+        return (
+            PrecomputedRecommendation.objects.using(self.using)
+            .filter(**source)
+            .select_related('source', 'target')
+            .order_by('rank')
+        )
+
+    def _recommend(self, movie_title, n, min_rating, min_year, max_year, genres, tmdb_id, imdb_id, offset=0):
+        """
+        Seed movie and its filtered stored neighbours offset..offset+n:
+        (source, recommendations, has_more) or an error dict
+
+        Stored ranks never change, so pages need no `head` to stay consistent.
+        """
+        if tmdb_id is not None:
+            rows = list(self._neighbours(source__tmdb_id=tmdb_id))
+        elif imdb_id is not None:
+            rows = list(self._neighbours(source__imdb_id=imdb_id))
+        else:
+            rows = list(self._neighbours(source__title=movie_title))
+            if not rows:
+                # Not an exact title: resolve it, then read the match's neighbours
+                movie = self._resolve(movie_title)
+                rows = list(self._neighbours(source_id=movie.id)) if movie else []
+        if not rows:
+            if tmdb_id is not None or imdb_id is not None:
+                seed = tmdb_id if tmdb_id is not None else imdb_id
+                return {'error': f"Movie with id '{seed}' not found", 'suggestions': []}
+            return {'error': f"Movie '{movie_title}' not found", 'suggestions': self.search_movies(movie_title, 5)}
+
+        # Several movies can share a title or id; use the first, as the engine does
+        source = min((row.source for row in rows), key=lambda movie: movie.id)
+        wanted = {_normalize_genre(g) for g in genres} if genres else None
+        recommendations = []
+        matched = 0
+        for row in rows:
+            movie = row.target
+            if row.source_id != source.id:
+                continue
+            if min_rating and (movie.rating is None or movie.rating < min_rating):
+                continue
+            if (min_year or max_year) and not movie.year:
+                continue
+            if (min_year and movie.year < min_year) or (max_year and movie.year > max_year):
+                continue
+            if wanted and not wanted.intersection(_normalize_genre(g) for g in movie.genres):
+                continue
+            matched += 1
+            if matched > offset + n:
+                # Another page follows
+                return source, recommendations, True
+            if matched > offset:
+                recommendations.append(row)
+        return source, recommendations, False
+
+    def recommendation_data(
+        self,
+        movie_title: str = None,
+        n: int = 15,
+        min_rating: float = None,
+        min_year: int = None,
+        max_year: int = None,
+        genres: List[str] = None,
+        tmdb_id: int = None,
+        imdb_id: str = None,
+        layout: str = 'rows',
+        weights: Dict[str, float] = None,
+        half_life: float = None,
+        offset: int = 0,
+        head: List[int] = None
+    ) -> Dict:
+        """Recommendations as raw values for the JSON API (see MovieRecommender.recommendation_data)"""
+        _check_ranking(weights, half_life)
+        result = self._recommend(movie_title, n, min_rating, min_year, max_year, genres, tmdb_id, imdb_id, offset)
+        if isinstance(result, dict):
+            return result
+        source, rows, has_more = result
+
+        recommendations = [
+            {**_movie_data(row.target), 'similarity_score': round(row.score, 4), 'poster_path': row.target.poster_path}
+            for row in rows
+        ]
+        return {
+            'query_movie': source.title,
+            'source_movie': _movie_data(source),
+            'count': len(recommendations),
+            'offset': offset,
+            'has_more': has_more,
+            'recommendations': _columns(recommendations) if layout == 'columns' else recommendations,
+        }
+
+    def _top_rated(self, n: int, min_votes: int, genres: List[str] = None) -> List[PrecomputedMovie]:
+        movies = (
+            self._movies()
+            .filter(rating__isnull=False, votes__gte=min_votes)
+            .order_by('-rating', '-votes', 'id')
+        )
+        if not genres:
+            return list(movies[:n])
+        wanted = {_normalize_genre(g) for g in genres}
+        results = []
+        for movie in movies.iterator(chunk_size=500):
+            if wanted.intersection(_normalize_genre(g) for g in movie.genres):
+                results.append(movie)
+                if len(results) == n:
+                    break
+        return results
+
+    def top_rated_data(self, n: int = 20, min_votes: int = 1000, genres: List[str] = None, layout: str = 'rows') -> Dict:
+        """Top-rated movies as raw values for the JSON API"""
+        movies = [_movie_data(movie) for movie in self._top_rated(n, min_votes, genres)]
+        return {
+            'count': len(movies),
+            'movies': _columns(movies) if layout == 'columns' else movies,
+        }
+
+    def get_top_rated(self, n: int = 20, min_votes: int = 1000, genres: List[str] = None) -> List[Dict]:
+        """Highest-rated movies, formatted for display"""
+        return [
+            {
+                'title': movie.title,
+                'release_date': movie.release_date or 'Unknown',
+                'production': movie.production or 'Unknown',
+                'genres': ', '.join(movie.genres[:3]) if movie.genres else 'N/A',
+                'rating': f"{movie.rating:.1f}/10",
+                'votes': f"{movie.votes:,}",
+                'imdb_link': _imdb_link(movie),
+            }
+            for movie in self._top_rated(n, min_votes, genres)
+        ]
+
+    def get_recommendations(
+        self,
+        movie_title: str = None,
+        n: int = 15,
+        min_rating: float = None,
+        min_year: int = None,
+        max_year: int = None,
+        genres: List[str] = None,
+        tmdb_id: int = None,
+        imdb_id: str = None,
+        weights: Dict[str, float] = None,
+        half_life: float = None,
+        offset: int = 0,
+        head: List[int] = None
+    ) -> Dict:
+        """Recommendations formatted for the HTML views (see MovieRecommender.get_recommendations)"""
+        _check_ranking(weights, half_life)
+        result = self._recommend(movie_title, n, min_rating, min_year, max_year, genres, tmdb_id, imdb_id, offset)
+        if isinstance(result, dict):
+            return result
+        source, rows, has_more = result
+
+        recommendations = []
+        for row in rows:
+            movie = row.target
+            recommendations.append({
+                'title': movie.title,
+                'release_date': movie.release_date or 'Unknown',
+                'production': movie.production or 'Unknown',
+                'genres': ', '.join(movie.genres[:3]) if movie.genres else 'N/A',
+                'rating': f"{movie.rating:.1f}/10" if movie.rating is not None else 'N/A',
+                'votes': f"{movie.votes:,}",
+                'similarity_score': f"{row.score:.3f}",
+                'imdb_id': movie.imdb_id,
+                'poster_url': f"https://image.tmdb.org/t/p/w500{movie.poster_path}" if movie.poster_path else None,
+                'google_link': f"https://www.google.com/search?q={'+'.join(movie.title.split())}+movie",
+                'imdb_link': _imdb_link(movie),
+            })
+
+        return {
+            'query_movie': source.title,
+            'source_movie': {
+                'production': source.production or 'Unknown',
+                'rating': f"{source.rating:.1f}/10" if source.rating is not None else 'N/A',
+                'genres': ', '.join(source.genres[:3]) if source.genres else 'N/A',
+            },
+            'recommendations': recommendations,
+            'has_more': has_more,
+        }
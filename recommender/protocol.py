@@ -0,0 +1,55 @@
+"""
+Wire protocol between web workers and the inference server
+Each message is a 4-byte big-endian length followed by a msgpack body
+"""
+import socket
+import struct
+
+import msgpack
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    """Malformed or oversized frame, or the peer closed the connection"""
+
+
+class RemoteError(Exception):
+    """The inference server raised while handling a request"""
+
+
+def _default(obj):
+    # NumPy scalars/arrays leak out of pandas rows; send them as plain values.
+    # Duck-typed so web workers using the inference server never import NumPy
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def pack(message) -> bytes:
+    body = msgpack.packb(message, default=_default, use_bin_type=True)
+    return HEADER.pack(len(body)) + body
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise ProtocolError("Connection closed by peer")
+        received += n
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, message):
+    sock.sendall(pack(message))
+
+
+def recv_message(sock: socket.socket):
+    (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ProtocolError(f"Message of {size} bytes exceeds the {MAX_MESSAGE_BYTES} byte limit")
+    return msgpack.unpackb(_recv_exactly(sock, size), raw=False)
@@ -0,0 +1,49 @@
+"""
+Fast JSON encoding for API responses
+Uses orjson when installed, which serializes NumPy arrays and scalars natively,
+so result columns are written without per-field Python formatting. NumPy values
+are recognised by their `tolist` method, so importing this module (done by the
+views at worker boot) does not import NumPy.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CONTENT_TYPE = 'application/json'
+
+
+def _default(obj):
+    if hasattr(obj, 'tolist'):
+        # NumPy arrays orjson doesn't handle natively (e.g. object dtype) and NumPy scalars
+        return obj.tolist()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def _plain(obj):
+    """NumPy values -> Python values and NaN -> None, for the stdlib encoder"""
+    if hasattr(obj, 'tolist'):
+        obj = obj.tolist()
+    if isinstance(obj, dict):
+        return {k: _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    if isinstance(obj, float) and obj != obj:
+        return None
+    return obj
+
+
+def dumps(data) -> bytes:
+    """Serialize to UTF-8 JSON bytes; NumPy arrays become JSON arrays, NaN becomes null"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_plain(data)).encode()
+
+
+def rows_from_columns(columns: dict) -> list:
+    """Column dict (arrays or lists of equal length) -> list of row dicts"""
+    keys = list(columns)
+    values = [c.tolist() if hasattr(c, 'tolist') else c for c in columns.values()]
+    return [dict(zip(keys, row)) for row in zip(*values)]
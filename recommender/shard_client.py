@@ -0,0 +1,75 @@
+"""
+Scatter-gather search over index shard servers
+Each shard server (python -m recommender.shard_server) is wrapped as a searcher
+of training.similarity.ShardedIndex, which queries all shards in parallel, maps
+local ids back to movie indices and merges the per-shard top-k lists. Filters are
+sent to each shard as its slice of the global mask, and the seed movie is
+excluded by the engine exactly as for a local index.
+"""
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+
+from training.similarity import SHARD_DIR, ShardedIndex, read_shard_manifest
+from .inference_client import InferenceClient
+from .protocol import ProtocolError
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteShard:
+    """ShardedIndex searcher backed by one shard server"""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def __call__(self, queries: np.ndarray, k: int, mask: np.ndarray = None):
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        bitmap = None if mask is None else np.packbits(mask, bitorder='little').tobytes()
+        result = self.client.call('search', queries.tobytes(), len(queries), k, bitmap)
+        shape = tuple(result['shape'])
+        return (
+            np.frombuffer(result['indices'], dtype=np.int64).reshape(shape),
+            np.frombuffer(result['scores'], dtype=np.float32).reshape(shape),
+        )
+
+
+def _wait_for_shard(client: InferenceClient, deadline: float):
+    while True:
+        try:
+            return client.call('info')
+        except (OSError, ProtocolError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def connect_shards(model_dir, socket_template: str, pool_size: int = 8, timeout: float = 10.0,
+                   connect_timeout: float = 60.0) -> ShardedIndex:
+    """
+    ShardedIndex whose shards are answered by shard servers
+
+    Args:
+        model_dir: Model directory containing index_shards/manifest.json
+        socket_template: Socket path per shard, with a {shard} placeholder
+        pool_size: Idle connections kept per shard
+        timeout: Per-request socket timeout in seconds
+        connect_timeout: How long to wait for shard servers that are still starting
+    """
+    shards = read_shard_manifest(Path(model_dir) / SHARD_DIR)['shards']
+    if not shards:
+        raise FileNotFoundError(f"No index shards in {Path(model_dir) / SHARD_DIR}")
+
+    deadline = time.monotonic() + connect_timeout
+    searchers, sizes = [], []
+    for i, shard in enumerate(shards):
+        client = InferenceClient(socket_template.format(shard=i), pool_size=pool_size, timeout=timeout)
+        info = _wait_for_shard(client, deadline)
+        if 'stop' in shard and info['ntotal'] != shard['stop'] - shard['start']:
+            raise ValueError(f"Shard {i} serves {info['ntotal']} movies, manifest expects {shard['stop'] - shard['start']}")
+        searchers.append(RemoteShard(client))
+        sizes.append(info['ntotal'])
+    logger.info(f"Connected to {len(shards)} index shard servers")
+    return ShardedIndex(searchers, sizes)
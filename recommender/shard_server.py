@@ -0,0 +1,129 @@
+"""
+Index shard server
+Serves one shard of a sharded FAISS index (training/indexing.py) over a Unix domain
+socket, standing in for a remote search node. The web workers' ShardedIndex
+scatters each query to every shard and merges the top-k lists.
+
+Usage (from the repository root):
+    # One process per shard, all on this host
+    python -m recommender.shard_server --model-dir ./models
+    # A single shard, as a remote node would run it
+    python -m recommender.shard_server --model-dir ./models --shard 2
+"""
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from training.similarity import SHARD_DIR, read_shard_manifest, search_index
+from .inference_server import InferenceServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_TEMPLATE = '/tmp/movie-shard-{shard}.sock'
+
+
+class ShardService:
+    """
+    Answers top-k searches against one shard
+
+    Requests carry raw float32 query bytes and an optional little-endian packed
+    bitmap of the shard's allowed rows; results are local row ids and cosine
+    similarities, also as raw bytes, so no per-element encoding happens.
+    """
+
+    def __init__(self, model_dir, shard: int):
+        shard_dir = Path(model_dir) / SHARD_DIR
+        self.shard = shard
+        self.entry = read_shard_manifest(shard_dir)['shards'][shard]
+        self.path = shard_dir / self.entry['file']
+        self.index = faiss.read_index(str(self.path))
+
+    def search(self, queries: bytes, n_queries: int, k: int, bitmap: bytes = None):
+        queries = np.frombuffer(queries, dtype=np.float32).reshape(n_queries, self.index.d)
+        mask = None
+        if bitmap is not None:
+            mask = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8), count=self.index.ntotal, bitorder='little')
+            mask = mask.astype(bool)
+        indices, scores = search_index(self.index, queries, k, mask)
+        return {
+            'shape': list(indices.shape),
+            'indices': indices.astype(np.int64).tobytes(),
+            'scores': scores.astype(np.float32).tobytes(),
+        }
+
+    def handle(self, request):
+        method = request.get('method')
+        if method == 'status':
+            return {'status': 'ready', 'progress': 100}
+        if method == 'info':
+            return {'shard': self.shard, 'file': self.entry['file'], 'ntotal': self.index.ntotal, 'dim': self.index.d}
+        if method == 'search':
+            return self.search(*request.get('args', ()), **request.get('kwargs', {}))
+        raise ValueError(f"Unknown method '{method}'")
+
+
+def serve_shard(model_dir, shard: int, socket_path: str):
+    service = ShardService(model_dir, shard)
+    server = InferenceServer(socket_path, service)
+    logger.info(f"Shard {shard} ({service.index.ntotal:,} movies) listening on {socket_path}")
+
+    def shutdown(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def serve_all(model_dir, socket_template: str = DEFAULT_SOCKET_TEMPLATE):
+    """Run every shard of the model as its own child process and wait for them"""
+    n_shards = len(read_shard_manifest(Path(model_dir) / SHARD_DIR)['shards'])
+    children = [
+        subprocess.Popen([
+            sys.executable, '-m', 'recommender.shard_server',
+            '--model-dir', str(model_dir), '--shard', str(shard),
+            '--socket', socket_template.format(shard=shard),
+        ])
+        for shard in range(n_shards)
+    ]
+    logger.info(f"Started {n_shards} shard servers")
+
+    def shutdown(signum, frame):
+        for child in children:
+            child.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for child in children:
+        child.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve index shards over Unix domain sockets")
+    parser.add_argument('--model-dir', default=os.environ.get('MODEL_DIR', 'models'), help="Trained model directory")
+    parser.add_argument('--shard', type=int, help="Serve only this shard (default: all, one process each)")
+    parser.add_argument('--socket', help="Socket path (with --shard)")
+    parser.add_argument(
+        '--socket-template', default=os.environ.get('RECOMMENDER_SHARD_SOCKET') or DEFAULT_SOCKET_TEMPLATE,
+        help="Socket path per shard, with a {shard} placeholder"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='{levelname} {asctime} {module} {message}', style='{')
+    if args.shard is None:
+        serve_all(args.model_dir, args.socket_template)
+    else:
+        serve_shard(args.model_dir, args.shard, args.socket or args.socket_template.format(shard=args.shard))
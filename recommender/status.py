@@ -0,0 +1,83 @@
+"""
+Model loading status shared by the status endpoints
+The loader thread publishes changes; async views wait for them instead of polling.
+"""
+import asyncio
+import threading
+from typing import Dict, Optional
+
+
+class ModelStatus:
+    """
+    Thread-safe loading state with change notification
+
+    `version` increases on every change. Async waiters are woken on their own
+    event loop via call_soon_threadsafe, so the loader thread never blocks on them.
+    """
+
+    def __init__(self):
+        self.status = 'initializing'
+        self.progress = 0
+        self.error = None
+        self.version = 0
+        self._waiters = set()
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            data = {
+                'loaded': self.status == 'ready',
+                'progress': self.progress,
+                'status': self.status,
+            }
+            if self.status == 'error':
+                data['error'] = self.error
+            return data
+
+    def update(self, status: Optional[str] = None, progress: Optional[int] = None, error: Optional[str] = None):
+        with self._lock:
+            changed = (
+                (status is not None and status != self.status)
+                or (progress is not None and progress != self.progress)
+                or (error is not None and error != self.error)
+            )
+            if not changed:
+                return
+            if status is not None:
+                self.status = status
+            if progress is not None:
+                self.progress = progress
+            if error is not None:
+                self.error = error
+            self.version += 1
+            waiters, self._waiters = self._waiters, set()
+
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('ready', 'error')
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """Wait until `version` is outdated; False on timeout"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self.version != version:
+                return True
+            waiter = (loop, future)
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,573 @@
+"""
+Recommender app tests
+
+Run with: python manage.py test
+"""
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO
+from concurrent.futures import wait
+from pathlib import Path
+
+import numpy as np
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase
+
+from benchmarks.synthetic import generate_catalog
+from . import views
+from .admission import AdmissionController
+from .batching import MicroBatcher
+from .inference_client import InferenceClient, RemoteRecommender
+from .inference_server import InferenceServer
+from .protocol import HEADER, RemoteError, pack
+from .warmup import WARMUP_DEPTH, ResultCache, warm_up
+
+try:
+    import faiss
+    from training.indexing import build_hnsw, shard_bounds, write_shards
+    from training.similarity import INDEX_FILE, SHARD_DIR, SHARD_MANIFEST
+    from .shard_client import connect_shards
+    from .shard_server import ShardService
+except ImportError:
+    faiss = None
+
+
+def build_model(directory, n_movies: int = 3000, hnsw: bool = False) -> Path:
+    """Small synthetic model; with `hnsw`, a deliberately coarse (approximate) index"""
+    path = generate_catalog(directory, n_movies, dim=32, seed=7)
+    if hnsw:
+        index = build_hnsw(np.load(path / 'embeddings.npy'), m=8, ef_construction=20)
+        faiss.write_index(index, str(path / INDEX_FILE))
+    return path
+
+
+class ModelTestCase(SimpleTestCase):
+    """Loads one synthetic model per test class and serves it from the views"""
+
+    hnsw = False
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from .engine import MovieRecommender
+
+        cls.directory = tempfile.mkdtemp()
+        cls.recommender = MovieRecommender(build_model(cls.directory, hnsw=cls.hnsw), readahead=False)
+        cls.recommender.enable_result_cache(1000)
+        cls.recommender.enable_pagination(1000, 100)
+        cls.previous, views._RECOMMENDER = views._RECOMMENDER, cls.recommender
+
+    @classmethod
+    def tearDownClass(cls):
+        views._RECOMMENDER = cls.previous
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client(HTTP_HOST='localhost')
+
+    def get(self, path, **params):
+        return self.client.get(path, params, secure=True)
+
+
+class AdmissionControllerTests(SimpleTestCase):
+    def test_admits_up_to_the_limit_then_queues(self):
+        controller = AdmissionController(max_concurrent=2, max_queue=1, max_wait=0.05)
+        self.assertTrue(controller.acquire())
+        self.assertTrue(controller.acquire())
+        # Third request waits, nobody releases, so it is shed on timeout
+        self.assertFalse(controller.acquire())
+        stats = controller.stats()
+        self.assertEqual(stats['in_flight'], 2)
+        self.assertEqual(stats['shed_timeout'], 1)
+        self.assertEqual(stats['waiting'], 0)
+
+    def test_queue_full_is_shed_immediately(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=1, max_wait=5.0)
+        self.assertTrue(controller.acquire())
+        waiter = threading.Thread(target=controller.acquire)
+        waiter.start()
+        while not controller.stats()['waiting']:
+            pass
+        self.assertFalse(controller.acquire())
+        self.assertEqual(controller.stats()['shed_queue_full'], 1)
+        # The release hands the slot to the queued request
+        controller.release()
+        waiter.join()
+        stats = controller.stats()
+        self.assertEqual(stats['in_flight'], 1)
+        self.assertEqual(stats['admitted'], 2)
+
+    def test_release_hands_slot_to_async_waiter(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=4, max_wait=5.0)
+
+        async def scenario():
+            self.assertTrue(await controller.acquire_async())
+            waiter = asyncio.ensure_future(controller.acquire_async())
+            await asyncio.sleep(0.01)
+            controller.release()
+            self.assertTrue(await waiter)
+
+        asyncio.run(scenario())
+        self.assertEqual(controller.stats()['in_flight'], 1)
+
+    def test_async_timeout_is_shed(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=4, max_wait=0.02)
+
+        async def scenario():
+            self.assertTrue(await controller.acquire_async())
+            self.assertFalse(await controller.acquire_async())
+
+        asyncio.run(scenario())
+        stats = controller.stats()
+        self.assertEqual(stats['shed_timeout'], 1)
+        self.assertEqual(stats['waiting'], 0)
+
+    def test_cancelled_waiter_does_not_leak_a_slot(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=4, max_wait=5.0)
+
+        async def scenario():
+            self.assertTrue(await controller.acquire_async())
+            waiter = asyncio.ensure_future(controller.acquire_async())
+            await asyncio.sleep(0.01)
+            # Client disconnected: the view task is cancelled while queued
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            controller.release()
+
+        asyncio.run(scenario())
+        stats = controller.stats()
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertEqual(stats['waiting'], 0)
+        self.assertEqual(stats['cancelled'], 1)
+        self.assertTrue(controller.acquire())
+
+    def test_cancelled_after_handover_releases_the_slot(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=4, max_wait=5.0)
+
+        async def scenario():
+            self.assertTrue(await controller.acquire_async())
+            waiter = asyncio.ensure_future(controller.acquire_async())
+            await asyncio.sleep(0.01)
+            # The slot is handed over and the waiter cancelled before it resumes
+            controller.release()
+            waiter.cancel()
+            try:
+                admitted = await waiter
+            except asyncio.CancelledError:
+                admitted = False
+            if admitted:
+                controller.release()
+
+        asyncio.run(scenario())
+        self.assertEqual(controller.stats()['in_flight'], 0)
+
+
+@unittest.skipIf(faiss is None, "faiss is not installed")
+class CursorPaginationTests(ModelTestCase):
+    hnsw = True
+
+    def walk(self, **params):
+        """tmdb ids of every page reached by following next_cursor"""
+        response = self.get('/api/recommendations/', n=5, **params)
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            ids += [movie['tmdb_id'] for movie in page['recommendations']]
+            if not page['next_cursor']:
+                return ids
+            response = self.get('/api/recommendations/', cursor=page['next_cursor'])
+
+    def test_cursor_pages_never_repeat_or_skip(self):
+        # On HNSW, deeper searches reorder results; pages must still be consistent
+        for seed in range(0, 3000, 150):
+            tmdb_id = int(self.recommender.metadata['id'].iloc[seed])
+            for filters in ({}, {'min_rating': 6}, {'weights': 'quality:0.3'}):
+                with self.subTest(seed=seed, **filters):
+                    ids = self.walk(tmdb_id=tmdb_id, **filters)
+                    self.assertEqual(len(ids), len(set(ids)))
+                    self.assertLessEqual(len(ids), self.recommender.max_results)
+
+    def test_unfiltered_walk_reaches_max_results(self):
+        ids = self.walk(tmdb_id=int(self.recommender.metadata['id'].iloc[0]))
+        self.assertEqual(len(ids), self.recommender.max_results)
+
+
+class InferenceProtocolTests(SimpleTestCase):
+    def test_numpy_values_are_sent_as_plain_values(self):
+        import msgpack
+
+        frame = pack({'scores': np.array([0.5, 0.25], dtype=np.float32), 'count': np.int64(2)})
+        (size,) = HEADER.unpack(frame[:HEADER.size])
+        self.assertEqual(msgpack.unpackb(frame[HEADER.size:HEADER.size + size]), {'scores': [0.5, 0.25], 'count': 2})
+
+    def test_unreachable_server_raises_after_the_deadline(self):
+        client = InferenceClient(str(Path(tempfile.gettempdir()) / 'no-such-inference.sock'), pool_size=1)
+        with self.assertRaisesMessage(RemoteError, 'not ready after'):
+            RemoteRecommender(client, poll_interval=0.01, ready_timeout=0.05)
+
+
+@unittest.skipIf(faiss is None, "faiss is not installed")
+class ShardedIndexTests(SimpleTestCase):
+    """Two exact shard servers in threads, checked against one unsharded index"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.model_dir = generate_catalog(cls.directory, 1000, dim=16, seed=3)
+        cls.embeddings = np.load(cls.model_dir / 'embeddings.npy')
+        indexes = []
+        for start, stop in shard_bounds(len(cls.embeddings), 2):
+            indexes.append(faiss.IndexFlatIP(cls.embeddings.shape[1]))
+            indexes[-1].add(cls.embeddings[start:stop])
+        write_shards(indexes, cls.model_dir / SHARD_DIR)
+        cls.socket_template = str(Path(cls.directory) / 'shard-{shard}.sock')
+        cls.servers = []
+        for shard in range(2):
+            server = InferenceServer(cls.socket_template.format(shard=shard), ShardService(cls.model_dir, shard))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            cls.servers.append(server)
+
+    @classmethod
+    def tearDownClass(cls):
+        for server in cls.servers:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_sharded_top_k_equals_unsharded(self):
+        index = faiss.IndexFlatIP(self.embeddings.shape[1])
+        index.add(self.embeddings)
+        sharded = connect_shards(self.model_dir, self.socket_template, pool_size=1, connect_timeout=5)
+        queries = self.embeddings[::50]
+        mask = np.random.default_rng(0).random(len(self.embeddings)) < 0.3
+        for k, filtered in ((10, False), (10, True), (1, False)):
+            with self.subTest(k=k, filtered=filtered):
+                indices, scores = sharded.search(queries, k, mask if filtered else None)
+                if filtered:
+                    expected_scores, expected = index.search(
+                        queries, k, params=faiss.SearchParameters(sel=faiss.IDSelectorBatch(np.flatnonzero(mask)))
+                    )
+                    self.assertTrue(mask[indices].all())
+                else:
+                    expected_scores, expected = index.search(queries, k)
+                np.testing.assert_array_equal(indices, expected)
+                np.testing.assert_allclose(scores, expected_scores, rtol=0, atol=1e-6)
+
+    def test_manifest_size_mismatch_is_rejected(self):
+        manifest = json.loads((self.model_dir / SHARD_DIR / SHARD_MANIFEST).read_text())
+        manifest['shards'][1]['stop'] += 1
+        with tempfile.TemporaryDirectory() as other:
+            (Path(other) / SHARD_DIR).mkdir()
+            (Path(other) / SHARD_DIR / SHARD_MANIFEST).write_text(json.dumps(manifest))
+            with self.assertRaisesMessage(ValueError, 'Shard 1 serves 500 movies, manifest expects 501'):
+                connect_shards(other, self.socket_template, pool_size=1, connect_timeout=5)
+
+
+class LoadFailureTests(SimpleTestCase):
+    STATE = ('_RECOMMENDER', '_LOAD_ERROR', '_LOADING_THREAD', '_LOAD_FAILURES', '_RETRY_AT')
+
+    def setUp(self):
+        self.saved = {name: getattr(views, name) for name in self.STATE}
+        views._RECOMMENDER, views._LOADING_THREAD = None, None
+        views._LOAD_ERROR = 'no such table: recommender_precomputeexport'
+        views._LOAD_FAILURES, views._RETRY_AT = 1, time.monotonic() + 60
+        self.client = Client(HTTP_HOST='localhost')
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(views, name, value)
+
+    def test_failed_load_is_reported_unhealthy_and_not_restarted(self):
+        for _ in range(2):
+            response = self.client.get('/api/health/', secure=True)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json()['status'], 'unhealthy')
+            self.assertIn('recommender_precomputeexport', response.json()['error'])
+        self.assertIsNone(views._LOADING_THREAD)
+
+    def test_failed_load_is_retried_with_backoff(self):
+        socket_path = str(Path(tempfile.gettempdir()) / 'no-such-inference.sock')
+        with self.settings(RECOMMENDER_BACKEND='socket', INFERENCE_SOCKET=socket_path,
+                           INFERENCE_READY_TIMEOUT=0.05, MODEL_LOAD_RETRY_SECONDS=60):
+            # Retry due: the loader runs again and the worker reports loading meanwhile
+            views._RETRY_AT = time.monotonic() - 1
+            self.assertEqual(self.client.get('/api/health/', secure=True).json()['status'], 'loading')
+            views._LOADING_THREAD.join(timeout=10)
+
+        self.assertIn('not ready after', views._LOAD_ERROR)
+        self.assertEqual(views._LOAD_FAILURES, 2)
+        # Second failure: the 60s base delay doubled
+        self.assertGreater(views._RETRY_AT - time.monotonic(), 100)
+        self.assertEqual(self.client.get('/api/health/', secure=True).json()['status'], 'unhealthy')
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+
+    def search(self, idxs, k):
+        """Fake batched search: row i ranks movies idx*100, idx*100+1, ..."""
+        self.calls.append((idxs.tolist(), k))
+        indices = idxs[:, None] * 100 + np.arange(k)
+        return indices, -np.arange(k, dtype=np.float32) * np.ones((len(idxs), 1))
+
+    def test_concurrent_queries_share_one_search(self):
+        batcher = MicroBatcher(self.search, max_batch_size=3, max_wait_ms=1000)
+        futures = [batcher.submit(5, 2), batcher.submit(7, 3), batcher.submit(5, 4)]
+        wait(futures, timeout=5)
+        batcher.close()
+        # Duplicates searched once, at the deepest k of the batch
+        self.assertEqual(self.calls, [([5, 7], 4)])
+        for future, (idx, k) in zip(futures, [(5, 2), (7, 3), (5, 4)]):
+            indices, scores = future.result()
+            np.testing.assert_array_equal(indices, idx * 100 + np.arange(k))
+            self.assertEqual(len(scores), k)
+        snapshot = batcher.metrics.snapshot()
+        self.assertEqual((snapshot['queries'], snapshot['batches'], snapshot['max_batch_size']), (3, 1, 3))
+
+    def test_lone_query_is_answered_after_the_wait(self):
+        batcher = MicroBatcher(self.search, max_batch_size=32, max_wait_ms=1)
+        indices, _ = batcher.search(9, 2, timeout=5)
+        batcher.close()
+        np.testing.assert_array_equal(indices, [900, 901])
+
+    def test_search_errors_reach_every_caller(self):
+        def failing(idxs, k):
+            raise RuntimeError("index unavailable")
+
+        batcher = MicroBatcher(failing, max_batch_size=2, max_wait_ms=1000)
+        futures = [batcher.submit(1, 5), batcher.submit(2, 5)]
+        for future in futures:
+            with self.assertRaisesMessage(RuntimeError, "index unavailable"):
+                future.result(timeout=5)
+        batcher.close()
+        with self.assertRaises(RuntimeError):
+            batcher.submit(1, 5)
+
+
+class ResultCacheTests(SimpleTestCase):
+    def entry(self, k, first=0):
+        return np.arange(first, first + k), np.linspace(1, 0, k, dtype=np.float32)
+
+    def test_an_entry_answers_requests_up_to_its_depth(self):
+        cache = ResultCache()
+        cache.put(7, 10, *self.entry(10))
+        indices, scores = cache.get(7, 4)
+        np.testing.assert_array_equal(indices, np.arange(4))
+        self.assertEqual(len(cache.get(7, 10)[0]), 10)
+        self.assertIsNone(cache.get(7, 11))
+        self.assertIsNone(cache.get(8, 1))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_a_shallower_result_never_replaces_a_deeper_one(self):
+        cache = ResultCache()
+        cache.put(7, 10, *self.entry(10))
+        cache.put(7, 5, *self.entry(5, first=100))
+        np.testing.assert_array_equal(cache.get(7, 10)[0], np.arange(10))
+        cache.put(7, 20, *self.entry(20, first=100))
+        np.testing.assert_array_equal(cache.get(7, 20)[0], np.arange(100, 120))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResultCache(max_entries=2)
+        cache.put(1, 5, *self.entry(5))
+        cache.put(2, 5, *self.entry(5))
+        cache.get(1, 5)
+        cache.put(3, 5, *self.entry(5))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(2, 1))
+        self.assertIsNotNone(cache.get(1, 1))
+        self.assertIsNotNone(cache.get(3, 1))
+
+
+class WarmUpTests(ModelTestCase):
+    def test_warm_up_caches_the_first_seeds(self):
+        saved, self.recommender.results = self.recommender.results, ResultCache(1000)
+        try:
+            report = warm_up(self.recommender, 40, batch_size=16)
+            results = self.recommender.results
+            self.assertEqual((report['titles'], len(results)), (40, 40))
+            for seed in (0, 17, 39):
+                expected, expected_scores = self.recommender.similarity.top_k(np.array([seed]), WARMUP_DEPTH)
+                indices, scores = results.get(seed, WARMUP_DEPTH)
+                np.testing.assert_array_equal(indices, expected[0])
+                # Batched and single-row matrix products round differently
+                np.testing.assert_allclose(scores, expected_scores[0], rtol=0, atol=1e-6)
+            self.assertIsNone(results.get(40, 1))
+        finally:
+            self.recommender.results = saved
+
+
+class ApiCachingTests(ModelTestCase):
+    def test_responses_are_tagged_with_the_model_version(self):
+        response = self.get('/api/top-rated/', n=5, min_votes=0)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'W/"{self.recommender.version}"')
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.get('/api/top-rated/', n=5, min_votes=0)['ETag']
+        for candidate in (etag, etag.removeprefix('W/'), f'"other", {etag}', '*'):
+            with self.subTest(candidate=candidate):
+                response = self.client.get('/api/top-rated/', {'n': 5}, secure=True, HTTP_IF_NONE_MATCH=candidate)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(response.content, b'')
+
+    def test_stale_etag_gets_the_full_response(self):
+        response = self.client.get('/api/top-rated/', {'n': 5}, secure=True, HTTP_IF_NONE_MATCH='W/"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_errors_are_not_cached(self):
+        self.assertIn('public', self.get('/api/recommendations/', tmdb_id=-1)['Cache-Control'])
+        response = self.get('/api/recommendations/', n='many', tmdb_id=1)
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-store', response['Cache-Control'])
+
+    def test_large_responses_are_gzipped(self):
+        response = self.client.get('/api/top-rated/', {'n': 50, 'min_votes': 0}, secure=True,
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class RecommendationParameterTests(ModelTestCase):
+    def test_invalid_weights_are_explained(self):
+        response = self.get('/api/recommendations/', tmdb_id=1, weights='quality:high')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "Ranking weight 'quality' must be a number, e.g. quality:0.2")
+
+
+class CursorTests(ModelTestCase):
+    def first_page(self):
+        response = self.get('/api/recommendations/', tmdb_id=int(self.recommender.metadata['id'].iloc[0]), n=5)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursor_resumes_the_query(self):
+        page = self.first_page()
+        response = self.get('/api/recommendations/', cursor=page['next_cursor'])
+        self.assertEqual(response.status_code, 200)
+        following = response.json()['recommendations']
+        self.assertEqual(len(following), 5)
+        self.assertFalse({m['tmdb_id'] for m in following} & {m['tmdb_id'] for m in page['recommendations']})
+
+    def test_tampered_cursor_is_rejected(self):
+        cursor = self.first_page()['next_cursor']
+        tampered = cursor[:-2] + ('AA' if cursor[-2:] != 'AA' else 'BB')
+        response = self.get('/api/recommendations/', cursor=tampered)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "Invalid 'cursor'")
+
+    def test_cursor_expires_with_the_model(self):
+        cursor = self.first_page()['next_cursor']
+        version, self.recommender.version = self.recommender.version, 'retrained'
+        try:
+            response = self.get('/api/recommendations/', cursor=cursor)
+        finally:
+            self.recommender.version = version
+        self.assertEqual(response.status_code, 410)
+
+
+class PrecomputedBackendTests(TestCase):
+    """The 'sqlite' backend answers like the live engine it was exported from"""
+
+    K = 100
+
+    @classmethod
+    def setUpClass(cls):
+        from .engine import MovieRecommender
+
+        cls.directory = tempfile.mkdtemp()
+        path = build_model(cls.directory, n_movies=2000)
+        cls.engine = MovieRecommender(path, readahead=False)
+        cls.engine.enable_pagination(100, cls.K)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('precompute_recommendations', model_dir=str(cls.engine.model_dir), k=cls.K,
+                     batch_size=256, workers=2, stdout=StringIO())
+
+    def setUp(self):
+        from .precomputed import PrecomputedRecommender
+
+        self.precomputed = PrecomputedRecommender()
+
+    def assertSameRecommendations(self, **query):
+        expected = self.engine.recommendation_data(**query)
+        actual = self.precomputed.recommendation_data(**query)
+        self.assertEqual(actual['query_movie'], expected['query_movie'])
+        ids = [movie['tmdb_id'] for movie in actual['recommendations']]
+        expected_ids = [movie['tmdb_id'] for movie in expected['recommendations']]
+        if any(query.get(f) for f in ('min_rating', 'min_year', 'max_year', 'genres')):
+            # Filters scan only the stored top-K: a selective one can run out of neighbours
+            # before the engine's search of the whole catalog does, never reorder them
+            self.assertEqual(ids, expected_ids[:len(ids)])
+            self.assertTrue(ids)
+        else:
+            self.assertEqual(ids, expected_ids)
+            self.assertEqual(actual['has_more'], expected['has_more'])
+        for movie, reference in zip(actual['recommendations'], expected['recommendations']):
+            self.assertAlmostEqual(movie['similarity_score'], reference['similarity_score'], places=3)
+
+    def test_export_matches_the_engine(self):
+        self.assertEqual(self.precomputed.version, self.engine.version)
+        self.assertEqual(self.precomputed.config['n_movies'], len(self.engine.metadata))
+
+    def test_recommendations_match_the_engine(self):
+        for seed in range(0, 2000, 199):
+            tmdb_id = int(self.engine.metadata['id'].iloc[seed])
+            for filters in ({}, {'min_rating': 6.0}, {'min_year': 1980, 'max_year': 2010},
+                            {'genres': ['drama', 'Science Fiction']}):
+                with self.subTest(seed=seed, **filters):
+                    self.assertSameRecommendations(tmdb_id=tmdb_id, n=10, **filters)
+
+    def test_title_seed_and_offset_page_match_the_engine(self):
+        title = self.engine.titles.title(42)
+        self.assertSameRecommendations(movie_title=title, n=10)
+        self.assertSameRecommendations(movie_title=title, n=10, offset=10)
+        self.assertSameRecommendations(movie_title=title, n=10, offset=10, min_rating=6.0)
+        # The last stored neighbours: no page follows
+        last = self.precomputed.recommendation_data(movie_title=title, n=10, offset=self.K - 10)
+        self.assertEqual(last['count'], 10)
+        self.assertFalse(last['has_more'])
+
+    def test_top_rated_matches_the_engine(self):
+        for query in ({'min_votes': 0}, {'min_votes': 1000}, {'min_votes': 250, 'genres': ['comedy', 'Horror']}):
+            with self.subTest(**query):
+                expected = self.engine.top_rated_data(n=20, **query)['movies']
+                actual = self.precomputed.top_rated_data(n=20, **query)['movies']
+                self.assertEqual([m['tmdb_id'] for m in actual], [m['tmdb_id'] for m in expected])
+
+    def test_search_is_the_engine_search_restricted_to_prefixes(self):
+        for query in ('the', 'IRON', self.engine.titles.title(7)[:6]):
+            with self.subTest(query=query):
+                prefixed = [t for t in self.engine.search_movies(query, 5000) if t.lower().startswith(query.lower())]
+                self.assertEqual(self.precomputed.search_movies(query, 20), prefixed[:20])
+        self.assertEqual(self.precomputed.find_movie(self.engine.titles.title(7)[:6].lower()),
+                         self.precomputed.search_movies(self.engine.titles.title(7)[:6], 1)[0])
+        self.assertEqual(self.precomputed.search_movies(''), [])
+
+    def test_hybrid_ranking_is_rejected(self):
+        tmdb_id = int(self.engine.metadata['id'].iloc[0])
+        with self.assertRaisesMessage(ValueError, 'weights are not supported'):
+            self.precomputed.recommendation_data(tmdb_id=tmdb_id, weights={'quality': 0.3})
+        with self.assertRaisesMessage(ValueError, 'half-life is not supported'):
+            self.precomputed.recommendation_data(tmdb_id=tmdb_id, half_life=5.0)
+        # A similarity-only weight ranks like the stored neighbours
+        self.assertEqual(self.precomputed.recommendation_data(tmdb_id=tmdb_id, weights={'similarity': 1.0})['count'], 15)
@@ -12,6 +12,11 @@ urlpatterns = [
     
     # API endpoints
     path('api/search/', views.search_movies, name='search_movies'),
+    path('api/recommendations/', views.recommendations, name='recommendations'),
+    path('api/top-rated/', views.top_rated, name='top_rated'),
     path('api/model-status/', views.model_status, name='model_status'),
+    path('api/model-status/stream/', views.model_status_stream, name='model_status_stream'),
     path('api/health/', views.health_check, name='health_check'),
+    path('api/live/', views.liveness, name='liveness'),
+    path('api/metrics/', views.metrics, name='metrics'),
 ]
@@ -2,159 +2,50 @@
 Movie Recommendation System Views
 Integrates with advanced TMDB model training system
 """
+import json
 import logging
+import math
 import os
 import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Optional
-from difflib import get_close_matches
 
-import pandas as pd
-import numpy as np
-from scipy.sparse import load_npz
-import pickle
-import json
 from django.conf import settings
-from django.http import JsonResponse
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
 from django.shortcuts import render
 from django.views.decorators.http import require_http_methods
 
+from training.weights import parse_weights
+
+from .admission import admission_controlled, get_controller
+from .caching import cache_by_version
+from .concurrency import coalescer
+from .serialization import CONTENT_TYPE, dumps
+from .status import ModelStatus
+
 logger = logging.getLogger(__name__)
 
 # Global cache for recommender system
 _RECOMMENDER = None
 _MODEL_LOADING = False
-_MODEL_LOAD_PROGRESS = 0
+_STATUS = ModelStatus()
 _LOADING_THREAD = None
 _LOAD_ERROR = None
+# Consecutive failed loads, and when (time.monotonic()) the next retry is due
+_LOAD_FAILURES = 0
+_RETRY_AT = None
 
-
-class MovieRecommender:
-    """Integrated recommender system matching training/infer.py logic"""
-    
-    def __init__(self, model_dir='models', progress_callback=None):
-        """Initialize with trained model directory"""
-        self.model_dir = Path(model_dir)
-        self.metadata = None
-        self.similarity_matrix = None
-        self.title_to_idx = None
-        self.config = None
-        self._load_models(progress_callback)
-    
-    def _load_models(self, progress_callback=None):
-        """Load all model artifacts with progress tracking"""
-        global _MODEL_LOAD_PROGRESS
-        logger.info(f"Loading models from {self.model_dir}...")
-        
-        # Load metadata (25%)
-        if progress_callback:
-            progress_callback(10)
-        self.metadata = pd.read_parquet(self.model_dir / 'movie_metadata.parquet')
-        if progress_callback:
-            progress_callback(25)
-        
-        # Load similarity matrix (sparse or dense) (50%)
-        if progress_callback:
-            progress_callback(40)
-        if (self.model_dir / 'similarity_matrix.npz').exists():
-            self.similarity_matrix = load_npz(self.model_dir / 'similarity_matrix.npz').toarray()
-        elif (self.model_dir / 'similarity_matrix.bin').exists():
-            with open(self.model_dir / 'similarity_matrix.bin', 'rb') as f:
-                self.similarity_matrix = pickle.load(f)
-        elif (self.model_dir / 'similarity_matrix.h5').exists():
-            with open(self.model_dir / 'similarity_matrix.h5', 'rb') as f:
-                self.similarity_matrix = pickle.load(f)
-        else:
-            self.similarity_matrix = np.load(self.model_dir / 'similarity_matrix.npy')
-        if progress_callback:
-            progress_callback(65)
-        
-        # Load title mapping (75%)
-        with open(self.model_dir / 'title_to_idx.json', 'r') as f:
-            self.title_to_idx = json.load(f)
-        if progress_callback:
-            progress_callback(80)
-        
-        # Load config (100%)
-        with open(self.model_dir / 'config.json', 'r') as f:
-            self.config = json.load(f)
-        if progress_callback:
-            progress_callback(100)
-        
-        logger.info(f"Loaded {self.config['n_movies']:,} movies successfully")
-    
-    def find_movie(self, title: str) -> Optional[str]:
-        """Find closest matching movie title"""
-        matches = get_close_matches(title, self.title_to_idx.keys(), n=1, cutoff=0.6)
-        return matches[0] if matches else None
-    
-    def search_movies(self, query: str, n: int = 20) -> List[str]:
-        """Search movies by partial title"""
-        query_lower = query.lower()
-        return [title for title in self.title_to_idx.keys() 
-                if query_lower in title.lower()][:n]
-    
-    def get_recommendations(
-        self,
-        movie_title: str,
-        n: int = 15,
-        min_rating: float = None
-    ) -> Dict:
-        """Get movie recommendations with optional filtering"""
-        matched_title = self.find_movie(movie_title)
-        if not matched_title:
-            return {'error': f"Movie '{movie_title}' not found", 'suggestions': self.search_movies(movie_title, 5)}
-        
-        movie_idx = self.title_to_idx[matched_title]
-        source_movie = self.metadata.iloc[movie_idx]
-        
-        # Get similarity scores
-        sim_scores = list(enumerate(self.similarity_matrix[movie_idx]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)[1:]  # Exclude self
-        
-        recommendations = []
-        for idx, score in sim_scores:
-            if len(recommendations) >= n:
-                break
-            
-            movie = self.metadata.iloc[idx]
-            
-            # Rating filter
-            if min_rating and movie['vote_average'] < min_rating:
-                continue
-            
-            recommendations.append({
-                'title': movie['title'],
-                'release_date': movie['release_date'] if pd.notna(movie['release_date']) else 'Unknown',
-                'production': movie['primary_company'] if pd.notna(movie['primary_company']) else 'Unknown',
-                'genres': ', '.join(movie['genres'][:3]) if isinstance(movie['genres'], list) else 'N/A',
-                'rating': f"{movie['vote_average']:.1f}/10" if pd.notna(movie['vote_average']) else 'N/A',
-                'votes': f"{movie['vote_count']:,}" if pd.notna(movie['vote_count']) else 'N/A',
-                'similarity_score': f"{score:.3f}",
-                'imdb_id': movie['imdb_id'] if pd.notna(movie['imdb_id']) else None,
-                'poster_url': f"https://image.tmdb.org/t/p/w500{movie['poster_path']}" if pd.notna(movie['poster_path']) else None,
-                'google_link': f"https://www.google.com/search?q={'+'.join(movie['title'].split())}+movie",
-                'imdb_link': f"https://www.imdb.com/title/{movie['imdb_id']}" if pd.notna(movie['imdb_id']) else None
-            })
-        
-        return {
-            'query_movie': matched_title,
-            'source_movie': {
-                'production': source_movie['primary_company'] if pd.notna(source_movie['primary_company']) else 'Unknown',
-                'rating': f"{source_movie['vote_average']:.1f}/10" if pd.notna(source_movie['vote_average']) else 'N/A',
-                'genres': ', '.join(source_movie['genres'][:3]) if isinstance(source_movie['genres'], list) else 'N/A'
-            },
-            'recommendations': recommendations
-        }
+# Namespaces the signatures of pagination cursors
+CURSOR_SALT = 'recommender.cursor'
 
 
-def _load_model_in_background():
-    """Load model in background thread"""
-    global _RECOMMENDER, _MODEL_LOADING, _MODEL_LOAD_PROGRESS, _LOAD_ERROR
-    
-    _MODEL_LOADING = True
-    _MODEL_LOAD_PROGRESS = 0
-    _LOAD_ERROR = None
+def _load_local_recommender(progress_callback):
+    """Load the model artifacts into this worker"""
+    # Imported here so workers using the inference server never load pandas/NumPy
+    from .engine import MovieRecommender
     
     # Check for model directory (configurable via settings or environment)
     model_dir = getattr(settings, 'MODEL_DIR', os.environ.get('MODEL_DIR', 'models'))
@@ -164,27 +55,100 @@ def _load_model_in_background():
         model_dir = 'static'
         logger.warning(f"Model directory not found, using static directory")
     
+    recommender = MovieRecommender(
+        model_dir, progress_callback,
+        getattr(settings, 'RECOMMENDER_READAHEAD', True),
+        getattr(settings, 'RECOMMENDER_SHARD_SOCKET', None) or None
+    )
+    if getattr(settings, 'RECOMMENDER_BATCHING', False):
+        recommender.enable_batching(
+            settings.RECOMMENDER_BATCH_MAX_SIZE,
+            settings.RECOMMENDER_BATCH_MAX_WAIT_MS
+        )
+    recommender.configure_ranking(
+        parse_weights(getattr(settings, 'RECOMMENDER_RANKING_WEIGHTS', '')),
+        getattr(settings, 'RECOMMENDER_RECENCY_HALF_LIFE', None),
+        getattr(settings, 'RECOMMENDER_RANKING_CANDIDATES', None)
+    )
+    recommender.enable_pagination(
+        getattr(settings, 'RECOMMENDER_PAGE_CACHE_SIZE', 1000),
+        getattr(settings, 'RECOMMENDER_MAX_RESULTS', 500)
+    )
+    if getattr(settings, 'RECOMMENDER_RESULT_CACHE_SIZE', 0):
+        recommender.enable_result_cache(settings.RECOMMENDER_RESULT_CACHE_SIZE)
+    if getattr(settings, 'RECOMMENDER_WARMUP_TITLES', 0):
+        # Before the model is reported ready, so the first requests find warm paths
+        recommender.warm_up(settings.RECOMMENDER_WARMUP_TITLES)
+    return recommender
+
+
+def _connect_inference_server(progress_callback):
+    """Use the shared inference server instead of loading the model in this worker"""
+    from .inference_client import InferenceClient, RemoteRecommender
+    
+    logger.info(f"Connecting to inference server at {settings.INFERENCE_SOCKET}...")
+    client = InferenceClient(settings.INFERENCE_SOCKET, pool_size=settings.INFERENCE_POOL_SIZE)
+    return RemoteRecommender(client, progress_callback, ready_timeout=getattr(settings, 'INFERENCE_READY_TIMEOUT', 300))
+
+
+def _connect_precomputed(progress_callback):
+    """Serve from the precomputed recommendation tables (manage.py precompute_recommendations)"""
+    from .precomputed import PrecomputedRecommender
+    
+    return PrecomputedRecommender()
+
+
+def _load_model_in_background():
+    """Load model in background thread"""
+    global _RECOMMENDER, _MODEL_LOADING, _LOAD_ERROR, _LOAD_FAILURES, _RETRY_AT
+    
+    _MODEL_LOADING = True
+    _LOAD_ERROR = None
+    _STATUS.update(status='loading', progress=0)
+    
     try:
         def progress_callback(progress):
-            global _MODEL_LOAD_PROGRESS
-            _MODEL_LOAD_PROGRESS = progress
+            _STATUS.update(progress=progress)
             logger.info(f"Model loading progress: {progress}%")
         
-        _RECOMMENDER = MovieRecommender(model_dir, progress_callback)
+        backend = getattr(settings, 'RECOMMENDER_BACKEND', 'local')
+        if backend == 'socket':
+            recommender = _connect_inference_server(progress_callback)
+        elif backend == 'sqlite':
+            recommender = _connect_precomputed(progress_callback)
+        else:
+            recommender = _load_local_recommender(progress_callback)
+        _RECOMMENDER = recommender
+        _LOAD_FAILURES, _RETRY_AT = 0, None
         _MODEL_LOADING = False
-        _MODEL_LOAD_PROGRESS = 100
+        _STATUS.update(status='ready', progress=100)
         logger.info("Model loaded successfully")
     except Exception as e:
-        _MODEL_LOADING = False
+        # Transient failures (model directory not mounted yet, inference server still
+        # starting) heal on a later attempt: retry with exponential backoff
+        _LOAD_FAILURES += 1
+        delay = min(
+            getattr(settings, 'MODEL_LOAD_RETRY_SECONDS', 5.0) * 2 ** (_LOAD_FAILURES - 1),
+            getattr(settings, 'MODEL_LOAD_RETRY_MAX_SECONDS', 300.0)
+        )
+        _RETRY_AT = time.monotonic() + delay
+        # Error first, so no request sees neither flag set and restarts the loader early
         _LOAD_ERROR = str(e)
-        logger.error(f"Failed to load recommender: {e}")
+        _MODEL_LOADING = False
+        _STATUS.update(status='error', progress=0, error=_LOAD_ERROR)
+        logger.error(f"Failed to load recommender (attempt {_LOAD_FAILURES}, retrying in {delay:g}s): {e}")
+
+
+def _retry_due() -> bool:
+    """Whether a failed load may be retried now (always true before any failure)"""
+    return not _LOAD_ERROR or _RETRY_AT is None or time.monotonic() >= _RETRY_AT
 
 
 def _start_model_loading():
-    """Start model loading in background if not already started"""
+    """Start model loading in background if not already started (after a failure, once a retry is due)"""
     global _LOADING_THREAD, _RECOMMENDER, _MODEL_LOADING
     
-    if _RECOMMENDER is None and not _MODEL_LOADING:
+    if _RECOMMENDER is None and not _MODEL_LOADING and _retry_due():
         if _LOADING_THREAD is None or not _LOADING_THREAD.is_alive():
             logger.info("Starting model loading in background...")
             _LOADING_THREAD = threading.Thread(target=_load_model_in_background, daemon=True)
@@ -196,15 +160,93 @@ def _get_recommender():
     global _RECOMMENDER, _LOAD_ERROR
     
     if _RECOMMENDER is None:
-        _start_model_loading()
-        if _LOAD_ERROR:
+        # Checked first: restarting the loader early would clear the error and report "loading"
+        if not _retry_due():
             raise Exception(_LOAD_ERROR)
+        _start_model_loading()
         return None
     
     return _RECOMMENDER
 
 
+def _json(data, status=200) -> HttpResponse:
+    """JSON response through the fast encoder (NumPy arrays serialized natively)"""
+    return HttpResponse(dumps(data), content_type=CONTENT_TYPE, status=status)
+
+
+def _recommendation_query(params) -> dict:
+    """Seed, filters and ranking of a recommendations request; raises ValueError"""
+    title = params.get('title', '').strip() or None
+    imdb_id = params.get('imdb_id', '').strip() or None
+    if not (title or imdb_id or params.get('tmdb_id')):
+        raise ValueError("Missing 'title', 'tmdb_id' or 'imdb_id' parameter")
+    try:
+        query = {
+            'title': title,
+            'tmdb_id': int(params['tmdb_id']) if params.get('tmdb_id') else None,
+            'imdb_id': imdb_id,
+            'n': min(max(int(params.get('n', 15)), 1), 50),
+            'min_rating': float(params['min_rating']) if params.get('min_rating') else None,
+            'min_year': int(params['min_year']) if params.get('min_year') else None,
+            'max_year': int(params['max_year']) if params.get('max_year') else None,
+        }
+    except ValueError:
+        raise ValueError("'tmdb_id', 'n', 'min_rating', 'min_year' and 'max_year' must be numbers") from None
+    query['genres'] = sorted({g.strip() for g in params.get('genres', '').split(',') if g.strip()}) or None
+    query['weights'] = parse_weights(params.get('weights', ''))
+    try:
+        half_life = float(params['half_life']) if params.get('half_life') else None
+    except ValueError:
+        half_life = float('nan')
+    if half_life is not None and not 0 < half_life < math.inf:
+        raise ValueError("'half_life' must be a positive number of years")
+    query['half_life'] = half_life
+    return query
+
+
+def _query_key(query: dict) -> tuple:
+    """Hashable form of a recommendations query"""
+    return tuple(
+        tuple(value) if isinstance(value, list) else tuple(sorted(value.items())) if isinstance(value, dict) else value
+        for _, value in sorted(query.items())
+    )
+
+
+def _make_cursor(query: dict, offset: int, head=None) -> str:
+    """
+    Signed, opaque cursor resuming `query` (which includes the model version) at `offset`
+
+    `head` is the first page's `page_indices`: later pages continue the ranking
+    right after those movies, even if a deeper search orders them differently.
+    """
+    payload = {'query': query, 'offset': offset, 'head': head}
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def _read_cursor(cursor: str):
+    """(query, offset, head) of a cursor from `_make_cursor`; raises ValueError if it was tampered with"""
+    try:
+        page = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise ValueError("Invalid 'cursor'") from None
+    return page['query'], page['offset'], page['head']
+
+
+def _model_version():
+    """Version of the loaded model, None while it is loading"""
+    return getattr(_RECOMMENDER, 'version', None)
+
+
+def _busy_page(request):
+    return render(request, 'recommender/index.html', {
+        'total_movies': _RECOMMENDER.config['n_movies'] if _RECOMMENDER is not None else 0,
+        'input_movie_name': request.POST.get('movie_name', '').strip(),
+        'error_message': 'The server is busy right now. Please try again in a moment.',
+    }, status=503)
+
+
 @require_http_methods(["GET", "POST"])
+@admission_controlled(methods=["POST"], busy=_busy_page)
 def main(request):
     """
     Main view for movie recommendation system.
@@ -214,33 +256,34 @@ def main(request):
     # Start loading model if not already loading/loaded
     _start_model_loading()
     
+    if not _retry_due():
+        return render(request, 'recommender/error.html', {
+            'error_message': 'The recommendation model failed to load. Please try again later.',
+        }, status=503)
     recommender = _get_recommender()
     
     # If model is still loading, show the page with loading state
     if recommender is None:
         if request.method == 'GET':
             return render(request, 'recommender/index.html', {
-                'all_movie_names': [],
                 'total_movies': 0,
             })
         else:
             # For POST requests, return error if model not ready
             return render(request, 'recommender/index.html', {
-                'all_movie_names': [],
                 'total_movies': 0,
                 'error_message': 'Model is still loading. Please wait a moment and try again.',
             })
     
-    # Model is loaded, proceed normally
-    titles_list = list(recommender.title_to_idx.keys())
+    # Model is loaded, proceed normally (autocomplete is served by /api/search/)
+    total_movies = recommender.config['n_movies']
     
     if request.method == 'GET':
         return render(
             request,
             'recommender/index.html',
             {
-                'all_movie_names': titles_list,
-                'total_movies': len(titles_list),
+                'total_movies': total_movies,
             }
         )
     
@@ -252,22 +295,21 @@ def main(request):
             request,
             'recommender/index.html',
             {
-                'all_movie_names': titles_list,
-                'total_movies': len(titles_list),
+                'total_movies': total_movies,
                 'error_message': 'Please enter a movie name.',
             }
         )
     
     # Get recommendations
-    result = recommender.get_recommendations(movie_name, n=15)
+    query = _recommendation_query({'title': movie_name})
+    result = recommender.get_recommendations(movie_name, n=query['n'])
     
     if 'error' in result:
         return render(
             request,
             'recommender/index.html',
             {
-                'all_movie_names': titles_list,
-                'total_movies': len(titles_list),
+                'total_movies': total_movies,
                 'input_movie_name': movie_name,
                 'error_message': result['error'],
                 'suggestions': result.get('suggestions', [])
@@ -278,17 +320,21 @@ def main(request):
         request,
         'recommender/result.html',
         {
-            'all_movie_names': titles_list,
             'input_movie_name': result['query_movie'],
             'source_movie': result['source_movie'],
             'recommended_movies': result['recommendations'],
             'total_recommendations': len(result['recommendations']),
+            # "More like this" pages through /api/recommendations/ from here
+            'next_cursor': _make_cursor(
+                {**query, 'version': recommender.version}, query['n'], result.get('page_indices')
+            ) if result.get('has_more') else None,
         }
     )
 
 
 @require_http_methods(["GET"])
-def search_movies(request):
+@cache_by_version(_model_version)
+async def search_movies(request):
     """API endpoint for searching movies (autocomplete)"""
     query = request.GET.get('q', '').strip()
     
@@ -301,9 +347,12 @@ def search_movies(request):
         if recommender is None:
             return JsonResponse({'movies': [], 'count': 0, 'loading': True})
         
-        matching_movies = recommender.search_movies(query, n=20)
+        # Substring search is case-insensitive, so "Dark" and "dark" share one computation
+        matching_movies = await coalescer.run(
+            ('search', query.lower()), recommender.search_movies, query, n=20
+        )
         
-        return JsonResponse({
+        return _json({
             'movies': matching_movies,
             'count': len(matching_movies)
         })
@@ -313,46 +362,208 @@ def search_movies(request):
         return JsonResponse({'error': 'Search failed'}, status=500)
 
 
+@require_http_methods(["GET"])
+@cache_by_version(_model_version)
+@admission_controlled()
+async def recommendations(request):
+    """
+    API endpoint for recommendations
+    
+    Query parameters:
+        title: Movie title (exact, else fuzzy matched)
+        tmdb_id: TMDB id of the seed movie (instead of title)
+        imdb_id: IMDb id of the seed movie, e.g. tt1375666 (instead of title)
+        n: Number of recommendations (1-50, default 15)
+        min_rating: Optional minimum vote average
+        min_year, max_year: Optional release year range
+        genres: Optional comma-separated genres (any of them matches)
+        layout: 'rows' (default, list of objects) or 'columns' (one array per field)
+        weights: Optional hybrid ranking weights overriding the defaults,
+            e.g. quality:0.3,recency:0.1 (similarity, quality, popularity, recency)
+        half_life: Optional recency half-life in years
+        cursor: `next_cursor` of the previous page; replaces every parameter
+            above except n and layout
+    
+    Every page includes `next_cursor`, null after the last one.
+    """
+    layout = 'columns' if request.GET.get('layout') == 'columns' else 'rows'
+    cursor = request.GET.get('cursor', '').strip()
+    try:
+        if cursor:
+            query, offset, head = _read_cursor(cursor)
+            if request.GET.get('n'):
+                query['n'] = min(max(int(request.GET['n']), 1), 50)
+        else:
+            query, offset, head = _recommendation_query(request.GET), 0, None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    # Only passed when given, so backends without hybrid ranking keep working
+    ranking = {key: query[key] for key in ('weights', 'half_life') if query[key]}
+    
+    try:
+        recommender = _get_recommender()
+        
+        if recommender is None:
+            return JsonResponse({'recommendations': [], 'loading': True}, status=503)
+        if cursor and query['version'] != recommender.version:
+            return JsonResponse({'error': "Cursor expired: the model has changed, request the first page again"}, status=410)
+        query['version'] = recommender.version
+        
+        result = await coalescer.run(
+            ('recommendations', _query_key(query), offset, tuple(head or ()), layout),
+            recommender.recommendation_data, query['title'], n=query['n'],
+            min_rating=query['min_rating'], min_year=query['min_year'], max_year=query['max_year'],
+            genres=query['genres'], tmdb_id=query['tmdb_id'], imdb_id=query['imdb_id'], layout=layout,
+            offset=offset, head=head, **ranking
+        )
+        if 'error' in result:
+            return _json(result, status=404)
+        
+        # The coalesced result is shared between requests: copy rather than modify it
+        page = {key: value for key, value in result.items() if key not in ('has_more', 'page_indices')}
+        if result.get('has_more'):
+            page['next_cursor'] = _make_cursor(query, offset + result['count'], head or result.get('page_indices'))
+        else:
+            page['next_cursor'] = None
+        return _json(page)
+        
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error in recommendations: {e}")
+        return JsonResponse({'error': 'Recommendation failed'}, status=500)
+
+
+@require_http_methods(["GET"])
+@cache_by_version(_model_version)
+async def top_rated(request):
+    """
+    API endpoint for top-rated movies
+    
+    Query parameters:
+        genres: Optional comma-separated genres (any of them matches)
+        min_votes: Minimum vote count (default 1000)
+        n: Number of movies (1-100, default 20)
+        layout: 'rows' (default, list of objects) or 'columns' (one array per field)
+    """
+    try:
+        n = min(max(int(request.GET.get('n', 20)), 1), 100)
+        min_votes = max(int(request.GET.get('min_votes', 1000)), 0)
+    except ValueError:
+        return JsonResponse({'error': "'n' and 'min_votes' must be integers"}, status=400)
+    genres = sorted({g.strip() for g in request.GET.get('genres', '').split(',') if g.strip()}) or None
+    layout = 'columns' if request.GET.get('layout') == 'columns' else 'rows'
+    
+    try:
+        recommender = _get_recommender()
+        
+        if recommender is None:
+            return JsonResponse({'movies': [], 'loading': True}, status=503)
+        
+        result = await coalescer.run(
+            ('top_rated', n, min_votes, tuple(genres or ()), layout),
+            recommender.top_rated_data, n=n, min_votes=min_votes, genres=genres, layout=layout
+        )
+        
+        return _json(result)
+        
+    except Exception as e:
+        logger.error(f"Error in top_rated: {e}")
+        return JsonResponse({'error': 'Top-rated lookup failed'}, status=500)
+
+
 @require_http_methods(["GET"])
 def model_status(request):
-    """API endpoint to check model loading status"""
-    global _RECOMMENDER, _MODEL_LOADING, _MODEL_LOAD_PROGRESS, _LOAD_ERROR
+    """
+    API endpoint to check model loading status
     
+    Responses carry a content-based ETag and a short max-age, so bursts of polls
+    are answered by browser/proxy caches or with an empty 304.
+    """
     # Start loading if not already started
     _start_model_loading()
     
-    if _LOAD_ERROR:
-        return JsonResponse({
-            'loaded': False,
-            'progress': 0,
-            'status': 'error',
-            'error': _LOAD_ERROR
-        })
-    elif _RECOMMENDER is not None:
-        return JsonResponse({
-            'loaded': True,
-            'progress': 100,
-            'status': 'ready'
-        })
-    elif _MODEL_LOADING:
-        return JsonResponse({
-            'loaded': False,
-            'progress': _MODEL_LOAD_PROGRESS,
-            'status': 'loading'
-        })
+    data = _STATUS.snapshot()
+    etag = f'"{data["status"]}-{data["progress"]}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=304)
     else:
-        return JsonResponse({
-            'loaded': False,
-            'progress': 0,
-            'status': 'initializing'
-        })
+        response = JsonResponse(data)
+    
+    response['ETag'] = etag
+    # Finished states don't change without a restart; progress changes every few hundred ms
+    patch_cache_control(response, public=True, max_age=60 if _STATUS.finished else 1)
+    return response
+
+
+def _sse_event(data) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+
+async def _status_events(heartbeat: float):
+    """Emit the status whenever it changes, until the model is ready or failed"""
+    version = _STATUS.version
+    yield _sse_event(_STATUS.snapshot())
+    while not _STATUS.finished:
+        if await _STATUS.wait_for_change(version, heartbeat):
+            version = _STATUS.version
+            yield _sse_event(_STATUS.snapshot())
+        else:
+            # Comment line keeps proxies from closing an idle stream
+            yield ": keep-alive\n\n"
+
+
+@require_http_methods(["GET"])
+async def model_status_stream(request):
+    """
+    Server-sent events stream of model loading progress
+    
+    Pushes one event per progress change instead of being polled. Only served
+    under ASGI; under WSGI it would pin a worker, so it answers 204, which tells
+    EventSource clients to stop and fall back to /api/model-status/.
+    """
+    _start_model_loading()
+    
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    
+    response = StreamingHttpResponse(_status_events(heartbeat=15.0), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """API endpoint exposing serving metrics (batching, query coalescing, admission control)"""
+    recommender = _RECOMMENDER
+    serving = recommender.metrics() if recommender is not None else {'batching': None}
+    controller = get_controller()
+    return JsonResponse({
+        **serving,
+        'coalescing': coalescer.stats(),
+        'admission': controller.stats() if controller is not None else None,
+    })
+
+
+@require_http_methods(["GET", "HEAD"])
+def liveness(request):
+    """
+    Liveness probe: the worker is up and serving requests
+    
+    Touches neither the model nor any numeric library, so it answers within
+    milliseconds of worker boot; /api/health/ reports readiness.
+    """
+    return JsonResponse({'status': 'alive'})
 
 
 @require_http_methods(["GET"])
 def health_check(request):
-    """Health check endpoint for monitoring"""
+    """Health check endpoint for monitoring (503 until the model is loaded)"""
     try:
         recommender = _get_recommender()
+        if recommender is None:
+            return JsonResponse({'status': 'loading', 'progress': _STATUS.progress, 'model_loaded': False}, status=503)
         return JsonResponse({
             'status': 'healthy',
             'movies_loaded': recommender.config['n_movies'],
@@ -0,0 +1,121 @@
+"""
+Result cache and startup warm-up
+Metadata is sorted by quality score, so its first rows are the titles most likely
+to be requested. After the model loads, their neighbour lists are computed in
+batches and cached, and the pages needed to serve them (embedding rows, title
+tables, metadata rows) are faulted in, so the first requests after a deploy find
+warm caches instead of cold ones.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Neighbours searched per warmed movie: the API's largest n, one more to tell
+# whether another page follows, plus the seed itself
+WARMUP_DEPTH = 52
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of top-k search results
+
+    Keyed by seed movie for unfiltered neighbour lists (filtered searches depend
+    on the mask and are not cached that way), or by seed and query for the
+    rankings paged through by cursor. An entry searched with depth k answers
+    any request for k or fewer results.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable, k: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(indices, scores) of the first k results for `key`, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < k:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry[1][:k], entry[2][:k]
+
+    def put(self, key: Hashable, k: int, indices: np.ndarray, scores: np.ndarray):
+        """Store the result of a depth-k search (copied, so batch arrays aren't kept alive)"""
+        entry = (k, np.array(indices), np.array(scores))
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[0] > k:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def warm_up(recommender, n_titles: int, depth: int = WARMUP_DEPTH, batch_size: int = 256) -> Dict:
+    """
+    Precompute and cache the neighbours of the `n_titles` best-ranked movies
+
+    Args:
+        recommender: MovieRecommender with a result cache enabled
+        n_titles: Leading metadata rows (highest quality_score first) to warm
+        depth: Neighbours searched per movie, including the movie itself
+        batch_size: Movies per similarity search
+
+    Returns:
+        Report with the number of movies warmed, distinct movies touched and seconds taken
+    """
+    start = time.perf_counter()
+    n_titles = min(max(n_titles, 0), len(recommender.similarity))
+    touched = np.zeros(len(recommender.similarity), dtype=bool)
+
+    for batch_start in range(0, n_titles, batch_size):
+        seeds = np.arange(batch_start, min(batch_start + batch_size, n_titles))
+        indices, scores = recommender.similarity.top_k(seeds, depth)
+        for seed, row_indices, row_scores in zip(seeds.tolist(), indices, scores):
+            recommender.results.put(seed, depth, row_indices, row_scores)
+
+        # Fault in the title table and metadata pages of every movie in these responses
+        rows = np.union1d(indices[indices >= 0], seeds)
+        rows = rows[~touched[rows]]
+        touched[rows] = True
+        recommender._result_columns(rows)
+
+    # Reads the cold-column row groups of the warmed movies into the page cache
+    # (the reader itself keeps only the last few decoded)
+    if n_titles:
+        recommender.details.rows(np.arange(n_titles))
+
+    report = {
+        'titles': n_titles,
+        'movies_touched': int(touched.sum()),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    logger.info(
+        f"Warmed {report['titles']:,} titles ({report['movies_touched']:,} movies touched) in {report['seconds']:.2f}s"
+    )
+    return report
@@ -0,0 +1,351 @@
+"""
+Batch inference for offline jobs
+Reads seed titles or ids from a file or stdin, resolves them in bulk, searches
+their neighbours in batched chunks on a pool of worker processes and streams the
+results as JSONL, CSV or Parquet, so jobs such as newsletter generation run at
+full machine throughput instead of one interactive query at a time.
+
+Used by the training/infer.py command line:
+    python -m training.infer --input seeds.txt --output recommendations.parquet --workers 8
+"""
+
+import csv
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from difflib import get_close_matches
+from functools import lru_cache
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from training.loading import load_artifacts
+from training.similarity import load_similarity
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+SEED_TYPES = ('auto', 'title', 'tmdb_id', 'imdb_id')
+FORMATS = ('jsonl', 'csv', 'parquet')
+
+# Seed movies per similarity search (and per task sent to a worker)
+BATCH_SIZE = 1024
+
+FLAT_COLUMNS = ['seed', 'seed_title', 'seed_tmdb_id', 'rank', 'tmdb_id', 'imdb_id', 'title', 'score']
+
+_IMDB_ID = re.compile(r'tt\d+$')
+
+
+def read_seeds(lines: Iterable[str]) -> Iterator[str]:
+    """Non-empty, non-comment lines, stripped"""
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class SeedResolver:
+    """
+    Maps seed strings to movie indices (-1 when unresolved), memoized
+
+    With seed_type='auto', 'tt...' is an IMDb id and an integer a TMDB id (falling
+    back to a title lookup, for titles such as '1917'); anything else is a title.
+    Titles are matched exactly; fuzzy matching scans every title per miss, so it
+    is opt-in.
+    """
+
+    def __init__(self, titles, seed_type: str = 'auto', fuzzy: bool = False):
+        if seed_type not in SEED_TYPES:
+            raise ValueError(f"seed_type must be one of {SEED_TYPES}")
+        self.titles = titles
+        self.seed_type = seed_type
+        self.fuzzy = fuzzy
+        self._all_titles = None
+        self.resolve = lru_cache(maxsize=1 << 20)(self._resolve)
+
+    def _by_title(self, title: str) -> Optional[int]:
+        idx = self.titles.find(title)
+        if idx is None and self.fuzzy:
+            if self._all_titles is None:
+                self._all_titles = self.titles.titles()
+            matches = get_close_matches(title, self._all_titles, n=1, cutoff=0.6)
+            idx = self.titles.find(matches[0]) if matches else None
+        return idx
+
+    def _resolve(self, seed: str) -> int:
+        kind = self.seed_type
+        if kind == 'auto':
+            kind = 'imdb_id' if _IMDB_ID.match(seed) else 'tmdb_id' if seed.isdigit() else 'title'
+        idx = None
+        if kind == 'tmdb_id' and seed.isdigit():
+            idx = self.titles.by_tmdb_id(int(seed))
+        elif kind == 'imdb_id':
+            idx = self.titles.by_imdb_id(seed)
+        if idx is None and (kind == 'title' or self.seed_type == 'auto'):
+            idx = self._by_title(seed)
+        return -1 if idx is None else int(idx)
+
+    def resolve_many(self, seeds: List[str]) -> np.ndarray:
+        return np.fromiter((self.resolve(seed) for seed in seeds), dtype=np.int64, count=len(seeds))
+
+
+def exclude_seeds(seeds: np.ndarray, indices: np.ndarray, scores: np.ndarray, k: int):
+    """
+    Drop each row's own seed and empty slots, keeping the first k results
+
+    Returns:
+        (indices, scores) shaped (len(seeds), k); missing results are -1 / -inf
+    """
+    keep = (indices != seeds[:, None]) & (indices >= 0) & np.isfinite(scores)
+    # Stable sort moves kept entries to the front without reordering them
+    order = np.argsort(~keep, axis=1, kind='stable')[:, :k]
+    kept = np.take_along_axis(keep, order, axis=1)
+    indices = np.where(kept, np.take_along_axis(indices, order, axis=1), -1)
+    scores = np.where(kept, np.take_along_axis(scores, order, axis=1), -np.inf)
+    return indices, scores
+
+
+# Worker process state, set once by _init_worker
+_SIMILARITY = None
+_MASK = None
+
+
+def _init_worker(model_dir: str, mask: Optional[np.ndarray], threads: int):
+    global _SIMILARITY, _MASK
+    if faiss is not None:
+        faiss.omp_set_num_threads(threads)
+    _SIMILARITY = load_similarity(model_dir)
+    _MASK = mask
+
+
+def _search(seeds: np.ndarray, k: int, similarity=None, mask=None):
+    similarity = similarity if similarity is not None else _SIMILARITY
+    mask = mask if mask is not None else _MASK
+    indices, scores = similarity.top_k(seeds, k + 1, mask)
+    return exclude_seeds(seeds, indices, scores, k)
+
+
+def search_chunks(
+    model_dir,
+    chunks: Iterable[np.ndarray],
+    k: int,
+    mask: Optional[np.ndarray] = None,
+    workers: int = 1,
+    similarity=None
+) -> Iterator:
+    """
+    Yield (indices, scores) for each chunk of resolved seed indices, in order
+
+    With workers > 1 the chunks are searched by a pool of processes, each loading
+    the similarity artifacts once (memory-mapped embeddings are shared through the
+    page cache; a FAISS index is loaded per process). At most 2 * workers chunks
+    are in flight, so arbitrarily long inputs stream in bounded memory.
+    """
+    if workers <= 1:
+        for seeds in chunks:
+            yield _search(seeds, k, similarity, mask)
+        return
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=get_context('spawn'),
+        initializer=_init_worker, initargs=(str(model_dir), mask, threads)
+    ) as pool:
+        pending = deque()
+        for seeds in chunks:
+            pending.append(pool.submit(_search, seeds, k))
+            if len(pending) > 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class _JsonlWriter:
+    """One JSON object per seed, recommendations nested"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, records: List[Dict]):
+        self.stream.write(''.join(json.dumps(record) + '\n' for record in records))
+
+    def close(self):
+        self.stream.flush()
+
+
+class _CsvWriter:
+    """One row per (seed, recommendation)"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.writer = csv.writer(stream)
+        self.writer.writerow(FLAT_COLUMNS)
+
+    def write(self, records: List[Dict]):
+        self.writer.writerows([row[c] for c in FLAT_COLUMNS] for row in _flatten(records))
+
+    def close(self):
+        self.stream.flush()
+
+
+class _ParquetWriter:
+    """One row per (seed, recommendation), one row group per chunk"""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.schema = pa.schema([
+            ('seed', pa.string()), ('seed_title', pa.string()), ('seed_tmdb_id', pa.int64()),
+            ('rank', pa.int16()), ('tmdb_id', pa.int64()), ('imdb_id', pa.string()),
+            ('title', pa.string()), ('score', pa.float32()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, records: List[Dict]):
+        rows = list(_flatten(records))
+        if rows:
+            self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def _flatten(records: List[Dict]) -> Iterator[Dict]:
+    for record in records:
+        for rec in record.get('recommendations', ()):
+            yield {
+                'seed': record['seed'],
+                'seed_title': record['title'],
+                'seed_tmdb_id': record['tmdb_id'],
+                **rec,
+            }
+
+
+def open_writer(output: Optional[str], fmt: Optional[str] = None):
+    """
+    Writer for `output` ('-' or None = stdout); the format defaults to the file suffix
+
+    Returns:
+        (writer, file to close or None)
+    """
+    if fmt is None:
+        suffix = Path(output).suffix.lstrip('.').lower() if output and output != '-' else ''
+        fmt = suffix if suffix in FORMATS else 'jsonl'
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    if fmt == 'parquet':
+        if not output or output == '-':
+            raise ValueError("Parquet output needs a file path")
+        return _ParquetWriter(output), None
+    stream = sys.stdout if not output or output == '-' else open(output, 'w', newline='')
+    writer = _JsonlWriter(stream) if fmt == 'jsonl' else _CsvWriter(stream)
+    return writer, (None if stream is sys.stdout else stream)
+
+
+def run(
+    model_dir,
+    seeds: Iterable[str],
+    output: Optional[str] = None,
+    fmt: Optional[str] = None,
+    n: int = 10,
+    seed_type: str = 'auto',
+    fuzzy: bool = False,
+    batch_size: int = BATCH_SIZE,
+    workers: int = 1,
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    genres: Optional[List[str]] = None,
+    min_rating: Optional[float] = None,
+    progress: bool = True
+) -> Dict:
+    """
+    Recommend `n` movies for every seed and stream them to `output`
+
+    Filters apply to every seed. Unresolved seeds are written as
+    {"seed": ..., "error": ...} lines in JSONL and skipped in CSV/Parquet.
+
+    Returns:
+        Summary: seeds read, resolved, recommendations written, seconds and seeds/s
+    """
+    start = time.perf_counter()
+    # Workers search; this process only resolves seeds and formats rows
+    artifacts = load_artifacts(model_dir, warm=False, use_index=workers <= 1)
+    titles, metadata, facets = artifacts['titles'], artifacts['metadata'], artifacts['facets']
+    tmdb_ids = metadata['id'].to_numpy()
+    imdb_ids = metadata['imdb_id'].to_numpy()
+    resolver = SeedResolver(titles, seed_type, fuzzy)
+    mask = facets.compile(min_year=min_year, max_year=max_year, genres=genres, min_rating=min_rating)
+
+    def imdb(idx):
+        value = imdb_ids[idx]
+        return value if isinstance(value, str) else None
+
+    stats = {'seeds': 0, 'resolved': 0, 'recommendations': 0}
+    chunk_seeds = deque()
+
+    def resolved_chunks():
+        for chunk in chunked(seeds, batch_size):
+            indices = resolver.resolve_many(chunk)
+            chunk_seeds.append((chunk, indices))
+            # Search resolved seeds only; at least one row keeps batch shapes simple
+            found = indices[indices >= 0]
+            yield found if len(found) else np.zeros(1, dtype=np.int64)
+
+    writer, stream = open_writer(output, fmt)
+    try:
+        results = search_chunks(model_dir, resolved_chunks(), n, mask, workers, artifacts['similarity'])
+        for rec_indices, rec_scores in results:
+            chunk, indices = chunk_seeds.popleft()
+            records, row = [], 0
+            for seed, idx in zip(chunk, indices.tolist()):
+                if idx < 0:
+                    records.append({'seed': seed, 'error': 'not found'})
+                    continue
+                recommendations = [
+                    {'rank': rank, 'tmdb_id': int(tmdb_ids[rec]), 'imdb_id': imdb(rec),
+                     'title': titles.title(rec), 'score': round(float(score), 4)}
+                    for rank, (rec, score) in enumerate(zip(rec_indices[row].tolist(), rec_scores[row].tolist()), 1)
+                    if rec >= 0
+                ]
+                row += 1
+                records.append({
+                    'seed': seed, 'title': titles.title(idx), 'tmdb_id': int(tmdb_ids[idx]),
+                    'recommendations': recommendations,
+                })
+                stats['recommendations'] += len(recommendations)
+            writer.write(records)
+            stats['seeds'] += len(chunk)
+            stats['resolved'] += int((indices >= 0).sum())
+            if progress:
+                rate = stats['seeds'] / max(time.perf_counter() - start, 1e-9)
+                print(f"\r   {stats['seeds']:,} seeds ({rate:,.0f}/s)", end='', file=sys.stderr, flush=True)
+    finally:
+        writer.close()
+        if stream is not None:
+            stream.close()
+
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    stats['seeds_per_second'] = round(stats['seeds'] / max(stats['seconds'], 1e-9), 1)
+    if progress:
+        print(file=sys.stderr)
+    return stats
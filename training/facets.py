@@ -0,0 +1,173 @@
+"""
+Faceted filter index for recommendation queries
+Genre bitmaps and year/rating/vote/company arrays built once at model load, so
+any combination of filters compiles to a single boolean mask
+"""
+
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# min_votes thresholds with a precomputed top-rated list
+VOTE_BUCKETS = (0, 100, 500, 1000, 5000, 10000)
+
+
+def genre_list(value) -> List[str]:
+    """Genres of one metadata row as a list (Parquet list columns load as arrays)"""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [str(g) for g in value]
+    return []
+
+
+def normalize_genre(name: str) -> str:
+    """'Science Fiction', 'science fiction' and 'ScienceFiction' are the same genre"""
+    return str(name).lower().replace(' ', '')
+
+
+class FacetIndex:
+    """
+    Columnar view of the metadata used for filtering
+
+    Attributes:
+        genre_bitmaps: normalized genre name -> boolean array over all movies
+        year: release year per movie (0 when unknown)
+        rating: vote_average per movie (NaN when unknown)
+        votes: vote_count per movie
+        company: primary_company code per movie (-1 when unknown)
+        company_names: company code -> name
+        rating_order: movies with a rating, best first (ties broken by vote count)
+        genre_ranks: normalized genre name -> sorted positions in `rating_order`
+        vote_ranks: VOTE_BUCKETS threshold -> sorted positions in `rating_order`
+    """
+
+    def __init__(self, metadata: pd.DataFrame):
+        self.n_movies = len(metadata)
+
+        # Per-genre bitmaps
+        self.genre_bitmaps = {}
+        exploded = metadata['genres'].reset_index(drop=True).explode().dropna()
+        keys = exploded.astype(str).str.lower().str.replace(' ', '', regex=False)
+        for key, rows in keys.groupby(keys).groups.items():
+            bitmap = np.zeros(self.n_movies, dtype=bool)
+            bitmap[np.asarray(rows)] = True
+            self.genre_bitmaps[key] = bitmap
+
+        # Accepts both 'YYYY-MM-DD' and 'DD-MM-YYYY' style dates
+        years = metadata['release_date'].astype('string').str.extract(r'(\d{4})', expand=False)
+        self.year = pd.to_numeric(years, errors='coerce').fillna(0).to_numpy(dtype=np.int16)
+
+        self.rating = pd.to_numeric(metadata['vote_average'], errors='coerce').to_numpy(dtype=np.float32)
+        self.votes = pd.to_numeric(metadata['vote_count'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+        codes, names = pd.factorize(metadata['primary_company'])
+        self.company = codes.astype(np.int32)
+        self.company_names = np.asarray(names, dtype=object)
+
+        # Top-rated lists: one global ranking, per-genre and per-vote-bucket subsets
+        # stored as positions in it so any combination merges without re-sorting
+        rated = np.flatnonzero(~np.isnan(self.rating))
+        self.rating_order = rated[np.lexsort((-self.votes[rated], -self.rating[rated]))]
+        self.genre_ranks = {
+            key: np.flatnonzero(bitmap[self.rating_order]).astype(np.int32)
+            for key, bitmap in self.genre_bitmaps.items()
+        }
+        ordered_votes = self.votes[self.rating_order]
+        self.vote_ranks = {
+            threshold: np.flatnonzero(ordered_votes >= threshold).astype(np.int32)
+            for threshold in VOTE_BUCKETS
+        }
+
+    def genres_mask(self, genres: Iterable[str]) -> np.ndarray:
+        """Movies having any of the given genres"""
+        mask = np.zeros(self.n_movies, dtype=bool)
+        for genre in genres:
+            bitmap = self.genre_bitmaps.get(normalize_genre(genre))
+            if bitmap is not None:
+                mask |= bitmap
+        return mask
+
+    def compile(
+        self,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+        genres: Optional[List[str]] = None,
+        min_rating: Optional[float] = None,
+        min_votes: Optional[int] = None,
+        exclude_company: Optional[int] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Compile filters into one boolean mask over the catalog
+
+        Args:
+            min_year: Minimum release year (movies without a year are excluded)
+            max_year: Maximum release year (movies without a year are excluded)
+            genres: Keep movies having any of these genres
+            min_rating: Minimum vote_average
+            min_votes: Minimum vote_count
+            exclude_company: Company code to exclude (see `company`)
+
+        Returns:
+            Boolean mask, or None when no filter is active
+        """
+        mask = None
+
+        def narrow(condition):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if min_year or max_year:
+            narrow(self.year > 0)
+        if min_year:
+            narrow(self.year >= min_year)
+        if max_year:
+            narrow(self.year <= max_year)
+        if genres:
+            narrow(self.genres_mask(genres))
+        if min_rating:
+            narrow(self.rating >= min_rating)
+        if min_votes:
+            narrow(self.votes >= min_votes)
+        if exclude_company is not None and exclude_company >= 0:
+            narrow(self.company != exclude_company)
+
+        return mask
+
+    def top_rated(self, n: int = 10, min_votes: int = 0, genres: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Highest-rated movies from the precomputed ranked lists
+
+        Args:
+            n: Number of movies
+            min_votes: Minimum vote_count
+            genres: Keep movies having any of these genres
+
+        Returns:
+            Movie indices, best first
+        """
+        bucket = max(t for t in VOTE_BUCKETS if t <= max(min_votes, 0))
+        ranks = self.vote_ranks[bucket]
+
+        if genres:
+            lists = [self.genre_ranks.get(normalize_genre(g)) for g in genres]
+            lists = [r for r in lists if r is not None]
+            if not lists:
+                return np.empty(0, dtype=np.int64)
+            genre_ranks = lists[0] if len(lists) == 1 else np.unique(np.concatenate(lists))
+            ranks = genre_ranks if bucket == 0 else np.intersect1d(ranks, genre_ranks, assume_unique=True)
+
+        if min_votes <= bucket:
+            return self.rating_order[ranks[:n]]
+
+        # Between buckets: the list is already in rating order, scan it in chunks until n pass
+        found = []
+        count = 0
+        chunk = max(4 * n, 1024)
+        for start in range(0, len(ranks), chunk):
+            candidates = self.rating_order[ranks[start:start + chunk]]
+            passing = candidates[self.votes[candidates] >= min_votes]
+            found.append(passing)
+            count += len(passing)
+            if count >= n:
+                break
+        return np.concatenate(found)[:n] if found else np.empty(0, dtype=self.rating_order.dtype)
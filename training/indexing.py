@@ -0,0 +1,118 @@
+"""
+FAISS index construction for the trainer
+The thread count is explicit, vectors are added in chunks with progress reports,
+and large catalogs can be built as several HNSW shards in parallel. Shards cover
+contiguous movie ranges and are searched together at load time (see
+ShardedIndex in training/similarity.py).
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from training.similarity import SHARD_MANIFEST
+
+# Vectors added per index.add call
+ADD_CHUNK = 50_000
+
+
+def shard_bounds(n: int, n_shards: int) -> List[Tuple[int, int]]:
+    """Contiguous [start, stop) ranges splitting n rows into n_shards near-equal parts"""
+    edges = np.linspace(0, n, max(1, min(n_shards, n)) + 1).astype(int)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def build_hnsw(
+    embeddings: np.ndarray,
+    m: int = 32,
+    ef_construction: int = 200,
+    threads: Optional[int] = None,
+    chunk_size: int = ADD_CHUNK,
+    progress_callback: Optional[Callable[[int], None]] = None
+):
+    """
+    HNSW index over L2-normalized `embeddings`, added `chunk_size` rows at a time
+
+    Args:
+        embeddings: Normalized float32 rows (an np.memmap is read chunk by chunk)
+        m: HNSW neighbours per node
+        ef_construction: HNSW build-time search depth
+        threads: OpenMP threads for this build (None keeps FAISS's default)
+        chunk_size: Rows per add call
+        progress_callback: Called with the number of rows added by each chunk
+    """
+    if threads:
+        # OpenMP thread count is per calling thread, so concurrent shard builds don't interfere
+        faiss.omp_set_num_threads(threads)
+    index = faiss.IndexHNSWFlat(embeddings.shape[1], m)
+    index.hnsw.efConstruction = ef_construction
+    for start in range(0, len(embeddings), chunk_size):
+        block = np.ascontiguousarray(embeddings[start:start + chunk_size], dtype=np.float32)
+        index.add(block)
+        if progress_callback:
+            progress_callback(len(block))
+    return index
+
+
+def build_sharded(
+    embeddings: np.ndarray,
+    n_shards: int,
+    m: int = 32,
+    ef_construction: int = 200,
+    threads: Optional[int] = None,
+    chunk_size: int = ADD_CHUNK,
+    progress_callback: Optional[Callable[[int], None]] = None
+) -> List:
+    """
+    Build one HNSW index per contiguous shard of `embeddings`, shards in parallel
+
+    `threads` is split evenly between concurrent shard builds. Smaller graphs
+    are cheaper to build than one large one, at the cost of searching every
+    shard per query.
+
+    Returns:
+        Shard indexes in movie order (shard i holds rows shard_bounds(...)[i])
+    """
+    bounds = shard_bounds(len(embeddings), n_shards)
+    total_threads = threads or faiss.omp_get_max_threads()
+    per_shard = max(1, total_threads // len(bounds))
+    lock = threading.Lock()
+
+    def report(n):
+        if progress_callback:
+            with lock:
+                progress_callback(n)
+
+    def build(bound):
+        start, stop = bound
+        return build_hnsw(embeddings[start:stop], m, ef_construction, per_shard, chunk_size, report)
+
+    with ThreadPoolExecutor(max_workers=len(bounds), thread_name_prefix='index-shard') as pool:
+        return list(pool.map(build, bounds))
+
+
+def write_shards(indexes: List, directory) -> List[Path]:
+    """
+    Write shard indexes as shard_000.faiss, ... plus the manifest.json describing them
+
+    The manifest records each shard's file and [start, stop) movie range, so
+    a shard can be served on its own (recommender/shard_server.py) and its
+    results mapped back to movie indices.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths, shards, start = [], [], 0
+    for i, index in enumerate(indexes):
+        path = directory / f'shard_{i:03d}.faiss'
+        faiss.write_index(index, str(path))
+        paths.append(path)
+        shards.append({'file': path.name, 'start': start, 'stop': start + index.ntotal})
+        start += index.ntotal
+    with open(directory / SHARD_MANIFEST, 'w') as f:
+        json.dump({'n_movies': start, 'dim': indexes[0].d, 'shards': shards}, f, indent=2)
+    return paths
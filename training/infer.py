@@ -1,19 +1,21 @@
 """
 Advanced Movie Recommendation System - Inference Engine
 Optimized for TMDB Movies Dataset 2023 (930K+ movies)
+
+Run from the repository root: python -m training.infer --help
 """
 
 import pandas as pd
 import numpy as np
-from scipy.sparse import load_npz
-import pickle
-import json
 from pathlib import Path
 from typing import List, Dict, Optional
 from difflib import get_close_matches
 import warnings
 warnings.filterwarnings('ignore')
 
+from training.facets import genre_list
+from training.loading import load_artifacts
+
 
 class MovieRecommender:
     def __init__(self, model_dir='./models'):
@@ -25,41 +27,26 @@ class MovieRecommender:
         """
         self.model_dir = Path(model_dir)
         self.metadata = None
-        self.similarity_matrix = None
-        self.title_to_idx = None
+        self.details = None
+        self.similarity = None
+        self.titles = None
         self.config = None
+        self.facets = None
         self.load_models()
     
     def load_models(self):
         """Load all model artifacts"""
         print("🎬 Loading TMDB Movie Recommendation Engine...")
         
-        # Load metadata
-        self.metadata = pd.read_parquet(self.model_dir / 'movie_metadata.parquet')
-        
-        # Load similarity matrix
-        if (self.model_dir / 'similarity_matrix.npz').exists():
-            print("Loading sparse similarity matrix...")
-            self.similarity_matrix = load_npz(self.model_dir / 'similarity_matrix.npz').toarray()
-        elif (self.model_dir / 'similarity_matrix.bin').exists():
-            print("Loading pickle similarity matrix (.bin)...")
-            with open(self.model_dir / 'similarity_matrix.bin', 'rb') as f:
-                self.similarity_matrix = pickle.load(f)
-        elif (self.model_dir / 'similarity_matrix.h5').exists():
-            print("Loading pickle similarity matrix (.h5)...")
-            with open(self.model_dir / 'similarity_matrix.h5', 'rb') as f:
-                self.similarity_matrix = pickle.load(f)
-        else:
-            print("Loading dense similarity matrix (.npy)...")
-            self.similarity_matrix = np.load(self.model_dir / 'similarity_matrix.npy')
-        
-        # Load title mapping
-        with open(self.model_dir / 'title_to_idx.json', 'r') as f:
-            self.title_to_idx = json.load(f)
-        
-        # Load config
-        with open(self.model_dir / 'config.json', 'r') as f:
-            self.config = json.load(f)
+        # Artifacts are read concurrently; overview/poster_path/popularity are read on demand
+        artifacts = load_artifacts(self.model_dir)
+        self.metadata = artifacts['metadata']
+        self.details = artifacts['details']
+        self.facets = artifacts['facets']
+        self.similarity = artifacts['similarity']
+        self.titles = artifacts['titles']
+        self.config = artifacts['config']
+        print(f"Loaded similarity data from {self.similarity.source}")
         
         print(f"✅ Loaded {self.config['n_movies']:,} movies from {self.config.get('dataset', 'dataset')}")
         print(f"   Model ready for inference!")
@@ -75,40 +62,66 @@ class MovieRecommender:
         Returns:
             Best matching title or None
         """
-        matches = get_close_matches(title, self.title_to_idx.keys(), n=1, cutoff=threshold)
+        if self.titles.find(title) is not None:
+            return title
+        matches = get_close_matches(title, self.titles.titles(), n=1, cutoff=threshold)
         return matches[0] if matches else None
     
+    def find_movie_index(
+        self,
+        movie_title: Optional[str] = None,
+        tmdb_id: Optional[int] = None,
+        imdb_id: Optional[str] = None
+    ) -> Optional[int]:
+        """
+        Resolve a movie by TMDB id, IMDb id or title
+        
+        Ids are exact lookups; titles are matched exactly first, then fuzzily.
+        
+        Returns:
+            Movie index or None
+        """
+        if tmdb_id is not None:
+            return self.titles.by_tmdb_id(tmdb_id)
+        if imdb_id is not None:
+            return self.titles.by_imdb_id(imdb_id)
+        matched_title = self.find_movie(movie_title)
+        return self.titles.find(matched_title) if matched_title else None
+    
     def get_movie_details(self, movie_title: str) -> Dict:
         """Get detailed information about a movie"""
         matched_title = self.find_movie(movie_title)
         if not matched_title:
             return {'error': f"Movie '{movie_title}' not found"}
         
-        idx = self.title_to_idx[matched_title]
+        idx = self.titles.find(matched_title)
         movie = self.metadata.iloc[idx]
+        details = self.details.row(idx)
         
         return {
             'title': movie['title'],
             'release_date': movie['release_date'],
             'production': movie['primary_company'],
-            'genres': movie['genres'] if isinstance(movie['genres'], list) else [],
+            'genres': genre_list(movie['genres']),
             'rating': f"{movie['vote_average']:.1f}/10",
             'votes': f"{movie['vote_count']:,}",
-            'popularity': f"{movie['popularity']:.1f}",
-            'overview': movie['overview'][:200] + '...' if len(str(movie['overview'])) > 200 else movie['overview'],
+            'popularity': f"{details['popularity']:.1f}",
+            'overview': details['overview'][:200] + '...' if len(str(details['overview'])) > 200 else details['overview'],
             'imdb_id': movie['imdb_id'] if pd.notna(movie['imdb_id']) else 'N/A',
-            'poster_url': f"https://image.tmdb.org/t/p/w500{movie['poster_path']}" if pd.notna(movie['poster_path']) else None
+            'poster_url': f"https://image.tmdb.org/t/p/w500{details['poster_path']}" if pd.notna(details['poster_path']) else None
         }
     
     def get_recommendations(
         self, 
-        movie_title: str, 
+        movie_title: Optional[str] = None, 
         n_recommendations: int = 10,
         min_year: Optional[int] = None,
         max_year: Optional[int] = None,
         genres: Optional[List[str]] = None,
         min_rating: Optional[float] = None,
-        exclude_same_company: bool = False
+        exclude_same_company: bool = False,
+        tmdb_id: Optional[int] = None,
+        imdb_id: Optional[str] = None
     ) -> Dict:
         """
         Get movie recommendations with advanced filtering
@@ -121,71 +134,54 @@ class MovieRecommender:
             genres: List of genres to filter by
             min_rating: Minimum vote_average (0-10)
             exclude_same_company: Exclude movies by same production company
+            tmdb_id: Seed by TMDB id instead of title
+            imdb_id: Seed by IMDb id (e.g. 'tt1375666') instead of title
         
         Returns:
             Dictionary with recommendations and metadata
         """
-        # Find exact or closest match
-        matched_title = self.find_movie(movie_title)
-        if not matched_title:
+        # Find the seed movie: ids are exact, titles exact or closest match
+        movie_idx = self.find_movie_index(movie_title, tmdb_id, imdb_id)
+        if movie_idx is None:
+            if tmdb_id is not None or imdb_id is not None:
+                return {'error': f"Movie with id '{tmdb_id if tmdb_id is not None else imdb_id}' not found"}
             suggestions = self.search_movies(movie_title, n=5)
             return {
                 'error': f"Movie '{movie_title}' not found",
                 'suggestions': suggestions if suggestions else "Try different spelling or search by partial title"
             }
         
-        if matched_title != movie_title:
+        matched_title = self.titles.title(movie_idx)
+        if movie_title and matched_title != movie_title:
             print(f"📌 Found closest match: '{matched_title}'")
         
-        # Get movie index
-        movie_idx = self.title_to_idx[matched_title]
         source_movie = self.metadata.iloc[movie_idx]
         
-        # Get similarity scores
-        sim_scores = list(enumerate(self.similarity_matrix[movie_idx]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-        
-        # Exclude the input movie itself
-        sim_scores = sim_scores[1:]
+        # Compile filters into one mask and search only within it
+        exclude_company = self.facets.company[movie_idx] if exclude_same_company else None
+        mask = self.facets.compile(
+            min_year=min_year,
+            max_year=max_year,
+            genres=genres,
+            min_rating=min_rating,
+            exclude_company=exclude_company
+        )
+        if mask is not None:
+            # Exclude the input movie itself
+            mask[movie_idx] = False
+            indices, scores = self.similarity.top_k([movie_idx], n_recommendations, mask)
+        else:
+            # Unfiltered: no mask to build, search one extra and drop the seed instead
+            indices, scores = self.similarity.top_k([movie_idx], n_recommendations + 1)
+        indices, scores = indices[0], scores[0]
+        keep = (indices != movie_idx) & (indices >= 0) & np.isfinite(scores)
+        indices, scores = indices[keep][:n_recommendations], scores[keep][:n_recommendations]
         
-        # Apply filters
+        details = self.details.rows(indices)
         recommendations = []
-        source_company = source_movie['primary_company']
-        
-        for idx, score in sim_scores:
-            if len(recommendations) >= n_recommendations:
-                break
-            
+        for idx, score in zip(indices, scores):
             movie = self.metadata.iloc[idx]
-            
-            # Year filter
-            if min_year or max_year:
-                try:
-                    release_str = str(movie['release_date'])
-                    if len(release_str) >= 4:
-                        year = int(release_str.split('-')[-1]) if '-' in release_str else int(release_str[:4])
-                        if min_year and year < min_year:
-                            continue
-                        if max_year and year > max_year:
-                            continue
-                except:
-                    continue
-            
-            # Rating filter
-            if min_rating and movie['vote_average'] < min_rating:
-                continue
-            
-            # Genre filter
-            if genres:
-                movie_genres = movie['genres'] if isinstance(movie['genres'], list) else []
-                movie_genres_lower = [g.lower().replace(' ', '') for g in movie_genres]
-                genres_lower = [g.lower().replace(' ', '') for g in genres]
-                if not any(g in movie_genres_lower for g in genres_lower):
-                    continue
-            
-            # Company filter
-            if exclude_same_company and movie['primary_company'] == source_company:
-                continue
+            poster_path = details.at[idx, 'poster_path']
             
             # Build recommendation entry
             recommendations.append({
@@ -193,13 +189,13 @@ class MovieRecommender:
                 'title': movie['title'],
                 'production': movie['primary_company'] if pd.notna(movie['primary_company']) else 'N/A',
                 'release_date': movie['release_date'],
-                'genres': movie['genres'] if isinstance(movie['genres'], list) else [],
+                'genres': genre_list(movie['genres']),
                 'rating': f"{movie['vote_average']:.1f}/10",
                 'votes': f"{movie['vote_count']:,}",
                 'similarity_score': float(score),
                 'tmdb_id': int(movie['id']),
                 'imdb_id': movie['imdb_id'] if pd.notna(movie['imdb_id']) else None,
-                'poster_url': f"https://image.tmdb.org/t/p/w500{movie['poster_path']}" if pd.notna(movie['poster_path']) else None,
+                'poster_url': f"https://image.tmdb.org/t/p/w500{poster_path}" if pd.notna(poster_path) else None,
                 'google_search': f"https://www.google.com/search?q={'+'.join(movie['title'].split())}+movie",
                 'imdb_link': f"https://www.imdb.com/title/{movie['imdb_id']}" if pd.notna(movie['imdb_id']) else None
             })
@@ -208,7 +204,7 @@ class MovieRecommender:
             'query_movie': matched_title,
             'query_details': {
                 'production': source_movie['primary_company'],
-                'genres': source_movie['genres'] if isinstance(source_movie['genres'], list) else [],
+                'genres': genre_list(source_movie['genres']),
                 'rating': f"{source_movie['vote_average']:.1f}/10",
                 'release_date': source_movie['release_date']
             },
@@ -228,19 +224,14 @@ class MovieRecommender:
         Returns:
             List of matching movie titles
         """
-        query_lower = query.lower()
-        matches = []
-        
-        for title in self.title_to_idx.keys():
-            if query_lower in title.lower():
-                if min_rating:
-                    idx = self.title_to_idx[title]
-                    rating = self.metadata.iloc[idx]['vote_average']
-                    if rating < min_rating:
-                        continue
-                matches.append(title)
-        
-        return matches[:n]
+        if not min_rating:
+            return [self.titles.title(idx) for idx in self.titles.search(query, n)]
+        
+        matches = [
+            idx for idx in self.titles.search(query, len(self.titles))
+            if self.facets.rating[idx] >= min_rating
+        ]
+        return [self.titles.title(idx) for idx in matches[:n]]
     
     def get_top_rated(self, n: int = 10, min_votes: int = 1000, genres: List[str] = None) -> List[Dict]:
         """
@@ -254,29 +245,15 @@ class MovieRecommender:
         Returns:
             List of top-rated movies
         """
-        df = self.metadata[self.metadata['vote_count'] >= min_votes].copy()
-        
-        if genres:
-            genres_lower = [g.lower().replace(' ', '') for g in genres]
-            df = df[
-                df['genres'].apply(
-                    lambda x: any(
-                        g in [genre.lower().replace(' ', '') for genre in (x if isinstance(x, list) else [])]
-                        for g in genres_lower
-                    ) if isinstance(x, list) else False
-                )
-            ]
-        
-        df = df.nlargest(n, 'vote_average')
-        
         results = []
-        for idx, row in df.iterrows():
+        for idx in self.facets.top_rated(n, min_votes, genres):
+            row = self.metadata.iloc[idx]
             results.append({
                 'title': row['title'],
                 'rating': f"{row['vote_average']:.1f}/10",
                 'votes': f"{row['vote_count']:,}",
                 'release_date': row['release_date'],
-                'genres': row['genres'] if isinstance(row['genres'], list) else [],
+                'genres': genre_list(row['genres']),
                 'production': row['primary_company'] if pd.notna(row['primary_company']) else 'N/A'
             })
         
@@ -303,8 +280,8 @@ class MovieRecommender:
         if not matched_title:
             return {'error': f"Movie '{movie_title}' not found"}
         
-        movie_idx = self.title_to_idx[matched_title]
-        sim_to_query = self.similarity_matrix[movie_idx]
+        movie_idx = self.titles.find(matched_title)
+        sim_to_query = self.similarity.row(movie_idx)
         
         selected = []
         candidates = list(range(len(self.metadata)))
@@ -320,7 +297,7 @@ class MovieRecommender:
                 relevance = sim_to_query[candidate]
                 
                 if selected:
-                    max_sim = max(self.similarity_matrix[candidate][s] for s in selected)
+                    max_sim = max(self.similarity.pair(candidate, s) for s in selected)
                 else:
                     max_sim = 0
                 
@@ -342,7 +319,7 @@ class MovieRecommender:
                 'title': movie['title'],
                 'production': movie['primary_company'] if pd.notna(movie['primary_company']) else 'N/A',
                 'rating': f"{movie['vote_average']:.1f}/10",
-                'genres': movie['genres'] if isinstance(movie['genres'], list) else [],
+                'genres': genre_list(movie['genres']),
                 'similarity_score': float(sim_to_query[idx])
             })
         
@@ -387,9 +364,10 @@ class MovieRecommender:
 
 
 # Example usage
-if __name__ == "__main__":
+def run_examples(model_dir='./models'):
+    """Walk through the recommender's features, ending with one interactive query"""
     # Initialize recommender
-    recommender = MovieRecommender(model_dir='./models')
+    recommender = MovieRecommender(model_dir=model_dir)
     
     print("\n" + "="*100)
     print("🎬 TMDB Movie Recommendation System - Examples")
@@ -442,3 +420,46 @@ if __name__ == "__main__":
     
     results = recommender.get_recommendations(movie_name, n_recommendations=10, min_rating=6.5)
     recommender.print_recommendations(results, show_scores=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+    
+    from training import batch
+    
+    parser = argparse.ArgumentParser(
+        description="Recommend movies for seed titles or ids read from a file or stdin "
+                    "(without input on a terminal, run the interactive examples)"
+    )
+    parser.add_argument('--model-dir', default='./models', help="Trained model directory")
+    parser.add_argument('--input', '-i', help="Seeds, one title, TMDB id or IMDb id per line ('-' = stdin)")
+    parser.add_argument('--output', '-o', help="Output file (default stdout); format from its suffix")
+    parser.add_argument('--format', choices=batch.FORMATS, help="jsonl (nested), csv or parquet (one row per recommendation)")
+    parser.add_argument('-n', type=int, default=10, help="Recommendations per seed")
+    parser.add_argument('--seed-type', choices=batch.SEED_TYPES, default='auto', help="How to read each seed")
+    parser.add_argument('--fuzzy', action='store_true', help="Fuzzy-match titles without an exact match (slow)")
+    parser.add_argument('--batch-size', type=int, default=batch.BATCH_SIZE, help="Seeds per similarity search")
+    parser.add_argument('--workers', type=int, default=1, help="Search processes")
+    parser.add_argument('--min-year', type=int)
+    parser.add_argument('--max-year', type=int)
+    parser.add_argument('--genres', help="Comma-separated genres (any of them matches)")
+    parser.add_argument('--min-rating', type=float)
+    parser.add_argument('--examples', action='store_true', help="Run the interactive examples")
+    args = parser.parse_args()
+    
+    if args.examples or (args.input is None and sys.stdin.isatty()):
+        run_examples(args.model_dir)
+        sys.exit(0)
+    
+    source = sys.stdin if args.input in (None, '-') else open(args.input)
+    with source:
+        summary = batch.run(
+            args.model_dir, batch.read_seeds(source), args.output, args.format,
+            n=args.n, seed_type=args.seed_type, fuzzy=args.fuzzy,
+            batch_size=args.batch_size, workers=args.workers,
+            min_year=args.min_year, max_year=args.max_year, min_rating=args.min_rating,
+            genres=[g.strip() for g in args.genres.split(',') if g.strip()] if args.genres else None,
+        )
+    print(json.dumps(summary), file=sys.stderr)
@@ -0,0 +1,187 @@
+"""
+Parallel model artifact loading
+Independent artifacts are read concurrently, progress is reported from the bytes
+actually read, and memory-mapped files are pulled into the page cache before the
+model is reported ready.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from training.facets import FacetIndex
+from training.lookup import LOOKUP_DIR, TitleTable
+from training.metadata import METADATA_FILE, LazyColumns, load_metadata
+from training.similarity import load_similarity, similarity_artifacts
+
+READ_CHUNK = 8 * 1024 * 1024
+
+# Share of the progress bar covered by reading bytes; parsing and index building fill the rest
+READ_SHARE = 90
+
+
+class LoadProgress:
+    """Thread-safe byte counter reporting whole percentages to a callback"""
+
+    def __init__(self, total_bytes: int, callback: Optional[Callable[[int], None]] = None, total_steps: int = 1):
+        self.total_bytes = max(total_bytes, 1)
+        self.callback = callback
+        self.bytes_read = 0
+        self.steps_done = 0
+        self.total_steps = total_steps
+        self._last = -1
+        self._lock = threading.Lock()
+
+    def _report(self):
+        percent = (READ_SHARE * self.bytes_read // self.total_bytes
+                   + (100 - READ_SHARE) * self.steps_done // self.total_steps)
+        percent = min(int(percent), 100)
+        if percent > self._last:
+            self._last = percent
+            if self.callback:
+                self.callback(percent)
+
+    def advance(self, nbytes: int):
+        with self._lock:
+            self.bytes_read = min(self.bytes_read + nbytes, self.total_bytes)
+            self._report()
+
+    def step_done(self):
+        with self._lock:
+            self.steps_done += 1
+            self._report()
+
+    def finish(self):
+        with self._lock:
+            self.bytes_read, self.steps_done = self.total_bytes, self.total_steps
+            self._report()
+
+
+def readahead(path: Path, progress: Optional[LoadProgress] = None, chunk_size: int = READ_CHUNK):
+    """
+    Read a file sequentially so its pages are in the page cache
+
+    Later memory-mapped access (embeddings, title blobs) and parsers reading the
+    same file then hit memory instead of faulting pages in from disk.
+    """
+    with open(path, 'rb', buffering=0) as f:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        buf = bytearray(chunk_size)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            if progress:
+                progress.advance(n)
+
+
+def _lookup_files(model_dir: Path) -> Iterable[Path]:
+    lookup_dir = model_dir / LOOKUP_DIR
+    return sorted(lookup_dir.iterdir()) if lookup_dir.is_dir() else []
+
+
+def model_version(paths: Iterable[Path]) -> str:
+    """
+    Short fingerprint of a model's artifact files
+
+    Built from names, sizes and modification times, so every worker loading the
+    same files agrees on it and any retrain changes it.
+    """
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        if path.exists():
+            stat = path.stat()
+            digest.update(f'{path.name}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()[:16]
+
+
+def load_artifacts(
+    model_dir,
+    progress_callback: Optional[Callable[[int], None]] = None,
+    warm: bool = True,
+    max_workers: int = 4,
+    use_index: bool = True
+) -> Dict:
+    """
+    Load every artifact a recommender needs, concurrently
+
+    Args:
+        model_dir: Directory containing trained model artifacts
+        progress_callback: Called with 0-100 as bytes are read and artifacts parsed
+        warm: Read memory-mapped files through once so first requests don't fault pages in
+        max_workers: Loader threads
+        use_index: Load the FAISS index (False when its shards are served elsewhere)
+
+    Returns:
+        Dict with metadata, details, facets, similarity, titles, config and version
+    """
+    model_dir = Path(model_dir)
+    groups = {
+        'metadata': [model_dir / METADATA_FILE],
+        'similarity': similarity_artifacts(model_dir),
+        'titles': list(_lookup_files(model_dir)),
+        'config': [model_dir / 'config.json'],
+    }
+    version = model_version([p for paths in groups.values() for p in paths])
+    if not use_index:
+        groups['similarity'] = [p for p in groups['similarity'] if p.suffix != '.faiss']
+    if not warm:
+        # Still read the files parsed in full; skip only the memory-mapped ones
+        groups['similarity'] = [p for p in groups['similarity'] if p.name != 'embeddings.npy']
+        groups['titles'] = []
+    total = sum(p.stat().st_size for paths in groups.values() for p in paths if p.exists())
+    progress = LoadProgress(total, progress_callback, total_steps=len(groups))
+
+    def read(name):
+        for path in groups[name]:
+            if path.exists():
+                readahead(path, progress)
+
+    def load_metadata_group():
+        read('metadata')
+        metadata = load_metadata(model_dir)
+        result = {'metadata': metadata, 'details': LazyColumns(model_dir), 'facets': FacetIndex(metadata)}
+        progress.step_done()
+        return result
+
+    def load_similarity_group():
+        read('similarity')
+        similarity = load_similarity(model_dir, use_index=use_index)
+        progress.step_done()
+        return similarity
+
+    def load_config():
+        read('config')
+        with open(model_dir / 'config.json', 'r') as f:
+            config = json.load(f)
+        progress.step_done()
+        return config
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-load') as pool:
+        metadata_future = pool.submit(load_metadata_group)
+        similarity_future = pool.submit(load_similarity_group)
+        config_future = pool.submit(load_config)
+
+        read('titles')
+        if (model_dir / LOOKUP_DIR / 'titles.bin').exists():
+            titles = TitleTable.load(model_dir)
+        else:
+            # Older models: build the tables once the metadata is in
+            titles = TitleTable.from_metadata(metadata_future.result()['metadata'])
+        progress.step_done()
+
+        artifacts = metadata_future.result()
+        artifacts.update(
+            similarity=similarity_future.result(),
+            titles=titles,
+            config=config_future.result(),
+            version=version,
+        )
+    progress.finish()
+    return artifacts
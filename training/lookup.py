@@ -0,0 +1,199 @@
+"""
+Compact title and ID lookup tables
+Replaces title_to_idx.json: titles live in one UTF-8 blob that is memory-mapped
+rather than parsed into a dict, with sorted arrays for exact lookups by title,
+TMDB id and IMDb id.
+
+Layout of <model_dir>/lookup/:
+    titles.bin          titles in row order, each terminated by '\\n'
+    titles_lower.bin    lowercased titles, same layout (substring search)
+    title_offsets.npy   start of each title in titles.bin, plus the blob size
+    lower_offsets.npy   same for titles_lower.bin
+    title_order.npy     row indices sorted by title bytes (binary search)
+    tmdb_ids.npy        sorted TMDB ids, with their rows in tmdb_rows.npy
+    imdb_ids.npy        sorted numeric part of IMDb ids, rows in imdb_rows.npy
+"""
+
+import mmap
+import re
+from bisect import bisect_left
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+LOOKUP_DIR = 'lookup'
+
+_IMDB_ID = re.compile(r'^tt(\d+)$')
+
+
+def imdb_number(imdb_id) -> Optional[int]:
+    """'tt0111161' -> 111161, None when not an IMDb title id"""
+    match = _IMDB_ID.match(str(imdb_id).strip()) if imdb_id is not None else None
+    return int(match.group(1)) if match else None
+
+
+def _blob(titles: List[str]):
+    encoded = [t.encode('utf-8') + b'\n' for t in titles]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return b''.join(encoded), offsets
+
+
+def _sorted_ids(ids: np.ndarray, rows: np.ndarray):
+    order = np.argsort(ids, kind='stable')
+    return ids[order].astype(np.int64), rows[order].astype(np.int32)
+
+
+def build_tables(metadata: pd.DataFrame) -> dict:
+    """Lookup arrays and blobs for a metadata frame (row i = movie index i)"""
+    titles = metadata['title'].astype(str).tolist()
+    blob, offsets = _blob(titles)
+    lower_blob, lower_offsets = _blob([t.lower() for t in titles])
+
+    encoded = [t.encode('utf-8') for t in titles]
+    title_order = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=np.int32)
+
+    rows = np.arange(len(metadata))
+    tmdb = pd.to_numeric(metadata['id'], errors='coerce').to_numpy()
+    has_tmdb = ~np.isnan(tmdb.astype(float))
+    tmdb_ids, tmdb_rows = _sorted_ids(tmdb[has_tmdb].astype(np.int64), rows[has_tmdb])
+
+    imdb = np.array([imdb_number(v) if pd.notna(v) else None for v in metadata['imdb_id']], dtype=object)
+    has_imdb = np.array([v is not None for v in imdb], dtype=bool)
+    imdb_ids, imdb_rows = _sorted_ids(imdb[has_imdb].astype(np.int64), rows[has_imdb])
+
+    return {
+        'titles.bin': blob,
+        'titles_lower.bin': lower_blob,
+        'title_offsets': offsets,
+        'lower_offsets': lower_offsets,
+        'title_order': title_order,
+        'tmdb_ids': tmdb_ids,
+        'tmdb_rows': tmdb_rows,
+        'imdb_ids': imdb_ids,
+        'imdb_rows': imdb_rows,
+    }
+
+
+def write_lookup_tables(model_dir, metadata: pd.DataFrame) -> Path:
+    """Write the lookup tables for `metadata` into <model_dir>/lookup/"""
+    out = Path(model_dir) / LOOKUP_DIR
+    out.mkdir(parents=True, exist_ok=True)
+    for name, value in build_tables(metadata).items():
+        if isinstance(value, bytes):
+            (out / name).write_bytes(value)
+        else:
+            np.save(out / f'{name}.npy', value)
+    return out
+
+
+class _SortedTitles:
+    """Sequence view of titles in sorted order, for bisect"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, i):
+        return self.table.title_bytes(self.table.title_order[i])
+
+
+class TitleTable:
+    """
+    Exact and substring title lookups plus TMDB/IMDb id lookups
+
+    Load with TitleTable.load(model_dir); models trained before the lookup
+    tables existed are handled with TitleTable.from_metadata().
+    """
+
+    def __init__(self, tables: dict):
+        self.blob = tables['titles.bin']
+        self.lower_blob = tables['titles_lower.bin']
+        self.offsets = tables['title_offsets']
+        self.lower_offsets = tables['lower_offsets']
+        self.title_order = tables['title_order']
+        self.tmdb_ids = tables['tmdb_ids']
+        self.tmdb_rows = tables['tmdb_rows']
+        self.imdb_ids = tables['imdb_ids']
+        self.imdb_rows = tables['imdb_rows']
+        self.source = tables.get('source', 'metadata')
+        self._all_titles = None
+
+    @classmethod
+    def load(cls, model_dir, metadata: pd.DataFrame = None) -> 'TitleTable':
+        """Memory-map <model_dir>/lookup/, or build the tables from `metadata` if absent"""
+        path = Path(model_dir) / LOOKUP_DIR
+        if not (path / 'titles.bin').exists():
+            if metadata is None:
+                raise FileNotFoundError(f"No lookup tables in {model_dir}")
+            return cls.from_metadata(metadata)
+
+        tables = {'source': str(path)}
+        for name in ('titles.bin', 'titles_lower.bin'):
+            with open(path / name, 'rb') as f:
+                tables[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if f.seek(0, 2) else b''
+        for name in ('title_offsets', 'lower_offsets', 'title_order',
+                     'tmdb_ids', 'tmdb_rows', 'imdb_ids', 'imdb_rows'):
+            tables[name] = np.load(path / f'{name}.npy', mmap_mode='r')
+        return cls(tables)
+
+    @classmethod
+    def from_metadata(cls, metadata: pd.DataFrame) -> 'TitleTable':
+        return cls(build_tables(metadata))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def title_bytes(self, row: int) -> bytes:
+        return self.blob[int(self.offsets[row]):int(self.offsets[row + 1]) - 1]
+
+    def title(self, row: int) -> str:
+        return self.title_bytes(row).decode('utf-8')
+
+    def titles(self) -> List[str]:
+        """All titles in row order (decoded once, only needed for fuzzy matching)"""
+        if self._all_titles is None:
+            self._all_titles = bytes(self.blob[:]).decode('utf-8').split('\n')[:-1]
+        return self._all_titles
+
+    def find(self, title: str) -> Optional[int]:
+        """Row of the exact title, by binary search"""
+        key = title.encode('utf-8')
+        sorted_titles = _SortedTitles(self)
+        pos = bisect_left(sorted_titles, key)
+        if pos < len(sorted_titles) and sorted_titles[pos] == key:
+            return int(self.title_order[pos])
+        return None
+
+    def search(self, query: str, n: int = 20) -> List[int]:
+        """Rows whose title contains `query` (case-insensitive), in row order"""
+        needle = query.lower().encode('utf-8')
+        if not needle or b'\n' in needle:
+            return []
+        rows = []
+        pos = self.lower_blob.find(needle)
+        while pos != -1 and len(rows) < n:
+            row = int(np.searchsorted(self.lower_offsets, pos, side='right')) - 1
+            rows.append(row)
+            # Continue from the next title so each row matches once
+            pos = self.lower_blob.find(needle, int(self.lower_offsets[row + 1]))
+        return rows
+
+    def _by_id(self, ids, rows, value) -> Optional[int]:
+        pos = int(np.searchsorted(ids, value))
+        if pos < len(ids) and ids[pos] == value:
+            return int(rows[pos])
+        return None
+
+    def by_tmdb_id(self, tmdb_id: int) -> Optional[int]:
+        """Row of a TMDB id"""
+        return self._by_id(self.tmdb_ids, self.tmdb_rows, int(tmdb_id))
+
+    def by_imdb_id(self, imdb_id: str) -> Optional[int]:
+        """Row of an IMDb id such as 'tt0111161'"""
+        number = imdb_number(imdb_id)
+        return None if number is None else self._by_id(self.imdb_ids, self.imdb_rows, number)
@@ -0,0 +1,92 @@
+"""
+Movie metadata storage
+The trainer writes zstd-compressed, row-grouped Parquet; the recommenders load only
+the hot columns used for matching, filtering and ranking, and read the heavy
+display columns for the few rows actually shown.
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+METADATA_FILE = 'movie_metadata.parquet'
+
+# Loaded at startup
+HOT_COLUMNS = [
+    'id', 'title', 'release_date', 'primary_company',
+    'genres', 'vote_average', 'vote_count', 'imdb_id'
+]
+
+# Read on demand for displayed rows
+COLD_COLUMNS = ['overview', 'poster_path', 'popularity']
+
+# Rows per Parquet row group: the unit read when cold columns are fetched
+ROW_GROUP_SIZE = 16_384
+
+
+def write_metadata(df: pd.DataFrame, model_dir) -> Path:
+    """Write the metadata frame (row i = movie index i) as row-grouped zstd Parquet"""
+    path = Path(model_dir) / METADATA_FILE
+    df.to_parquet(path, compression='zstd', index=True, row_group_size=ROW_GROUP_SIZE)
+    return path
+
+
+def load_metadata(model_dir, columns: List[str] = HOT_COLUMNS) -> pd.DataFrame:
+    """Read only `columns` (those present in the file) of the metadata"""
+    path = Path(model_dir) / METADATA_FILE
+    available = set(pq.read_schema(path).names)
+    return pd.read_parquet(path, columns=[c for c in columns if c in available])
+
+
+class LazyColumns:
+    """
+    On-demand reader for the cold metadata columns
+
+    Only the row groups containing requested rows are decoded; the most
+    recently used ones are kept so neighbouring lookups hit memory.
+
+    Args:
+        model_dir: Model directory containing movie_metadata.parquet
+        columns: Columns served by this reader
+        cache_row_groups: Decoded row groups kept in memory
+    """
+
+    def __init__(self, model_dir, columns: List[str] = COLD_COLUMNS, cache_row_groups: int = 8):
+        self.path = Path(model_dir) / METADATA_FILE
+        self._file = pq.ParquetFile(self.path)
+        available = set(self._file.schema_arrow.names)
+        self.columns = [c for c in columns if c in available]
+        sizes = [self._file.metadata.row_group(i).num_rows for i in range(self._file.num_row_groups)]
+        self._starts = np.concatenate([[0], np.cumsum(sizes)])
+        self._cache = OrderedDict()
+        self._cache_size = cache_row_groups
+        self._lock = threading.Lock()
+
+    def _row_group(self, i: int) -> pd.DataFrame:
+        with self._lock:
+            if i in self._cache:
+                self._cache.move_to_end(i)
+                return self._cache[i]
+            group = self._file.read_row_group(i, columns=self.columns).to_pandas()
+            group.index = pd.RangeIndex(self._starts[i], self._starts[i + 1])
+            self._cache[i] = group
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            return group
+
+    def rows(self, indices: Iterable[int]) -> pd.DataFrame:
+        """Cold columns for the given movie indices, indexed by movie index"""
+        indices = np.asarray(list(indices), dtype=np.int64)
+        if len(indices) == 0:
+            return pd.DataFrame(columns=self.columns)
+        groups = np.searchsorted(self._starts, indices, side='right') - 1
+        parts = [self._row_group(int(g)) for g in np.unique(groups)]
+        return pd.concat(parts).loc[indices]
+
+    def row(self, idx: int) -> pd.Series:
+        return self.rows([idx]).iloc[0]
@@ -0,0 +1,143 @@
+"""
+Hybrid reranking of similarity candidates
+Blends cosine similarity with quality, popularity and recency priors in one
+vectorized pass over the top-M candidates of a search, instead of relying on hard
+filters (such as min_rating) that can force the search deep into the ranking.
+"""
+
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from training.metadata import load_metadata
+from training.weights import DEFAULT_WEIGHTS, merge_weights
+
+# Years for the recency prior to halve
+RECENCY_HALF_LIFE = 10.0
+
+# Similarity candidates (top-M) reranked per query
+CANDIDATES = 200
+
+
+def _unit(values: np.ndarray) -> np.ndarray:
+    """Scale non-negative values to [0, 1]; missing values become 0"""
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0).clip(min=0)
+    top = values.max() if len(values) else 0.0
+    return (values / top if top > 0 else values).astype(np.float32)
+
+
+class HybridRanker:
+    """
+    Reranks similarity candidates by a weighted sum of similarity and priors
+
+    All priors are scaled to [0, 1] over the catalog:
+        quality: vote_average * log1p(vote_count), the trainer's quality_score
+        popularity: log1p(popularity)
+        recency: 0.5 ** (years before the catalog's newest release / half_life);
+            0 for movies without a year. Anchored to the catalog, not the clock,
+            so a model's rankings (and cached responses) don't drift day to day.
+
+    Args:
+        rating, votes, popularity, year: Per-movie arrays in model order
+        weights: Default weights (missing keys fall back to DEFAULT_WEIGHTS)
+        half_life: Default recency half-life in years
+        candidates: Candidates reranked per query
+    """
+
+    def __init__(
+        self,
+        rating: np.ndarray,
+        votes: np.ndarray,
+        popularity: np.ndarray,
+        year: np.ndarray,
+        weights: Optional[Mapping[str, float]] = None,
+        half_life: float = RECENCY_HALF_LIFE,
+        candidates: int = CANDIDATES
+    ):
+        self.quality = _unit(np.nan_to_num(rating, nan=0.0) * np.log1p(np.asarray(votes, dtype=np.float64)))
+        self.popularity = _unit(np.log1p(np.nan_to_num(popularity, nan=0.0).clip(min=0)))
+        self.year = np.asarray(year, dtype=np.int16)
+        self.reference_year = int(self.year.max()) if len(self.year) else 0
+        self.weights = merge_weights(DEFAULT_WEIGHTS, weights)
+        self.half_life = self._check_half_life(half_life)
+        self.candidates = candidates
+
+    @classmethod
+    def load(cls, model_dir, facets, **kwargs) -> 'HybridRanker':
+        """Ranker for a model directory, reusing the FacetIndex's rating/vote/year arrays"""
+        metadata = load_metadata(Path(model_dir), ['popularity'])
+        popularity = metadata['popularity'].to_numpy(dtype=np.float64) if 'popularity' in metadata else np.zeros(facets.n_movies)
+        return cls(facets.rating, facets.votes, popularity, facets.year, **kwargs)
+
+    @staticmethod
+    def _check_half_life(half_life: float) -> float:
+        if not half_life > 0:
+            raise ValueError("Recency half-life must be a positive number of years")
+        return float(half_life)
+
+    def resolve(self, overrides: Optional[Mapping[str, float]] = None) -> Dict[str, float]:
+        """Default weights updated with `overrides`; unknown names and non-finite values are rejected"""
+        return merge_weights(self.weights, overrides)
+
+    def configure(self, weights: Optional[Mapping[str, float]] = None, half_life: float = None, candidates: int = None):
+        """Change the defaults; arguments left as None are kept"""
+        if weights is not None:
+            self.weights = self.resolve(weights)
+        if half_life is not None:
+            self.half_life = self._check_half_life(half_life)
+        if candidates is not None:
+            self.candidates = candidates
+
+    @staticmethod
+    def active(weights: Mapping[str, float]) -> bool:
+        """Whether `weights` can rank differently from similarity alone"""
+        return any(weights[name] for name in ('quality', 'popularity', 'recency'))
+
+    def recency(self, indices: np.ndarray, half_life: Optional[float] = None) -> np.ndarray:
+        years = self.year[indices]
+        age = np.maximum(self.reference_year - years, 0).astype(np.float32)
+        half_life = self.half_life if half_life is None else self._check_half_life(half_life)
+        prior = np.exp2(-age / half_life)
+        return np.where(years > 0, prior, 0.0).astype(np.float32)
+
+    def score(
+        self,
+        indices: np.ndarray,
+        similarities: np.ndarray,
+        weights: Mapping[str, float],
+        half_life: Optional[float] = None
+    ) -> np.ndarray:
+        """Hybrid scores of candidate `indices` with cosine `similarities`"""
+        scores = weights['similarity'] * similarities.astype(np.float32)
+        if weights['quality']:
+            scores += weights['quality'] * self.quality[indices]
+        if weights['popularity']:
+            scores += weights['popularity'] * self.popularity[indices]
+        if weights['recency']:
+            scores += weights['recency'] * self.recency(indices, half_life)
+        return scores
+
+    def rerank(
+        self,
+        indices: np.ndarray,
+        similarities: np.ndarray,
+        k: int,
+        weights: Mapping[str, float],
+        half_life: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best k candidates by hybrid score
+
+        Candidates (in similarity order) are reranked in consecutive blocks of
+        `candidates`, so searching deeper (for later pages) never reorders the
+        results already ranked.
+
+        Returns:
+            (indices, similarities) reordered; similarities stay the cosine scores
+        """
+        scores = self.score(indices, similarities, weights, half_life)
+        blocks = np.arange(len(scores)) // max(self.candidates, 1)
+        # lexsort is stable: ties keep the similarity order
+        order = np.lexsort((-scores, blocks))[:k]
+        return indices[order], similarities[order]
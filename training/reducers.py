@@ -0,0 +1,201 @@
+"""
+Dimensionality reducers for TF-IDF features
+Every reducer is fitted once (from the input width, or from a row sample) and then
+transforms any number of chunks, so it works for both the in-memory and the
+streaming trainer. `evaluate` measures what a reduction costs: the share of the
+TF-IDF energy kept and how many true nearest neighbours survive it.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+from sklearn.random_projection import SparseRandomProjection
+
+REDUCERS = ('svd', 'random_projection', 'none')
+
+# Rows of TF-IDF used to fit SVD (and to evaluate any reducer)
+FIT_SAMPLE = 100_000
+
+# Neighbour recall: queries against a candidate sample
+RECALL_QUERIES = 500
+RECALL_CANDIDATES = 20_000
+RECALL_K = 10
+
+
+class Reducer(ABC):
+    """Base class: fit once, transform chunks to dense float32"""
+
+    method = None
+    # Rows the reducer needs to see when fitting; 0 means it only needs the input width
+    sample_rows = 0
+
+    def __init__(self, n_components: int, random_state: int = 42):
+        self.n_components = n_components
+        self.random_state = random_state
+        self.n_components_ = None
+
+    @abstractmethod
+    def fit(self, X):
+        ...
+
+    @abstractmethod
+    def transform(self, X) -> np.ndarray:
+        ...
+
+    @abstractmethod
+    def basis(self) -> Optional[np.ndarray]:
+        """Orthonormal rows spanning the output subspace (None for the identity)"""
+
+
+class RandomProjectionReducer(Reducer):
+    """Sparse random projection: fitted from the input width alone, no pass over the data"""
+
+    method = 'random_projection'
+
+    def fit(self, X):
+        self.n_components_ = min(self.n_components, X.shape[1])
+        self.model = SparseRandomProjection(
+            n_components=self.n_components_,
+            dense_output=True,
+            random_state=self.random_state
+        ).fit(csr_matrix((1, X.shape[1]), dtype=np.float32))
+        return self
+
+    def transform(self, X) -> np.ndarray:
+        return np.asarray(self.model.transform(X), dtype=np.float32)
+
+    def basis(self) -> np.ndarray:
+        q, _ = np.linalg.qr(self.model.components_.T.toarray())
+        return q.T
+
+
+class SVDReducer(Reducer):
+    """
+    Randomized truncated SVD (LSA), fitted on a row sample
+
+    Args:
+        n_components: Latent dimensions
+        fit_rows: Rows of TF-IDF the factorization is fitted on
+    """
+
+    method = 'svd'
+
+    def __init__(self, n_components: int, random_state: int = 42, fit_rows: int = FIT_SAMPLE):
+        super().__init__(n_components, random_state)
+        self.sample_rows = fit_rows
+
+    def fit(self, X):
+        # TruncatedSVD needs strictly fewer components than features
+        self.n_components_ = min(self.n_components, X.shape[1] - 1, X.shape[0] - 1)
+        self.model = TruncatedSVD(
+            n_components=self.n_components_,
+            algorithm='randomized',
+            n_iter=5,
+            random_state=self.random_state
+        ).fit(X)
+        return self
+
+    def transform(self, X) -> np.ndarray:
+        return np.asarray(self.model.transform(X), dtype=np.float32)
+
+    def basis(self) -> np.ndarray:
+        return self.model.components_
+
+
+class IdentityReducer(Reducer):
+    """No reduction: dense TF-IDF rows (vocabulary-wide embeddings; small catalogs only)"""
+
+    method = 'none'
+
+    def fit(self, X):
+        self.n_components_ = X.shape[1]
+        return self
+
+    def transform(self, X) -> np.ndarray:
+        return X.toarray().astype(np.float32) if issparse(X) else np.asarray(X, dtype=np.float32)
+
+    def basis(self):
+        return None
+
+
+def make_reducer(use_dimensionality_reduction: bool, n_components: int, method: str = 'svd') -> Reducer:
+    """Reducer for the trainer's settings"""
+    if not use_dimensionality_reduction or method == 'none':
+        return IdentityReducer(n_components)
+    if method == 'svd':
+        return SVDReducer(n_components)
+    if method == 'random_projection':
+        return RandomProjectionReducer(n_components)
+    raise ValueError(f"Unknown reducer '{method}', expected one of {REDUCERS}")
+
+
+def sample_rows(n_rows: int, size: int, seed: int = 0) -> np.ndarray:
+    """Sorted random row indices (all rows when there are fewer than `size`)"""
+    if n_rows <= size:
+        return np.arange(n_rows)
+    return np.sort(np.random.default_rng(seed).choice(n_rows, size, replace=False))
+
+
+def explained_variance(reducer: Reducer, X, chunk_size: int = 4096) -> float:
+    """Share of the (uncentered) TF-IDF energy of `X` inside the reducer's output subspace"""
+    basis = reducer.basis()
+    if basis is None:
+        return 1.0
+    X = csr_matrix(X)
+    total = X.multiply(X).sum()
+    kept = sum(
+        float(np.square(X[start:start + chunk_size] @ basis.T).sum())
+        for start in range(0, X.shape[0], chunk_size)
+    )
+    return float(kept / total) if total else 1.0
+
+
+def neighbor_recall(X, Z: np.ndarray, k: int = RECALL_K, n_queries: int = RECALL_QUERIES, seed: int = 0) -> float:
+    """
+    Recall@k of cosine nearest neighbours in the reduced space against the TF-IDF space
+
+    Args:
+        X: TF-IDF rows (L2-normalized)
+        Z: The same rows reduced
+    """
+    k = min(k, X.shape[0] - 1)
+    if k < 1:
+        return 1.0
+    queries = sample_rows(X.shape[0], n_queries, seed)
+    Z = normalize(Z)
+
+    def neighbours(scores):
+        scores[np.arange(len(queries)), queries] = -np.inf  # exclude the query itself
+        return np.argpartition(-scores, k, axis=1)[:, :k]
+
+    exact = neighbours((X[queries] @ X.T).toarray() if issparse(X) else X[queries] @ X.T)
+    approx = neighbours(Z[queries] @ Z.T)
+    hits = sum(len(np.intersect1d(a, b)) for a, b in zip(exact, approx))
+    return hits / (len(queries) * k)
+
+
+def evaluate(reducer: Reducer, X) -> Dict:
+    """
+    Quality report for a fitted reducer on TF-IDF sample `X`
+
+    Returns:
+        Dict with method, n_components, explained_variance and neighbor_recall@k
+    """
+    X = csr_matrix(X)
+    candidates = sample_rows(X.shape[0], RECALL_CANDIDATES, seed=1)
+    X_eval = X[candidates]
+    if reducer.basis() is None:
+        # Identity: neighbours are unchanged
+        recall = 1.0
+    else:
+        recall = neighbor_recall(X_eval, reducer.transform(X_eval))
+    return {
+        'method': reducer.method,
+        'n_components': int(reducer.n_components_),
+        'explained_variance': round(explained_variance(reducer, X), 4),
+        f'neighbor_recall@{RECALL_K}': round(recall, 4),
+    }
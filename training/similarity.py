@@ -0,0 +1,282 @@
+"""
+Similarity backends shared by the inference engines
+Wraps precomputed similarity matrices and trained embeddings behind one interface
+"""
+
+import json
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+from scipy.sparse import load_npz
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+# Max query x catalog scores materialized at once by brute-force batch search
+SCORE_BUDGET = 1 << 25
+
+# Filters leaving at most this many candidates are answered by an exact scan of
+# just those candidates; broader filters are pushed into the ANN search
+SUBSET_SCAN_MAX = 20_000
+
+INDEX_FILE = 'movie_index.faiss'
+
+# Sharded indexes (training/indexing.py): shard_000.faiss, ... over contiguous movie
+# ranges, described by manifest.json
+SHARD_DIR = 'index_shards'
+SHARD_MANIFEST = 'manifest.json'
+
+
+def read_shard_manifest(directory) -> Dict:
+    """
+    Shard layout: {'n_movies', 'dim', 'shards': [{'file', 'start', 'stop'}, ...]}
+
+    Directories written before manifests existed are described from their files.
+    """
+    directory = Path(directory)
+    if (directory / SHARD_MANIFEST).exists():
+        with open(directory / SHARD_MANIFEST) as f:
+            return json.load(f)
+    return {'shards': [{'file': path.name} for path in sorted(directory.glob('shard_*.faiss'))]}
+
+
+def shard_files(directory) -> List[Path]:
+    """Shard index files in `directory`, in movie order"""
+    return [Path(directory) / shard['file'] for shard in read_shard_manifest(directory)['shards']]
+
+
+def top_k_rows(scores: np.ndarray, k: int):
+    """
+    Best-first top-k of each row of a score matrix
+
+    Returns:
+        (indices, scores), both shaped (n_rows, k); masked-out entries score -inf
+    """
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        part = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        part = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class DenseSimilarity:
+    """Precomputed n x n similarity matrix (legacy model format)"""
+
+    def __init__(self, matrix, source=None):
+        self.matrix = matrix
+        self.source = source
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def row(self, idx: int) -> np.ndarray:
+        """Similarity of movie `idx` to every movie in the catalog"""
+        return np.asarray(self.matrix[idx])
+
+    def pair(self, a: int, b: int) -> float:
+        """Similarity between two movies"""
+        return float(self.matrix[a][b])
+
+    def top_k(self, idxs, k: int, mask: np.ndarray = None):
+        """Top-k most similar movies for each query movie (best first), optionally within `mask`"""
+        rows = np.array(self.matrix[np.asarray(idxs)], dtype=np.float32)
+        if mask is not None:
+            rows[:, ~mask] = -np.inf
+        return top_k_rows(rows, k)
+
+
+class EmbeddingSimilarity:
+    """
+    Cosine similarity computed on demand from L2-normalized embeddings
+
+    This is the format written by training/train.py (`embeddings.npy`), which
+    scales to catalogs where an n x n matrix would not fit in memory. When the
+    trained FAISS index is available, top-k queries go through it instead of
+    scoring the whole catalog.
+    """
+
+    def __init__(self, embeddings, index=None, source=None):
+        self.embeddings = embeddings
+        self.index = index
+        self.source = source
+
+    def __len__(self):
+        return self.embeddings.shape[0]
+
+    def row(self, idx: int) -> np.ndarray:
+        """Similarity of movie `idx` to every movie in the catalog"""
+        return self.embeddings @ self.embeddings[idx]
+
+    def pair(self, a: int, b: int) -> float:
+        """Similarity between two movies"""
+        return float(self.embeddings[a] @ self.embeddings[b])
+
+    def top_k(self, idxs, k: int, mask: np.ndarray = None):
+        """
+        Top-k most similar movies for each query movie (best first)
+
+        A batch of queries costs one FAISS search or one matrix multiply, which
+        is much cheaper than the same number of single-query calls.
+
+        Args:
+            idxs: Query movie indices
+            k: Neighbours per query
+            mask: Optional boolean mask of allowed results (see FacetIndex.compile)
+        """
+        queries = np.ascontiguousarray(self.embeddings[np.asarray(idxs)], dtype=np.float32)
+
+        if mask is not None:
+            candidates = np.flatnonzero(mask)
+            if len(candidates) <= min(SUBSET_SCAN_MAX, len(self) // 2):
+                return self._subset_search(queries, candidates, k)
+        if self.index is not None:
+            return self._index_search(queries, k, mask)
+
+        chunk = max(1, SCORE_BUDGET // max(len(self), 1))
+        results = []
+        for start in range(0, len(queries), chunk):
+            scores = queries[start:start + chunk] @ self.embeddings.T
+            if mask is not None:
+                scores[:, ~mask] = -np.inf
+            results.append(top_k_rows(scores, k))
+        return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+    def _subset_search(self, queries, candidates, k: int):
+        """Exact search restricted to a small candidate set"""
+        if len(candidates) == 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        indices, scores = top_k_rows(queries @ self.embeddings[candidates].T, k)
+        return candidates[indices], scores
+
+    def _index_search(self, queries, k: int, mask: np.ndarray = None):
+        if isinstance(self.index, ShardedIndex):
+            return self.index.search(queries, k, mask)
+        return search_index(self.index, queries, k, mask)
+
+
+def search_index(index, queries: np.ndarray, k: int, mask: np.ndarray = None):
+    """
+    FAISS top-k as (indices, cosine similarities), optionally restricted to `mask`
+
+    Missing results (fewer than k allowed movies) have index -1.
+    """
+    k = min(k, index.ntotal)
+    selector = bitmap = None
+    if mask is not None:
+        # Keep `bitmap` referenced until the search returns; FAISS only holds a pointer
+        bitmap = np.packbits(mask, bitorder='little')
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+
+    params = None
+    if hasattr(index, 'hnsw'):
+        params = faiss.SearchParametersHNSW(efSearch=max(index.hnsw.efSearch, 2 * k), sel=selector)
+    elif selector is not None:
+        params = faiss.SearchParameters(sel=selector)
+    distances, indices = index.search(queries, k, params=params)
+    if index.metric_type == faiss.METRIC_L2:
+        # Squared L2 between unit vectors -> cosine similarity
+        distances = 1 - distances / 2
+    return indices, distances
+
+
+class ShardedIndex:
+    """
+    Several indexes over contiguous movie ranges, searched as one
+
+    Each shard is a searcher `(queries, k, local_mask) -> (local ids, scores)`:
+    a FAISS index in this process (`from_indexes`) or a shard server in another
+    one (recommender/shard_client.py). Shards are queried in parallel with their
+    slice of the filter mask, local ids are shifted to movie indices, and the
+    per-shard top-k lists are merged.
+
+    Args:
+        searchers: One search callable per shard, in movie order
+        sizes: Movies per shard
+    """
+
+    def __init__(self, searchers: List[Callable], sizes: List[int]):
+        self.searchers = searchers
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self.ntotal = int(self.offsets[-1])
+        self._pool = ThreadPoolExecutor(max_workers=len(searchers), thread_name_prefix='index-shard')
+
+    @classmethod
+    def from_indexes(cls, indexes: List):
+        return cls([partial(search_index, index) for index in indexes], [index.ntotal for index in indexes])
+
+    def search(self, queries: np.ndarray, k: int, mask: np.ndarray = None):
+        def search_shard(i):
+            start, stop = self.offsets[i], self.offsets[i + 1]
+            indices, scores = self.searchers[i](queries, k, None if mask is None else mask[start:stop])
+            missing = indices < 0
+            return np.where(missing, -1, indices + start), np.where(missing, -np.inf, scores)
+
+        results = list(self._pool.map(search_shard, range(len(self.searchers))))
+        indices = np.concatenate([r[0] for r in results], axis=1)
+        scores = np.concatenate([r[1] for r in results], axis=1).astype(np.float32)
+        order, top_scores = top_k_rows(scores, k)
+        return np.take_along_axis(indices, order, axis=1), top_scores
+
+
+def similarity_artifacts(model_dir) -> List[Path]:
+    """Files `load_similarity` reads for this model directory, in the same order of preference"""
+    model_dir = Path(model_dir)
+    for name in ('similarity_matrix.npz', 'similarity_matrix.bin', 'similarity_matrix.h5', 'similarity_matrix.npy'):
+        if (model_dir / name).exists():
+            return [model_dir / name]
+    if (model_dir / 'embeddings.npy').exists():
+        paths = [model_dir / 'embeddings.npy']
+        if (model_dir / INDEX_FILE).exists():
+            paths.append(model_dir / INDEX_FILE)
+        else:
+            paths.extend(shard_files(model_dir / SHARD_DIR))
+        return paths
+    return []
+
+
+def load_similarity(model_dir, mmap: bool = True, use_index: bool = True):
+    """
+    Load whichever similarity artifact a model directory provides
+
+    Args:
+        model_dir: Directory containing trained model artifacts
+        mmap: Memory-map `embeddings.npy` instead of reading it into RAM
+        use_index: Attach `movie_index.faiss` (or the index shards) for top-k search (requires
+            faiss); False leaves `index` unset, e.g. for shards served by other processes
+
+    Returns:
+        DenseSimilarity or EmbeddingSimilarity
+    """
+    artifacts = similarity_artifacts(model_dir)
+    if not artifacts:
+        raise FileNotFoundError(f"No similarity matrix or embeddings found in {model_dir}")
+    path = artifacts[0]
+
+    if path.suffix == '.npz':
+        return DenseSimilarity(load_npz(path).toarray(), source=path.name)
+
+    if path.suffix in ('.bin', '.h5'):
+        with open(path, 'rb') as f:
+            return DenseSimilarity(pickle.load(f), source=path.name)
+
+    if path.name == 'similarity_matrix.npy':
+        return DenseSimilarity(np.load(path), source=path.name)
+
+    embeddings = np.load(path, mmap_mode='r' if mmap else None)
+    index = None
+    if use_index and faiss is not None and len(artifacts) > 1:
+        if artifacts[1].name == INDEX_FILE:
+            index = faiss.read_index(str(artifacts[1]))
+        else:
+            index = ShardedIndex.from_indexes([faiss.read_index(str(path)) for path in artifacts[1:]])
+    return EmbeddingSimilarity(embeddings, index=index, source=path.name)
@@ -0,0 +1,85 @@
+"""
+Content-addressed cache for training stages
+Each stage's output directory is named after a hash of everything that determines
+it (input file fingerprints, parameters, upstream stage keys and a per-stage code
+version), so a rerun skips every stage whose inputs are unchanged and a failed
+run resumes from the last completed stage.
+"""
+
+import hashlib
+import json
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+STAGE_DIR = '.stages'
+
+
+def file_fingerprint(path) -> Dict:
+    """Identity of an input file: resolved path, size and modification time"""
+    path = Path(path).resolve()
+    stat = path.stat()
+    return {'path': str(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class StageCache:
+    """
+    Completed stage outputs under `root`, one directory per (stage, key)
+
+    Outputs are written to a temporary directory and renamed into place only when
+    the stage finishes, so an interrupted stage never looks complete.
+
+    Args:
+        root: Cache directory (created on demand)
+        keep: Completed entries kept per stage; older ones are removed
+    """
+
+    def __init__(self, root, keep: int = 2):
+        self.root = Path(root)
+        self.keep = keep
+
+    @staticmethod
+    def key(name: str, inputs: Dict) -> str:
+        payload = json.dumps({'stage': name, 'inputs': inputs}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    def path(self, name: str, key: str) -> Path:
+        return self.root / f'{name}-{key}'
+
+    def get(self, name: str, key: str) -> Optional[Path]:
+        """Directory of a completed entry, or None"""
+        path = self.path(name, key)
+        if not (path / 'inputs.json').exists():
+            return None
+        path.touch()  # most recently used survives pruning
+        return path
+
+    @contextmanager
+    def build(self, name: str, key: str, inputs: Dict):
+        """Yield a scratch directory for the stage's outputs; publish it if the block succeeds"""
+        final = self.path(name, key)
+        scratch = self.root / f'.{name}-{key}.partial'
+        shutil.rmtree(scratch, ignore_errors=True)
+        scratch.mkdir(parents=True)
+        try:
+            yield scratch
+            with open(scratch / 'inputs.json', 'w') as f:
+                json.dump({'stage': name, 'inputs': inputs}, f, indent=2, sort_keys=True, default=str)
+            shutil.rmtree(final, ignore_errors=True)
+            scratch.rename(final)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        self._prune(name, final)
+
+    def _prune(self, name: str, current: Path):
+        entries = sorted(
+            (p for p in self.root.glob(f'{name}-*') if p.is_dir() and p != current),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True
+        )
+        for stale in entries[max(self.keep - 1, 0):]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,169 @@
+"""
+Out-of-core feature extraction for the training pipeline
+Text is hashed instead of held in a fitted vocabulary, document frequencies are
+counted in one pass, and TF-IDF vectors are transformed, reduced and written to
+a memory-mapped embeddings file one chunk at a time, so peak memory depends on
+the chunk size rather than on the catalog size.
+"""
+
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+from scipy.sparse import csr_matrix, load_npz, save_npz, vstack
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from training.reducers import RECALL_CANDIDATES, Reducer, evaluate, sample_rows
+
+# Documents processed per chunk
+CHUNK_SIZE = 50_000
+
+# Hash buckets; large enough that the kept vocabulary rarely collides
+HASH_FEATURES = 1 << 20
+
+
+class StreamingTfidf:
+    """
+    TF-IDF over hashed terms, fitted chunk by chunk
+
+    Mirrors the TfidfVectorizer settings used by the trainer (min_df, max_df,
+    max_features, sublinear tf, smooth idf, L2 norm) but only keeps per-bucket
+    counters while fitting, so the corpus never has to be in memory at once.
+
+    Args:
+        min_df: Minimum number of documents a term must appear in
+        max_df: Maximum fraction of documents a term may appear in
+        max_features: Keep this many most frequent terms
+        stop_words: Stop word list passed to the hashing tokenizer
+        sublinear_tf: Use 1 + log(tf)
+        n_features: Hash buckets
+    """
+
+    def __init__(self, min_df=5, max_df=0.6, max_features=10_000, stop_words='english',
+                 sublinear_tf=True, n_features=HASH_FEATURES):
+        self.min_df = min_df
+        self.max_df = max_df
+        self.max_features = max_features
+        self.sublinear_tf = sublinear_tf
+        self.hasher = HashingVectorizer(
+            n_features=n_features,
+            alternate_sign=False,
+            norm=None,
+            stop_words=stop_words,
+            dtype=np.float32
+        )
+        self.n_docs = 0
+        self.columns_ = None
+        self.idf_ = None
+        self._df = np.zeros(n_features, dtype=np.int64)
+        self._tf = np.zeros(n_features, dtype=np.float64)
+
+    def count(self, counts: csr_matrix):
+        """Add one chunk of hashed term counts (from `hasher.transform`) to the frequencies"""
+        self._df += np.bincount(counts.indices, minlength=len(self._df))
+        self._tf += np.bincount(counts.indices, weights=counts.data, minlength=len(self._tf))
+        self.n_docs += counts.shape[0]
+        return self
+
+    def partial_fit(self, texts: Sequence[str]):
+        """Count document and term frequencies of one chunk"""
+        return self.count(self.hasher.transform(texts))
+
+    def finalize(self):
+        """Select the vocabulary and compute idf once every chunk has been counted"""
+        keep = (self._df >= self.min_df) & (self._df <= self.max_df * self.n_docs)
+        columns = np.flatnonzero(keep)
+        if self.max_features and len(columns) > self.max_features:
+            columns = columns[np.argsort(-self._tf[columns], kind='stable')[:self.max_features]]
+            columns.sort()
+        self.columns_ = columns
+        self.idf_ = (np.log((1 + self.n_docs) / (1 + self._df[columns])) + 1).astype(np.float32)
+        # Counters are only needed while fitting; don't pickle 16MB of them
+        self._df = self._tf = None
+        return self
+
+    def fit(self, texts: Sequence[str], chunk_size: int = CHUNK_SIZE):
+        for start in range(0, len(texts), chunk_size):
+            self.partial_fit(texts[start:start + chunk_size])
+        return self.finalize()
+
+    @property
+    def n_features_(self) -> int:
+        return len(self.columns_)
+
+    def transform(self, texts: Sequence[str]) -> csr_matrix:
+        """L2-normalized TF-IDF rows for `texts` over the selected vocabulary"""
+        return self.transform_counts(self.hasher.transform(texts))
+
+    def transform_counts(self, counts: csr_matrix) -> csr_matrix:
+        """Like `transform`, for counts already produced by `hasher`"""
+        counts = counts[:, self.columns_].tocsr()
+        if self.sublinear_tf:
+            np.log(counts.data, out=counts.data)
+            counts.data += 1
+        counts = csr_matrix(counts.multiply(self.idf_), dtype=np.float32)
+        return normalize(counts, copy=False)
+
+
+def embed_to_memmap(
+    texts: Sequence[str],
+    tfidf: StreamingTfidf,
+    reducer: Reducer,
+    path,
+    chunk_size: int = CHUNK_SIZE,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+):
+    """
+    Fit `tfidf` and `reducer`, and embed `texts` into an .npy memmap chunk by chunk
+
+    Each text is tokenized once: the counting pass spills the hashed counts of
+    every chunk next to `path`. A row sample read back from them fits the
+    reducer and measures its quality, then the last pass weights, reduces and
+    L2-normalizes every chunk into the output file.
+
+    Args:
+        texts: Documents, row i becomes embedding i
+        tfidf: Unfitted StreamingTfidf
+        reducer: Unfitted reducer (see training/reducers.py)
+        path: Output .npy file
+        chunk_size: Documents per chunk
+        progress_callback: Called with (rows_done, total_rows) after each embedded chunk
+
+    Returns:
+        (embeddings as a writable np.memmap backed by `path`, reducer quality report)
+    """
+    path = Path(path)
+    n = len(texts)
+    starts = range(0, n, chunk_size)
+    with tempfile.TemporaryDirectory(prefix='counts-', dir=path.parent) as spill_dir:
+        spill = [Path(spill_dir) / f'{i}.npz' for i in starts]
+        for start, chunk_path in zip(starts, spill):
+            counts = tfidf.hasher.transform(texts[start:start + chunk_size])
+            tfidf.count(counts)
+            save_npz(chunk_path, counts, compressed=False)
+        tfidf.finalize()
+
+        sample = sample_rows(n, max(reducer.sample_rows, RECALL_CANDIDATES))
+        parts = []
+        for start, chunk_path in zip(starts, spill):
+            rows = sample[(sample >= start) & (sample < start + chunk_size)] - start
+            if len(rows):
+                parts.append(tfidf.transform_counts(load_npz(chunk_path)[rows]))
+        sample = vstack(parts).tocsr()
+        reducer.fit(sample)
+        report = evaluate(reducer, sample)
+        del sample, parts
+
+        embeddings = np.lib.format.open_memmap(
+            path, mode='w+', dtype=np.float32, shape=(n, reducer.n_components_)
+        )
+        for start, chunk_path in zip(starts, spill):
+            block = reducer.transform(tfidf.transform_counts(load_npz(chunk_path)))
+            embeddings[start:start + len(block)] = normalize(block, copy=False)
+            chunk_path.unlink()
+            if progress_callback:
+                progress_callback(start + len(block), n)
+    embeddings.flush()
+    return embeddings, report
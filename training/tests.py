@@ -0,0 +1,361 @@
+"""
+Tests for the training-side modules shared with the recommenders
+
+Run with: python manage.py test training.tests
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_catalog
+from training import batch
+from training.facets import FacetIndex, VOTE_BUCKETS, normalize_genre
+from training.lookup import TitleTable, write_lookup_tables
+from training.metadata import HOT_COLUMNS, load_metadata
+from training.ranking import HybridRanker
+from training.reducers import SVDReducer
+from training.stages import StageCache, file_fingerprint
+from training.streaming import StreamingTfidf, embed_to_memmap
+from training.train import STAGE_VERSIONS, MovieRecommenderTrainer
+from training.weights import parse_weights
+
+
+class CatalogTestCase(unittest.TestCase):
+    """Metadata of one small synthetic catalog per test class"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        path = generate_catalog(cls.directory, 2000, dim=8, seed=11)
+        cls.metadata = load_metadata(path, HOT_COLUMNS + ['popularity'])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+
+class FacetIndexTests(CatalogTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.facets = FacetIndex(cls.metadata)
+
+    def brute_force_top_rated(self, n, min_votes=0, genres=None):
+        keep = self.metadata['vote_average'].notna() & (self.metadata['vote_count'] >= min_votes)
+        if genres:
+            wanted = {normalize_genre(g) for g in genres}
+            keep &= self.metadata['genres'].map(lambda gs: any(normalize_genre(g) in wanted for g in gs))
+        rows = self.metadata[keep]
+        order = np.lexsort((-rows['vote_count'].to_numpy(), -rows['vote_average'].to_numpy()))
+        return rows.index.to_numpy()[order][:n]
+
+    def test_no_filter_compiles_to_none(self):
+        self.assertIsNone(self.facets.compile())
+        self.assertIsNone(self.facets.compile(exclude_company=-1))
+
+    def test_compile_matches_the_metadata(self):
+        mask = self.facets.compile(min_year=1990, max_year=2005, genres=['science fiction', 'Drama'],
+                                   min_rating=6.5, min_votes=100)
+        year = pd.to_numeric(self.metadata['release_date'].str[:4], errors='coerce')
+        expected = (
+            year.between(1990, 2005)
+            & self.metadata['genres'].map(lambda gs: any(normalize_genre(g) in ('sciencefiction', 'drama') for g in gs))
+            & (self.metadata['vote_average'] >= 6.5)
+            & (self.metadata['vote_count'] >= 100)
+        )
+        np.testing.assert_array_equal(mask, expected.to_numpy())
+
+    def test_excluded_company_and_unknown_genre(self):
+        company = self.facets.company[0]
+        mask = self.facets.compile(exclude_company=company)
+        np.testing.assert_array_equal(mask, self.facets.company != company)
+        self.assertFalse(self.facets.compile(genres=['No Such Genre']).any())
+
+    def test_top_rated_matches_a_full_sort(self):
+        # On bucket thresholds, between them and above the largest
+        for min_votes in VOTE_BUCKETS + (250, 20000):
+            for genres in (None, ['Comedy'], ['comedy', 'Horror', 'Unknown']):
+                with self.subTest(min_votes=min_votes, genres=genres):
+                    np.testing.assert_array_equal(
+                        self.facets.top_rated(25, min_votes=min_votes, genres=genres),
+                        self.brute_force_top_rated(25, min_votes, genres)
+                    )
+
+    def test_top_rated_unknown_genres_are_empty(self):
+        self.assertEqual(len(self.facets.top_rated(10, genres=['No Such Genre'])), 0)
+
+
+class TitleTableTests(CatalogTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        write_lookup_tables(cls.directory, cls.metadata)
+        cls.tables = {
+            'memory': TitleTable.from_metadata(cls.metadata),
+            'mapped': TitleTable.load(cls.directory),
+        }
+
+    def test_exact_title_and_id_lookups(self):
+        for source, table in self.tables.items():
+            for row in (0, 1, 777, len(self.metadata) - 1):
+                movie = self.metadata.iloc[row]
+                with self.subTest(source=source, row=row):
+                    self.assertEqual(table.title(row), movie['title'])
+                    self.assertEqual(table.find(movie['title']), row)
+                    self.assertEqual(table.by_tmdb_id(movie['id']), row)
+                    if movie['imdb_id']:
+                        self.assertEqual(table.by_imdb_id(movie['imdb_id']), row)
+            self.assertIsNone(table.find(self.metadata['title'].iloc[0] + ' II'))
+            self.assertIsNone(table.by_tmdb_id(-1))
+            self.assertIsNone(table.by_imdb_id('nm0000001'))
+
+    def test_substring_search_is_case_insensitive_in_row_order(self):
+        needle = self.metadata['title'].iloc[5].split()[-1].upper()
+        expected = [i for i, t in enumerate(self.metadata['title']) if needle.lower() in t.lower()]
+        for source, table in self.tables.items():
+            with self.subTest(source=source):
+                self.assertEqual(table.search(needle, n=1000), expected)
+                self.assertEqual(table.search(needle, n=3), expected[:3])
+                self.assertEqual(table.search(''), [])
+                self.assertEqual(table.search('a\nb'), [])
+
+    def test_missing_tables_fall_back_to_metadata(self):
+        with tempfile.TemporaryDirectory() as empty:
+            with self.assertRaises(FileNotFoundError):
+                TitleTable.load(empty)
+            self.assertEqual(TitleTable.load(empty, self.metadata).source, 'metadata')
+
+
+class BatchInferenceTests(CatalogTestCase):
+    def test_auto_seed_types(self):
+        metadata = self.metadata.copy()
+        # A numeric title that is not a TMDB id, and one that is (the id wins)
+        self.assertNotIn(1917, set(metadata['id']))
+        metadata.loc[3, 'title'] = '1917'
+        metadata.loc[4, 'title'] = str(metadata['id'].iloc[5])
+        resolver = batch.SeedResolver(TitleTable.from_metadata(metadata))
+        row = int(np.flatnonzero(metadata['imdb_id'].notna())[0])
+        self.assertEqual(resolver.resolve(metadata['title'].iloc[10]), 10)
+        self.assertEqual(resolver.resolve(metadata['imdb_id'].iloc[row]), row)
+        self.assertEqual(resolver.resolve(str(metadata['id'].iloc[20])), 20)
+        self.assertEqual(resolver.resolve('1917'), 3)
+        self.assertEqual(resolver.resolve(str(metadata['id'].iloc[5])), 5)
+        self.assertEqual(resolver.resolve('tt0000000'), -1)
+        np.testing.assert_array_equal(resolver.resolve_many(['1917', 'No Such Movie']), [3, -1])
+        # An explicit seed type does not fall back to titles
+        self.assertEqual(batch.SeedResolver(TitleTable.from_metadata(metadata), 'tmdb_id').resolve('1917'), -1)
+
+    def test_exclude_seeds_pads_short_rows(self):
+        seeds = np.array([7, 9])
+        indices = np.array([[7, 1, 2, -1], [3, 9, -1, 4]])
+        scores = np.array([[1.0, 0.9, 0.8, -np.inf], [0.7, 0.6, -np.inf, 0.5]], dtype=np.float32)
+        got_indices, got_scores = batch.exclude_seeds(seeds, indices, scores, 3)
+        np.testing.assert_array_equal(got_indices, [[1, 2, -1], [3, 4, -1]])
+        np.testing.assert_array_equal(got_scores, np.array([[0.9, 0.8, -np.inf], [0.7, 0.5, -np.inf]], dtype=np.float32))
+
+    def test_run_writes_unresolved_seeds_as_errors(self):
+        seeds = [self.metadata['title'].iloc[0], 'No Such Movie', str(self.metadata['id'].iloc[1])]
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'recommendations.jsonl'
+            stats = batch.run(self.directory, seeds, str(output), n=5, batch_size=2, progress=False)
+            records = [json.loads(line) for line in output.read_text().splitlines()]
+        self.assertEqual((stats['seeds'], stats['resolved'], stats['recommendations']), (3, 2, 10))
+        self.assertEqual([r['seed'] for r in records], seeds)
+        self.assertEqual(records[1], {'seed': 'No Such Movie', 'error': 'not found'})
+        for record, row in ((records[0], 0), (records[2], 1)):
+            self.assertEqual(record['tmdb_id'], int(self.metadata['id'].iloc[row]))
+            self.assertEqual([r['rank'] for r in record['recommendations']], [1, 2, 3, 4, 5])
+            self.assertNotIn(record['tmdb_id'], [r['tmdb_id'] for r in record['recommendations']])
+
+
+class HybridRankerTests(unittest.TestCase):
+    def setUp(self):
+        n = 1000
+        rng = np.random.default_rng(3)
+        self.ranker = HybridRanker(
+            rating=rng.uniform(1, 9, n), votes=rng.integers(0, 5000, n),
+            popularity=rng.lognormal(2, 1, n), year=rng.integers(1950, 2024, n),
+            candidates=50
+        )
+        self.indices = rng.permutation(n)[:300]
+        self.similarities = np.sort(rng.uniform(0, 1, 300).astype(np.float32))[::-1]
+
+    def test_default_weights_keep_the_similarity_order(self):
+        weights = self.ranker.resolve()
+        self.assertFalse(HybridRanker.active(weights))
+        indices, similarities = self.ranker.rerank(self.indices, self.similarities, 20, weights)
+        np.testing.assert_array_equal(indices, self.indices[:20])
+        np.testing.assert_array_equal(similarities, self.similarities[:20])
+
+    def test_rerank_sorts_within_blocks(self):
+        weights = self.ranker.resolve({'quality': 1.0, 'recency': 0.5})
+        indices, similarities = self.ranker.rerank(self.indices, self.similarities, 300, weights)
+        scores = self.ranker.score(indices, similarities, weights)
+        for start in range(0, 300, 50):
+            block = slice(start, start + 50)
+            # Each block holds the same candidates as before, best hybrid score first
+            self.assertEqual(set(indices[block]), set(self.indices[block]))
+            self.assertTrue(np.all(np.diff(scores[block]) <= 0))
+
+    def test_deeper_rerank_keeps_earlier_results(self):
+        weights = self.ranker.resolve({'popularity': 0.8})
+        shallow, _ = self.ranker.rerank(self.indices[:100], self.similarities[:100], 100, weights)
+        deep, _ = self.ranker.rerank(self.indices, self.similarities, 300, weights)
+        np.testing.assert_array_equal(deep[:100], shallow)
+
+    def test_invalid_weights_and_half_life_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "Unknown ranking weight 'novelty'"):
+            self.ranker.resolve({'novelty': 1.0})
+        with self.assertRaisesRegex(ValueError, 'finite'):
+            self.ranker.resolve({'quality': float('inf')})
+        with self.assertRaisesRegex(ValueError, 'half-life'):
+            self.ranker.configure(half_life=0)
+
+    def test_recency_halves_every_half_life(self):
+        ranker = HybridRanker(np.ones(3), np.ones(3), np.ones(3), np.array([2020, 2010, 0]), half_life=10)
+        np.testing.assert_allclose(ranker.recency(np.arange(3)), [1.0, 0.5, 0.0])
+        np.testing.assert_allclose(ranker.recency(np.arange(3), half_life=5), [1.0, 0.25, 0.0])
+
+
+class ParseWeightsTests(unittest.TestCase):
+    def test_parses_names_and_values(self):
+        self.assertEqual(parse_weights(' quality:0.3, recency:1e-1,,'), {'quality': 0.3, 'recency': 0.1})
+        self.assertEqual(parse_weights(''), {})
+
+    def test_errors_name_the_weight(self):
+        for text, message in (
+            ('novelty:1', "Unknown ranking weight 'novelty'"),
+            ('quality:high', "Ranking weight 'quality' must be a number, e.g. quality:0.2"),
+            ('quality', "Ranking weight 'quality' must be a number"),
+            ('recency:nan', "Ranking weight 'recency' must be a finite number"),
+        ):
+            with self.subTest(text=text), self.assertRaisesRegex(ValueError, message):
+                parse_weights(text)
+
+
+class StageCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.data = self.directory / 'movies.csv'
+        self.data.write_text('id,title\n1,Heat\n')
+        self.trainer = MovieRecommenderTrainer(self.directory / 'model')
+        self.builds = 0
+
+    def run_stage(self, **kwargs):
+        def build(out):
+            self.builds += 1
+            (out / 'features.txt').write_text(self.data.read_text())
+
+        return self.trainer._run_stage(
+            'features', {'data': file_fingerprint(self.data)}, build, lambda path: path, **kwargs
+        )
+
+    def test_unchanged_inputs_hit_the_cache(self):
+        key, path = self.run_stage()
+        self.assertEqual(self.run_stage(), (key, path))
+        self.assertEqual(self.builds, 1)
+        self.assertEqual((path / 'features.txt').read_text(), self.data.read_text())
+        # resume=False rebuilds in place
+        self.assertEqual(self.run_stage(resume=False), (key, path))
+        self.assertEqual(self.builds, 2)
+
+    def test_stage_version_change_misses(self):
+        key, _ = self.run_stage()
+        with mock.patch.dict(STAGE_VERSIONS, {'features': STAGE_VERSIONS['features'] + 1}):
+            bumped, _ = self.run_stage()
+        self.assertNotEqual(bumped, key)
+        self.assertEqual(self.builds, 2)
+
+    def test_input_fingerprint_change_misses(self):
+        key, _ = self.run_stage()
+        self.data.write_text('id,title\n1,Heat\n2,Ronin\n')
+        changed, path = self.run_stage()
+        self.assertNotEqual(changed, key)
+        self.assertEqual(self.builds, 2)
+        self.assertIn('Ronin', (path / 'features.txt').read_text())
+
+    def test_interrupted_build_publishes_nothing(self):
+        cache = StageCache(self.directory / 'cache')
+        key = cache.key('embeddings', {'n': 1})
+        with self.assertRaises(KeyboardInterrupt):
+            with cache.build('embeddings', key, {'n': 1}) as scratch:
+                (scratch / 'embeddings.npy').write_bytes(b'partial')
+                raise KeyboardInterrupt
+        self.assertIsNone(cache.get('embeddings', key))
+        self.assertEqual(list(cache.root.iterdir()), [])
+
+    def test_prune_keeps_the_most_recently_used_entries(self):
+        cache = StageCache(self.directory / 'cache', keep=2)
+        keys = [cache.key('index', {'m': m}) for m in range(4)]
+
+        def build(key, mtime):
+            with cache.build('index', key, {}):
+                pass
+            os.utime(cache.path('index', key), (mtime, mtime))
+
+        build(keys[0], 1000)
+        build(keys[1], 2000)
+        # Reading an entry marks it used, so it outlives a newer unused one
+        self.assertIsNotNone(cache.get('index', keys[0]))
+        build(keys[2], 3000)
+        self.assertEqual(sorted(p.name for p in cache.root.iterdir()),
+                         sorted(cache.path('index', k).name for k in (keys[0], keys[2])))
+
+        # Touched now, keys[0] is still newer than keys[2]
+        build(keys[3], 4000)
+        self.assertEqual(sorted(p.name for p in cache.root.iterdir()),
+                         sorted(cache.path('index', k).name for k in (keys[0], keys[3])))
+
+
+class StreamingTfidfTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Zipf-distributed terms, like words in movie overviews
+        rng = np.random.default_rng(5)
+        words = np.array([f'term{i}' for i in range(800)])
+        p = 1 / np.arange(1, len(words) + 1) ** 1.1
+        cls.docs = [' '.join(rng.choice(words, size=rng.integers(20, 80), p=p / p.sum())) for _ in range(1500)]
+
+    def test_cosine_geometry_matches_tfidf_vectorizer(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        params = dict(min_df=5, max_df=0.6, max_features=10_000, stop_words='english', sublinear_tf=True)
+        reference = TfidfVectorizer(**params, dtype=np.float32).fit_transform(self.docs)
+        streaming = StreamingTfidf(**params).fit(self.docs, chunk_size=400)
+        matrix = streaming.transform(self.docs)
+
+        self.assertEqual(matrix.shape, reference.shape)
+        np.testing.assert_allclose((matrix @ matrix.T).toarray(), (reference @ reference.T).toarray(), atol=1e-6)
+
+    def test_max_features_keeps_the_most_frequent_terms(self):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        counts = np.asarray(CountVectorizer(min_df=5, max_df=0.6).fit_transform(self.docs).sum(axis=0)).ravel()
+        streaming = StreamingTfidf(max_features=300).fit(self.docs, chunk_size=400)
+        kept = np.asarray(streaming.hasher.transform(self.docs)[:, streaming.columns_].sum(axis=0)).ravel()
+        # Same term counts as TfidfVectorizer keeps; only ties at the cutoff may pick other terms
+        np.testing.assert_array_equal(np.sort(kept)[::-1], np.sort(counts)[::-1][:300])
+
+    def test_embed_to_memmap(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'embeddings.npy'
+            progress = []
+            embeddings, report = embed_to_memmap(
+                self.docs, StreamingTfidf(), SVDReducer(16), path, chunk_size=400,
+                progress_callback=lambda done, total: progress.append((done, total))
+            )
+            self.assertEqual(embeddings.shape, (len(self.docs), 16))
+            np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+            np.testing.assert_array_equal(np.load(path), embeddings)
+            self.assertEqual(progress[-1], (len(self.docs), len(self.docs)))
+            self.assertEqual((report['method'], report['n_components']), ('svd', 16))
+            # The spilled counts are removed with their directory
+            self.assertEqual(os.listdir(directory), ['embeddings.npy'])
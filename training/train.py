@@ -1,6 +1,8 @@
 """
 Advanced Movie Recommendation System - Training Pipeline
 Optimized for TMDB Movies Dataset 2023 (930K+ movies)
+
+Run from the repository root: python -m training.train
 """
 
 import pandas as pd
@@ -13,26 +15,69 @@ from sklearn.random_projection import GaussianRandomProjection
 from nltk.stem.snowball import SnowballStemmer
 import pickle
 import json
+import os
+import shutil
+import time
 from pathlib import Path
 from ast import literal_eval
 import warnings
 warnings.filterwarnings('ignore')
 
+from training.indexing import build_hnsw, build_sharded, write_shards
+from training.lookup import write_lookup_tables
+from training.metadata import write_metadata
+from training.reducers import RECALL_CANDIDATES, evaluate, make_reducer, sample_rows
+from training.similarity import INDEX_FILE, SHARD_DIR, SHARD_MANIFEST, shard_files
+from training.stages import STAGE_DIR, StageCache, file_fingerprint
+from training.streaming import CHUNK_SIZE, StreamingTfidf, embed_to_memmap
+
+# Columns written to movie_metadata.parquet
+METADATA_COLUMNS = [
+    'id', 'title', 'release_date', 'primary_company',
+    'genres', 'vote_average', 'vote_count', 'popularity',
+    'overview', 'imdb_id', 'poster_path'
+]
+
+# Bump a stage's version when its code changes so cached outputs are rebuilt
+STAGE_VERSIONS = {'features': 1, 'embeddings': 1, 'index': 2}
+
+# HNSW graph parameters
+HNSW_M = 32
+EF_CONSTRUCTION = 200
+
 
 class MovieRecommenderTrainer:
-    def __init__(self, output_dir='./models', use_dimensionality_reduction=True, n_components=500):
+    def __init__(self, output_dir='./models', use_dimensionality_reduction=True, n_components=500,
+                 reducer='svd', streaming=False, chunk_size=CHUNK_SIZE, cache_dir=None,
+                 index_threads=None, index_shards=1):
         """
         Initialize the trainer with advanced configurations
         
         Args:
             output_dir: Directory to save trained models
-            use_dimensionality_reduction: Use SVD to reduce memory footprint
-            n_components: Number of latent features for SVD
+            use_dimensionality_reduction: Reduce TF-IDF to `n_components` dimensions
+                (False keeps vocabulary-wide embeddings; small catalogs only)
+            n_components: Embedding dimensions after reduction
+            reducer: 'svd' (randomized truncated SVD) or 'random_projection'
+            streaming: Hash, transform and project in chunks straight into a
+                memory-mapped embeddings file (bounded memory for the full catalog)
+            chunk_size: Movies per chunk in streaming mode
+            cache_dir: Stage cache (default: <output_dir>/.stages); reruns reuse
+                every stage whose inputs and parameters are unchanged
+            index_threads: Threads used to build the FAISS index (None: all cores)
+            index_shards: Build the index as this many HNSW shards in parallel
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         self.use_svd = use_dimensionality_reduction
         self.n_components = n_components
+        self.reducer = reducer
+        self.reduction_report = None
+        self.streaming = streaming
+        self.chunk_size = chunk_size
+        self.stages = StageCache(cache_dir or self.output_dir / STAGE_DIR)
+        self.index_threads = index_threads
+        self.index_shards = index_shards
         self.stemmer = SnowballStemmer('english')
         
     def load_data(self, data_path):
@@ -47,19 +92,21 @@ class MovieRecommenderTrainer:
         """
         print("Loading TMDB dataset...")
         
-        # Handle both file path and directory path
-        if Path(data_path).is_file():
-            df = pd.read_csv(data_path, low_memory=False)
-        else:
-            # Assume it's a directory
-            csv_path = Path(data_path) / 'TMDB_movie_dataset_v11.csv'
-            df = pd.read_csv(csv_path, low_memory=False)
+        df = pd.read_csv(self.resolve_data_path(data_path), low_memory=False)
         
         print(f"Loaded {len(df)} movies")
         print(f"Columns: {df.columns.tolist()}")
         
         return df
     
+    @staticmethod
+    def resolve_data_path(data_path):
+        """CSV file to read: `data_path` itself, or the TMDB CSV inside a directory"""
+        if Path(data_path).is_file():
+            return Path(data_path)
+        # Assume it's a directory
+        return Path(data_path) / 'TMDB_movie_dataset_v11.csv'
+    
     def parse_json_column(self, col_data, key='name'):
         """
         Parse JSON-like string columns (genres, keywords, production_companies)
@@ -222,85 +269,186 @@ class MovieRecommenderTrainer:
         
         return tfidf_matrix, tfidf
     
-    def reduce_dimensions_fast(self, tfidf_matrix):
-        print("Applying Fast Random Projection...")
-
-        # good balance between speed & accuracy
-        n_components = min(384, tfidf_matrix.shape[1] // 2)
+    def reduce_dimensions(self, tfidf_matrix):
+        """Fit the configured reducer on a row sample and reduce the TF-IDF matrix in chunks"""
+        reducer = make_reducer(self.use_svd, self.n_components, self.reducer)
+        print(f"Reducing dimensions ({reducer.method})...")
 
-        rp = SparseRandomProjection(
-            n_components=n_components,
-            dense_output=True,
-            random_state=42
-        )
+        sample = tfidf_matrix[sample_rows(tfidf_matrix.shape[0], max(reducer.sample_rows, RECALL_CANDIDATES))]
+        reducer.fit(sample)
+        self.reduction_report = evaluate(reducer, sample)
 
-        reduced_matrix = rp.fit_transform(tfidf_matrix).astype(np.float32)
+        reduced_matrix = np.empty((tfidf_matrix.shape[0], reducer.n_components_), dtype=np.float32)
+        for start in range(0, tfidf_matrix.shape[0], self.chunk_size):
+            reduced_matrix[start:start + self.chunk_size] = reducer.transform(tfidf_matrix[start:start + self.chunk_size])
 
         print(f"Reduced matrix shape: {reduced_matrix.shape}")
-        return reduced_matrix, rp
+        self._print_reduction_report()
+        return reduced_matrix, reducer
 
-    
+    def _print_reduction_report(self):
+        report = self.reduction_report
+        recall = next(v for k, v in report.items() if k.startswith('neighbor_recall'))
+        print(f"Explained variance: {report['explained_variance']:.1%}, neighbor recall: {recall:.1%}")
 
-    def build_vector_index(self, embeddings):
-        print("Building FAISS vector index...")
+    def build_embeddings_streaming(self, df, path):
+        """
+        Out-of-core TF-IDF + dimensionality reduction
+        
+        The vocabulary comes from one counting pass over hashed terms; the reducer
+        is fitted on a row sample, then every `chunk_size` movies are weighted,
+        reduced and normalized into a memory-mapped file, so the full TF-IDF
+        matrix is never materialized.
+        """
+        print(f"Building TF-IDF vocabulary in chunks of {self.chunk_size:,}...")
+        tfidf = StreamingTfidf(min_df=5, max_df=0.6, max_features=10000)
+        reducer = make_reducer(self.use_svd, self.n_components, self.reducer)
 
-        # cosine similarity requires normalized vectors
-        faiss.normalize_L2(embeddings)
+        def report(done, total):
+            print(f"  Embedded {done:,}/{total:,} movies")
 
-        dim = embeddings.shape[1]
+        embeddings, self.reduction_report = embed_to_memmap(
+            df['soup'].to_numpy(), tfidf, reducer, path,
+            chunk_size=self.chunk_size, progress_callback=report
+        )
+        print(f"Vocabulary: {tfidf.n_features_} terms from {tfidf.n_docs:,} movies ({reducer.method})")
+        print(f"Embeddings shape: {embeddings.shape}")
+        self._print_reduction_report()
+        return embeddings, tfidf, reducer
 
-        # HNSW = fast + accurate
-        index = faiss.IndexHNSWFlat(dim, 32)
-        index.hnsw.efConstruction = 200
+    def build_vector_index(self, embeddings):
+        """
+        HNSW index (or `index_shards` HNSW shards) over the embeddings
+        
+        Rows are added `chunk_size` at a time with progress and ETA, using
+        `index_threads` threads (split between shards when sharded).
+        """
+        threads = self.index_threads or faiss.omp_get_max_threads()
+        shards = f" as {self.index_shards} shards" if self.index_shards > 1 else ""
+        print(f"Building FAISS vector index{shards} with {threads} threads...")
+
+        if not isinstance(embeddings, np.memmap):
+            # cosine similarity requires normalized vectors
+            faiss.normalize_L2(embeddings)
+
+        total = len(embeddings)
+        start = time.perf_counter()
+        done = 0
+
+        def report(n):
+            nonlocal done
+            done += n
+            elapsed = time.perf_counter() - start
+            eta = elapsed / done * (total - done)
+            print(f"  Indexed {done:,}/{total:,} movies ({done / total:.0%}), "
+                  f"{done / elapsed:,.0f}/s, ETA {eta:.0f}s")
 
-        index.add(embeddings)
+        # HNSW = fast + accurate
+        params = dict(m=HNSW_M, ef_construction=EF_CONSTRUCTION, threads=threads,
+                      chunk_size=self.chunk_size, progress_callback=report)
+        if self.index_shards > 1:
+            index = build_sharded(embeddings, self.index_shards, **params)
+        else:
+            index = build_hnsw(embeddings, **params)
 
-        print(f"Indexed {index.ntotal} movies")
+        print(f"Indexed {total} movies in {time.perf_counter() - start:.1f}s")
         return index
+
+    def _build_index(self, out, embeddings):
+        index = self.build_vector_index(embeddings)
+        if isinstance(index, list):
+            write_shards(index, out / SHARD_DIR)
+        else:
+            faiss.write_index(index, str(out / INDEX_FILE))
     
-    def save_model(self, df, embeddings, tfidf_vectorizer, projection_model, index):
+    def save_model(self, df, embeddings, tfidf_vectorizer, reducer, index):
         print("Saving model artifacts...")
 
         # metadata
-        metadata_df = df[[
-            'id', 'title', 'release_date', 'primary_company',
-            'genres', 'vote_average', 'vote_count', 'popularity',
-            'overview', 'imdb_id', 'poster_path'
-        ]].copy()
-
-        metadata_df.to_parquet(
-            self.output_dir / 'movie_metadata.parquet',
-            compression='gzip',
-            index=True
-        )
+        metadata_df = df[METADATA_COLUMNS].copy()
 
-        # save embeddings
-        np.save(self.output_dir / 'embeddings.npy', embeddings)
+        write_metadata(metadata_df, self.output_dir)
 
-        # save FAISS index
-        faiss.write_index(index, str(self.output_dir / 'movie_index.faiss'))
+        # save embeddings (link the stage cache's file when they come from it)
+        if isinstance(embeddings, np.memmap):
+            self._publish(embeddings.filename, 'embeddings.npy')
+        else:
+            np.save(self.output_dir / 'embeddings.npy', embeddings)
+
+        # save FAISS index: one file, or a directory of shards (remove the other layout)
+        if isinstance(index, Path) and index.is_dir():
+            (self.output_dir / INDEX_FILE).unlink(missing_ok=True)
+            shutil.rmtree(self.output_dir / SHARD_DIR, ignore_errors=True)
+            (self.output_dir / SHARD_DIR).mkdir()
+            for path in [*shard_files(index), index / SHARD_MANIFEST]:
+                self._publish(path, f'{SHARD_DIR}/{path.name}')
+        else:
+            shutil.rmtree(self.output_dir / SHARD_DIR, ignore_errors=True)
+            if isinstance(index, Path):
+                self._publish(index, INDEX_FILE)
+            else:
+                faiss.write_index(index, str(self.output_dir / INDEX_FILE))
 
-        # save title map
-        title_to_idx = pd.Series(df.index, index=df['title']).to_dict()
-        with open(self.output_dir / 'title_to_idx.json', 'w') as f:
-            json.dump(title_to_idx, f)
+        # save title and id lookup tables
+        write_lookup_tables(self.output_dir, metadata_df)
 
         # save vectorizer
         with open(self.output_dir / 'tfidf_vectorizer.pkl', 'wb') as f:
             pickle.dump(tfidf_vectorizer, f)
 
-        # save projection model
+        # save dimensionality reducer
         with open(self.output_dir / 'projection_model.pkl', 'wb') as f:
-            pickle.dump(projection_model, f)
+            pickle.dump(reducer, f)
+
+        with open(self.output_dir / 'config.json', 'w') as f:
+            json.dump({
+                'n_movies': len(metadata_df),
+                'embedding_dim': int(embeddings.shape[1]),
+                'streaming': self.streaming,
+                'reduction': self.reduction_report,
+            }, f, indent=2)
 
         print(f"✅ Model saved to {self.output_dir}")
 
-    def train(self, data_path, quality_threshold='medium', max_movies=None):
+    def _publish(self, source, name):
+        """Hard-link (or copy) a cached artifact into the model directory"""
+        target = self.output_dir / name
+        if target.exists() and os.path.samefile(source, target):
+            return
+        tmp = target.with_name(target.name + '.tmp')
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(source, tmp)
+        except OSError:
+            shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
 
-        print("="*80)
-        print("🎬 TMDB Movie Recommendation System Training (ANN Version)")
-        print("="*80)
+    def _run_stage(self, name, inputs, build, load, resume=True):
+        """
+        Load a stage's cached output, or build it into the stage cache first
+        
+        Args:
+            name: Stage name (key of STAGE_VERSIONS)
+            inputs: Everything the output depends on (JSON-serializable)
+            build: Called with a scratch directory to write the outputs to
+            load: Called with the completed stage directory; its result is returned
+            resume: Reuse a cached output with the same inputs
+        
+        Returns:
+            (stage key, load result)
+        """
+        inputs = {'version': STAGE_VERSIONS[name], **inputs}
+        key = self.stages.key(name, inputs)
+        path = self.stages.get(name, key) if resume else None
+        if path is not None:
+            print(f"♻️  Reusing cached {name} stage ({key})")
+        else:
+            with self.stages.build(name, key, inputs) as scratch:
+                build(scratch)
+            path = self.stages.path(name, key)
+        return key, load(path)
 
+    def _build_features(self, out, data_path, quality_threshold, max_movies):
         # Load data
         df = self.load_data(data_path)
 
@@ -312,17 +460,102 @@ class MovieRecommenderTrainer:
             df = df.head(max_movies)
             print(f"Limited to top {max_movies} movies")
 
-        # TF-IDF
-        tfidf_matrix, tfidf_vectorizer = self.build_tfidf_matrix(df)
+        # Only metadata and the soup are needed downstream
+        df[METADATA_COLUMNS + ['soup']].to_parquet(out / 'features.parquet', compression='zstd')
+
+    def _build_embeddings(self, out, df):
+        if self.streaming:
+            _, tfidf_vectorizer, reducer = self.build_embeddings_streaming(df, out / 'embeddings.npy')
+        else:
+            # TF-IDF
+            tfidf_matrix, tfidf_vectorizer = self.build_tfidf_matrix(df)
+
+            # Dimensionality reduction
+            embeddings, reducer = self.reduce_dimensions(tfidf_matrix)
 
-        # Fast dimensionality reduction
-        embeddings, projection_model = self.reduce_dimensions_fast(tfidf_matrix)
+            # cosine similarity requires normalized vectors
+            faiss.normalize_L2(embeddings)
+            np.save(out / 'embeddings.npy', embeddings)
+
+        with open(out / 'tfidf_vectorizer.pkl', 'wb') as f:
+            pickle.dump(tfidf_vectorizer, f)
+        with open(out / 'projection_model.pkl', 'wb') as f:
+            pickle.dump(reducer, f)
+        with open(out / 'reduction.json', 'w') as f:
+            json.dump(self.reduction_report, f, indent=2)
+
+    def _load_embeddings(self, path):
+        with open(path / 'tfidf_vectorizer.pkl', 'rb') as f:
+            tfidf_vectorizer = pickle.load(f)
+        with open(path / 'projection_model.pkl', 'rb') as f:
+            reducer = pickle.load(f)
+        with open(path / 'reduction.json') as f:
+            self.reduction_report = json.load(f)
+        return np.load(path / 'embeddings.npy', mmap_mode='r'), tfidf_vectorizer, reducer
+
+    def train(self, data_path, quality_threshold='medium', max_movies=None, resume=True):
+        """
+        Run the pipeline: features -> embeddings -> index -> model directory
+        
+        Each stage is checkpointed in the stage cache under a hash of its inputs,
+        so a rerun (or a run after a failure) skips unchanged stages; changing only
+        index parameters, for example, reuses the cached features and embeddings.
+        
+        Args:
+            data_path: Dataset CSV, or a directory containing TMDB_movie_dataset_v11.csv
+            quality_threshold: 'low', 'medium', or 'high'
+            max_movies: Keep only the top movies by quality score
+            resume: Reuse cached stage outputs (False rebuilds every stage)
+        """
+
+        print("="*80)
+        print("🎬 TMDB Movie Recommendation System Training (ANN Version)")
+        print("="*80)
+
+        # Load data + feature engineering
+        features_key, df = self._run_stage(
+            'features',
+            {
+                'data': file_fingerprint(self.resolve_data_path(data_path)),
+                'quality_threshold': quality_threshold,
+                'max_movies': max_movies,
+            },
+            build=lambda out: self._build_features(out, data_path, quality_threshold, max_movies),
+            load=lambda path: pd.read_parquet(path / 'features.parquet'),
+            resume=resume
+        )
+
+        # TF-IDF + dimensionality reduction
+        embeddings_key, (embeddings, tfidf_vectorizer, reducer) = self._run_stage(
+            'embeddings',
+            {
+                'features': features_key,
+                'streaming': self.streaming,
+                'use_dimensionality_reduction': self.use_svd,
+                'n_components': self.n_components,
+                'reducer': self.reducer,
+            },
+            build=lambda out: self._build_embeddings(out, df),
+            load=self._load_embeddings,
+            resume=resume
+        )
 
         # Build search index
-        index = self.build_vector_index(embeddings)
+        _, index_path = self._run_stage(
+            'index',
+            {
+                'embeddings': embeddings_key,
+                'hnsw_m': HNSW_M,
+                'ef_construction': EF_CONSTRUCTION,
+                'shards': self.index_shards,
+            },
+            build=lambda out: self._build_index(out, embeddings),
+            load=lambda path: path / SHARD_DIR if (path / SHARD_DIR).exists() else path / INDEX_FILE,
+            resume=resume
+        )
 
         # Save model
-        self.save_model(df, embeddings, tfidf_vectorizer, projection_model, index)
+        self.save_model(df, embeddings, tfidf_vectorizer, reducer, index_path)
 
         print("="*80)
         print("✅ Training completed successfully!")
@@ -339,11 +572,13 @@ if __name__ == "__main__":
     
     # Configuration based on your needs:
     
-    # For FULL dataset (930K+ movies) - Requires ~16GB RAM
+    # For FULL dataset (930K+ movies) - streaming keeps TF-IDF/projection memory
+    # bounded by chunk_size instead of needing ~16GB RAM
     # trainer = MovieRecommenderTrainer(
     #     output_dir='./models_full',
     #     use_dimensionality_reduction=True,
-    #     n_components=400
+    #     n_components=400,
+    #     streaming=True
     # )
     # df, sim_matrix = trainer.train(path, quality_threshold='low')
     
@@ -0,0 +1,42 @@
+"""
+Hybrid ranking weights
+Names, defaults, parsing and validation of the weights used by
+training.ranking.HybridRanker. Pure Python, so web workers can validate request
+parameters without importing NumPy.
+"""
+
+import math
+from typing import Dict, Mapping, Optional
+
+# Score = sum of weight * feature; similarity alone reproduces the plain ranking
+DEFAULT_WEIGHTS = {'similarity': 1.0, 'quality': 0.0, 'popularity': 0.0, 'recency': 0.0}
+
+
+def _check_weight(name: str, value) -> float:
+    if name not in DEFAULT_WEIGHTS:
+        raise ValueError(f"Unknown ranking weight '{name}' (expected one of {', '.join(DEFAULT_WEIGHTS)})")
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Ranking weight '{name}' must be a number, e.g. {name}:0.2") from None
+    if not math.isfinite(value):
+        raise ValueError(f"Ranking weight '{name}' must be a finite number")
+    return value
+
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """'quality:0.3,recency:0.1' -> {'quality': 0.3, 'recency': 0.1}; raises ValueError"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _, value = item.partition(':')
+        name = name.strip()
+        weights[name] = _check_weight(name, value)
+    return weights
+
+
+def merge_weights(base: Mapping[str, float], overrides: Optional[Mapping[str, float]]) -> Dict[str, float]:
+    """`base` updated with `overrides`; unknown names and non-finite values raise ValueError"""
+    weights = dict(base)
+    for name, value in (overrides or {}).items():
+        weights[name] = _check_weight(name, value)
+    return weights